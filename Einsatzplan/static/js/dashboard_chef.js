@@ -0,0 +1,4042 @@
+// ✅ CP/CV Badge neben Firma im Einsatzdetails-Modal
+function updateFirmaCategoryBadge(ev){
+  const rawCat = String(ev?.category || "CP").toUpperCase();
+  const cat = (rawCat === "CV" || rawCat === "BS") ? rawCat : "CP";
+  const cls = cat === "CV" ? "badge badge-cv" : (cat === "BS" ? "badge badge-bs" : "badge badge-cp");
+  const el = document.getElementById("d-firma-category");
+  if(el){
+    const txt = catToAuftraggeber(cat);
+    el.innerHTML = `<span class="${cls}">${txt}</span>`;
+  }
+}
+
+// ✅ Firma = Kategorie (CP / CV) im Einsatzdetail
+function setFirmaAsCategory(ev){
+  const cat = String(ev?.category || "CP").toUpperCase();
+  const el = document.getElementById("d-firma");
+  if(el){
+    el.textContent = cat;
+  }
+}
+
+// Kleine Sicherheits-Fallbacks
+window.usersList = Array.isArray(window.usersList) ? window.usersList : [];
+window.usersCache = window.usersCache || {};
+window.reportData = window.reportData || {};
+
+// ✅ Letzte Aktivität zuverlässig aktualisieren (auch auf Handy / längeren Portal-Sessions).
+async function pingCurrentUserActivity(){
+  try{
+    await fetch('/activity_ping', { method:'POST', cache:'no-store', credentials:'same-origin' });
+  }catch(_){ }
+}
+pingCurrentUserActivity();
+setInterval(pingCurrentUserActivity, 60000);
+document.addEventListener('visibilitychange', ()=>{
+  if(!document.hidden) pingCurrentUserActivity();
+});
+window.currentEditUser = window.currentEditUser || null;
+
+// Falls Funktionen später nicht global landen, hier neutrale Platzhalter.
+// Die echten Definitionen im Hauptscript überschreiben das wieder.
+window.setLanguageSkills = window.setLanguageSkills || function(){};
+window.renderImagePreview = window.renderImagePreview || function(){};
+
+(function(){
+  function normalizeChefCalendar(){
+    try{
+      if(window.calendar){
+        window.calendar.updateSize();
+      }
+    }catch(e){}
+  }
+
+  window.addEventListener('resize', function(){
+    clearTimeout(window.__chefCalendarResizeTimer);
+    window.__chefCalendarResizeTimer = setTimeout(normalizeChefCalendar, 120);
+  });
+
+  window.addEventListener('orientationchange', function(){
+    setTimeout(normalizeChefCalendar, 250);
+  });
+
+  document.addEventListener('click', function(ev){
+    var tab = ev.target && ev.target.closest ? ev.target.closest('#tab-calendar') : null;
+    if(tab){
+      setTimeout(normalizeChefCalendar, 80);
+      setTimeout(normalizeChefCalendar, 250);
+    }
+  }, true);
+})();
+
+/* REPORT_SORT_BY_DATE */
+    function fmtDateOnlyDE(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      const dd = String(d.getDate()).padStart(2,'0');
+      const mm = String(d.getMonth()+1).padStart(2,'0');
+      const yy = String(d.getFullYear());
+      return `${dd}.${mm}.${yy}`;
+    }
+  
+
+    const ROLE = DASHBOARD_CONTEXT.role;
+    const CAN_EDIT_BOARD = ['chef','vorgesetzter','vorgesetzter_cp'].includes(String(ROLE).trim().toLowerCase().replace('vorgesetzter cp','vorgesetzter_cp'));
+    const IS_PLANNER = (String(ROLE).toLowerCase() === 'planer' || String(ROLE).toLowerCase() === 'planner_bbs');
+    const CAN_USE_YEAR_VIEW = ['vorgesetzter','vorgesetzter_cp'].includes(String(ROLE).trim().toLowerCase().replace('vorgesetzter cp','vorgesetzter_cp'));
+    // ✅ Mobile helper: ensure taps open immediately (iOS/Safari sometimes delays click inside scroll containers)
+    function bindImmediateTap(el, handler){
+      if(!el) return;
+      // touchend fires reliably on mobile; passive:false so we can prevent default
+      el.addEventListener('touchend', function(e){
+        try{ e.preventDefault(); }catch(_){}
+        if(e.stopImmediatePropagation){ e.stopImmediatePropagation(); } else { e.stopPropagation(); }
+        handler(e);
+      }, { passive: false });
+      // fallback for desktop
+      el.addEventListener('click', function(e){
+        if(e.stopImmediatePropagation){ e.stopImmediatePropagation(); } else { e.stopPropagation(); }
+        handler(e);
+      });
+    }
+
+    // ✅ Global tap router: fixes "tap does nothing until next UI action" on mobile in scroll containers
+    // We attach event ids to DOM nodes in eventDidMount and open the right modal on pointerup/touchend.
+    window.__fcTapRouter = window.__fcTapRouter || (function(){
+      const state = {
+        mainMap: new Map(),     // id -> event (calendar)
+        planMap: new Map(),     // id -> event (planningCalendar)
+      };
+
+      function getEventById(which, id){
+        if(!id) return null;
+        if(which === 'planning'){
+          if(window.planningCalendar && typeof window.planningCalendar.getEventById === 'function'){
+            return window.planningCalendar.getEventById(id);
+          }
+          return state.planMap.get(id) || null;
+        }
+        if(window.calendar && typeof window.calendar.getEventById === 'function'){
+          return window.calendar.getEventById(id);
+        }
+        return state.mainMap.get(id) || null;
+      }
+
+      function onTap(e){
+        const el = e.target && (e.target.closest ? e.target.closest(".fc-event") : null);
+        if(!el) return;
+        const id = el.getAttribute("data-event-id");
+        const which = el.getAttribute("data-cal") || "main";
+        const ev = getEventById(which, id);
+        if(!ev) return;
+
+        // prevent delayed clicks
+        try{ e.preventDefault(); }catch(_){}
+        if(e.stopImmediatePropagation){ e.stopImmediatePropagation(); } else { e.stopPropagation(); }
+
+        // Einsatzleitung: Planungsklick öffnet das kleine Fenster mit Button "Mitarbeiter-Auszug anzeigen".
+        if(which === 'planning' && typeof IS_PLANNER !== 'undefined' && IS_PLANNER){
+          const props = ev.extendedProps || {};
+          const eventId = (props.id || ev.id);
+          const title = (ev.title || props.title || "(ohne Titel)");
+          currentElExtractEvent = {eventId: eventId, title: title, props: props};
+          if(typeof openPlanningCommentsModal === 'function'){
+            openPlanningCommentsModal(eventId, title, props);
+          }
+          return;
+        }
+
+        // Hauptkalender: Details sofort öffnen
+        if(typeof openDetailsModal === 'function'){
+          openDetailsModal(ev);
+        }
+      }
+
+      // pointerup covers mouse+touch on modern browsers; capture=true to win against other handlers
+      document.addEventListener("pointerdown", onTap, true);
+      document.addEventListener("pointerup", onTap, true);
+      document.addEventListener("touchend", onTap, { capture: true, passive: false });
+
+      return {
+        register(which, eventObj){
+          if(!eventObj || !eventObj.id) return;
+          (which === 'planning' ? state.planMap : state.mainMap).set(String(eventObj.id), eventObj);
+        }
+      };
+    })();
+
+document.addEventListener("DOMContentLoaded", function() {
+    toggleEventRateInputs('create');
+    toggleEventRateInputs('edit'); // optional
+});
+
+    // ✅ Auftraggeber-Map (UI zeigt keine Abkürzungen)
+    function catToAuftraggeber(cat){
+      const c = String(cat || "").toUpperCase();
+      if(c === "CV") return "Casutt Veranstaltungsservice";
+      if(c === "BS") return "BS";
+      return "CP-Security-Solutions";
+    }
+
+
+    // ✅ Kategorie-Buttons (CV/CP) steuern die versteckten Selects
+    function syncCatButtons(toggleId, selectId){
+      const toggle = document.getElementById(toggleId);
+      const sel = document.getElementById(selectId);
+      if(!toggle || !sel) return;
+
+      const current = String(sel.value || "CV").toUpperCase();
+      toggle.querySelectorAll("button.cat-btn").forEach(btn=>{
+        const v = String(btn.dataset.value || "").toUpperCase();
+        btn.classList.toggle("active", v === current);
+      });
+    }
+
+    function applyGoldHeaders(){
+      const rptVal = String(document.getElementById("report-type")?.value || "CV").toUpperCase();
+      const ctrVal = String(document.getElementById("counter-type")?.value || "CV").toUpperCase();
+
+      const rptTable = document.querySelector("#report table.user-table");
+      const ctrTable = document.querySelector("#counter table.user-table");
+
+      if(rptTable) rptTable.classList.toggle("gold-headers", rptVal === "CP");
+      if(ctrTable) ctrTable.classList.toggle("gold-headers", ctrVal === "CP");
+    }
+
+    function initCategoryButtons(){
+      // Report
+      const rt = document.getElementById("report-type");
+      const rToggle = document.getElementById("report-cat-toggle");
+      if(rt && rToggle){
+        rToggle.querySelectorAll("button.cat-btn").forEach(btn=>{
+          btn.addEventListener("click", ()=>{
+            const v = String(btn.dataset.value || "CV").toUpperCase();
+            rt.value = v;
+            rt.dispatchEvent(new Event("change"));
+            syncCatButtons("report-cat-toggle","report-type");
+            applyGoldHeaders();
+          });
+        });
+        syncCatButtons("report-cat-toggle","report-type");
+      }
+
+      // Zähler
+      const ct = document.getElementById("counter-type");
+      const cToggle = document.getElementById("counter-cat-toggle");
+      if(ct && cToggle){
+        cToggle.querySelectorAll("button.cat-btn").forEach(btn=>{
+          btn.addEventListener("click", ()=>{
+            const v = String(btn.dataset.value || "CV").toUpperCase();
+            ct.value = v;
+            ct.dispatchEvent(new Event("change"));
+            syncCatButtons("counter-cat-toggle","counter-type");
+            applyGoldHeaders();
+          });
+        });
+        syncCatButtons("counter-cat-toggle","counter-type");
+      }
+
+      applyGoldHeaders();
+    }
+let calendar, planningCalendar, selectedDate=null, lastClickTime=0, currentEventId=null, currentDetailsData=null;
+    let usersCache = {};
+    let usersList = [];
+    let plannerBbsUsers = [];
+    let currentEditUser = null;
+
+    function monthRangeFromParts(year, month){
+      const y = Number(year) || new Date().getFullYear();
+      const m = Number(month) || (new Date().getMonth()+1);
+      const start = `${y}-${String(m).padStart(2,'0')}-01`;
+      const endDate = new Date(y, m, 1);
+      const end = `${endDate.getFullYear()}-${String(endDate.getMonth()+1).padStart(2,'0')}-01`;
+      return {start, end};
+    }
+
+    async function ensureUsersLoaded(full=false){
+      if(Array.isArray(usersList) && usersList.length > 0 && (!full || usersList.some(u => Object.prototype.hasOwnProperty.call(u, 'stundensatz')))) return;
+      const url = full ? '/users' : '/users_public';
+      const resUsers = await fetch(url + '?_=' + Date.now(), {cache:'no-store', credentials:'same-origin'});
+      const users = await resUsers.json();
+      usersList = Array.isArray(users) ? users : [];
+      usersCache = {};
+      usersList.forEach(u=>{ usersCache[u.username] = `${u.vorname || ''} ${u.nachname || ''}`.trim() || u.username; });
+      window.usersList = usersList;
+      window.usersCache = usersCache;
+    }
+
+    function responseDisplayName(username, response){
+      return String((response && response.display_name) || usersCache[username] || username || "").trim();
+    }
+
+    function setActiveTab(activeId){
+      const ids = ["tab-home","tab-calendar","tab-termine","tab-planning","tab-users","tab-report","tab-counter"];
+      ids.forEach(id=>{
+        const el = document.getElementById(id);
+        if(!el) return;
+        if(id === activeId) el.classList.add("active");
+        else el.classList.remove("active");
+      });
+    }
+
+
+    function hideTermine(){
+      const t = document.getElementById("termine");
+      if(t) t.style.display = "none";
+    }
+
+    const userByUsername = () => {
+      const map = {};
+      usersList.forEach(u => map[u.username] = u);
+      return map;
+    };
+
+    function toggleEventRateInputs(which){
+      if(which === 'create'){
+        const use = document.getElementById("use-event-rate").checked;
+        const rate = document.getElementById("event-rate");
+        rate.disabled = !use;
+        if(!use) rate.value = "";
+      } else {
+        const use = document.getElementById("edit-use-event-rate").checked;
+        const rate = document.getElementById("edit-ev-rate");
+        rate.disabled = !use;
+        if(!use) rate.value = "";
+      }
+    }
+
+    function toDateTimeLocalValue(d){
+      const pad = n => String(n).padStart(2,'0');
+      const yyyy = d.getFullYear();
+      const mm = pad(d.getMonth()+1);
+      const dd = pad(d.getDate());
+      const hh = pad(d.getHours());
+      const mi = pad(d.getMinutes());
+      return `${yyyy}-${mm}-${dd}T${hh}:${mi}`;
+    }
+
+    function fmtNumDE(n, digits=2){
+      const v = Number(n);
+      if(isNaN(v)) return "0,00";
+      return v.toLocaleString('de-DE', { minimumFractionDigits: digits, maximumFractionDigits: digits });
+    }
+
+    function formatDateDE(value){
+      const v = String(value || '').trim();
+      if(!v) return '-';
+      const m = v.match(/^(\d{4})-(\d{2})-(\d{2})/);
+      if(m) return `${m[3]}.${m[2]}.${m[1]}`;
+      const d = new Date(v);
+      if(!Number.isNaN(d.getTime())) return d.toLocaleDateString('de-DE');
+      return v;
+    }
+
+    // ✅ Zahl aus deutschem Format lesen (z.B. "20,50" oder "20.50" oder "1.234,56")
+    function parseDeNumber(raw){
+      if(raw === null || raw === undefined) return null;
+      let t = String(raw).trim();
+      if(t === "") return null;
+      // Tausenderpunkte entfernen, Komma als Dezimalpunkt
+      t = t.replace(/\./g, "").replace(/,/g, ".");
+      const v = Number(t);
+      return isNaN(v) ? null : v;
+    }
+
+
+    // ✅ Tooltip-Helfer (für title="...") – verhindert kaputtes HTML bei Anführungszeichen etc.
+    function escapeAttr(s){
+      return String(s || "")
+        .replace(/&/g,"&amp;")
+        .replace(/</g,"&lt;")
+        .replace(/>/g,"&gt;")
+        .replace(/"/g,"&quot;")
+        .replace(/'/g,"&#39;");
+    }
+
+
+    function capYesNo(v){
+      const t = String(v||"").toLowerCase();
+      if(t === "ja") return "Ja";
+      if(t === "nein") return "Nein";
+      return v || "";
+    }
+
+    function fmtTimeOnly(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      const hh = String(d.getHours()).padStart(2,'0');
+      const mm = String(d.getMinutes()).padStart(2,'0');
+      return `${hh}:${mm}`;
+    }
+
+    // =========================
+    // 🗓️ Meine Termine (Chef)
+    // =========================
+    function stripTitleTime(t){
+      const s = String(t || "").trim();
+      return s.replace(/\s*\(\d{2}:\d{2}\)\s*$/,"").trim();
+    }
+
+    function fmtDateDE(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      const dd = String(d.getDate()).padStart(2,'0');
+      const mm = String(d.getMonth()+1).padStart(2,'0');
+      const yy = String(d.getFullYear());
+      return `${dd}.${mm}.${yy}`;
+    }
+
+    function fmtDateTimeDE(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      return `${fmtDateDE(d)} ${fmtTimeOnly(d)}`;
+    }
+
+    function fmtHHMM(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      const hh = String(d.getHours()).padStart(2,'0');
+      const mm = String(d.getMinutes()).padStart(2,'0');
+      return `${hh}:${mm}`;
+    }
+
+    async function loadMyTermine(){
+      const me = DASHBOARD_CONTEXT.user;
+      const monthEl = document.getElementById("termine-month");
+      const yearEl  = document.getElementById("termine-year");
+      const selMonth = Number(monthEl?.value || 0);
+      const selYear  = Number(yearEl?.value || 0);
+
+      const tbody = document.getElementById("termine-list");
+      const countEl = document.getElementById("termine-count");
+      if(!tbody) return;
+
+      tbody.innerHTML = "";
+      if(countEl) countEl.textContent = "Lade…";
+
+      const rng = monthRangeFromParts(selYear, selMonth);
+      let res = await fetch(`/events?start=${encodeURIComponent(rng.start)}&end=${encodeURIComponent(rng.end)}&lite=1&ts=${Date.now()}`);
+      let events = await res.json();
+
+      // ✅ Kategorie-Filter (ALL/CP/CV) für den Chef-Report
+      const catFilter = (document.getElementById("report-type")?.value || "CV").toUpperCase();
+      events = events.filter(ev => String(ev.category || "CP").toUpperCase() === catFilter);
+
+
+      // nur bestätigte für mich
+      let rows = [];
+      events.forEach(ev=>{
+        const r = ev.responses?.[me] || null;
+        if(!r || String(r.status||"").trim() !== "bestätigt") return;
+
+        const d = new Date(ev.start);
+        if(!isNaN(d) && selMonth && selYear){
+          const m = d.getMonth()+1;
+          const y = d.getFullYear();
+          if(m !== selMonth || y !== selYear) return;
+        }
+
+        const startLabel = (r.start_time && String(r.start_time).trim()) ? String(r.start_time).trim() : fmtHHMM(ev.start);
+        const endLabel = (r.end_time && String(r.end_time).trim())
+          ? String(r.end_time).trim()
+          : (ev.planned_end_time && String(ev.planned_end_time).trim() ? String(ev.planned_end_time).trim() : "-");
+
+        rows.push({
+          date: fmtDateDE(ev.start),
+          title: stripTitleTime(ev.title),
+          ort: ev.ort || "-",
+          start: startLabel || "-",
+          end: endLabel || "-",
+          remark: (r.remark || "").trim()
+        });
+      });
+
+      // sort by date asc
+      rows.sort((a,b)=> String(a.date).localeCompare(String(b.date), "de"));
+
+      rows.forEach(x=>{
+        const tr = document.createElement("tr");
+        tr.innerHTML = `
+          <td>${x.date}</td>
+          <td>${x.title || "-"}</td>
+          <td>${x.start}</td>
+          <td title="${escapeAttr(x.ort)}">${x.ort}</td>
+          <td>${x.end}</td>
+          <td style="white-space:normal;">${x.remark || ""}</td>
+        `;
+        tbody.appendChild(tr);
+      });
+
+      if(countEl) countEl.textContent = `${rows.length} Termine`;
+    }
+
+
+    // Report Jahres-Input
+    let yearInput = document.getElementById("report-year");
+    let now = new Date();
+    yearInput.value = now.getFullYear();
+    yearInput.addEventListener("change", loadReport);
+    const rptType = document.getElementById("report-type");
+    if(rptType){
+      const defV = (String(ROLE).toLowerCase() === 'vorgesetzter_cp') ? 'CP' : 'CV';
+      rptType.value = (rptType.value || defV);
+      if(!rptType.value) rptType.value = defV;
+      rptType.addEventListener("change", loadReport);
+      rptType.addEventListener("change", ()=>{ if(typeof syncCatButtons==="function") syncCatButtons("report-cat-toggle","report-type"); if(typeof applyGoldHeaders==="function") applyGoldHeaders(); });
+    }
+
+    // Zähler Jahres-Input
+    let counterYearInput = document.getElementById("counter-year");
+    if(counterYearInput){
+      counterYearInput.value = now.getFullYear();
+      counterYearInput.addEventListener("change", loadCounter);
+    }
+    const ctrType = document.getElementById("counter-type");
+    if(ctrType){ ctrType.value = (ctrType.value || "CV"); if(!ctrType.value) ctrType.value="CV"; ctrType.addEventListener("change", loadCounter); ctrType.addEventListener("change", ()=>{ if(typeof syncCatButtons==="function") syncCatButtons("counter-cat-toggle","counter-type"); if(typeof applyGoldHeaders==="function") applyGoldHeaders(); }); }
+
+
+    function escapeHtmlBoard(value){
+      return String(value ?? "")
+        .replace(/&/g, "&amp;")
+        .replace(/</g, "&lt;")
+        .replace(/>/g, "&gt;")
+        .replace(/"/g, "&quot;")
+        .replace(/'/g, "&#039;");
+    }
+
+    function formatBoardDateTime(value){
+      const d = new Date(value);
+      if(isNaN(d)) return String(value || "");
+      return d.toLocaleString('de-DE', { dateStyle:'short', timeStyle:'short' });
+    }
+
+    async function loadBoardPosts(){
+      const list = document.getElementById('board-list');
+      if(!list) return;
+      try{
+        const res = await fetch('/board?ts=' + Date.now());
+        const data = await res.json();
+        if(!res.ok) throw new Error(data.error || 'Board konnte nicht geladen werden.');
+        if(!Array.isArray(data) || data.length === 0){
+          list.innerHTML = '<div class="board-empty">Aktuell gibt es keine Einträge.</div>';
+          return;
+        }
+        list.innerHTML = data.map(item => `
+          <div class="board-item">
+            <div class="board-item-head">
+              <strong>${escapeHtmlBoard(item.created_by || 'Vorgesetzter')}</strong>
+              <span>${escapeHtmlBoard(formatBoardDateTime(item.created_at || ''))}</span>
+            </div>
+            <div class="board-item-text">${escapeHtmlBoard(item.content || '')}</div>
+            ${CAN_EDIT_BOARD ? `<div class="board-item-actions"><button type="button" class="board-delete-btn" onclick="deleteBoardPost(${Number(item.id || 0)})">🗑️ Löschen</button></div>` : ''}
+          </div>`).join('');
+      }catch(e){
+        list.innerHTML = '<div class="board-empty">Board konnte nicht geladen werden.</div>';
+      }
+    }
+
+    async function saveBoardPost(sendMail = false){
+      const ta = document.getElementById('board-content');
+      if(!ta) return;
+      const content = String(ta.value || '').trim();
+      if(!content){
+        alert('Bitte einen Text eingeben.');
+        return;
+      }
+      const res = await fetch('/board', {
+        method:'POST',
+        headers:{ 'Content-Type':'application/json' },
+        body: JSON.stringify({ content, send_mail: !!sendMail })
+      });
+      const data = await res.json().catch(()=>({}));
+      if(!res.ok || data.error){
+        alert(data.error || 'Beitrag konnte nicht gespeichert werden.');
+        return;
+      }
+      ta.value = '';
+      loadBoardPosts();
+      if(sendMail){
+        const sent = Number(data.sent || 0);
+        alert(`Beitrag veröffentlicht und ${sent} Mail(s) versendet.`);
+      }
+    }
+
+
+    async function deleteBoardPost(postId){
+      const id = Number(postId);
+      if(!Number.isInteger(id) || id <= 0){
+        alert('Ungültige Beitrags-ID.');
+        return;
+      }
+      if(!CAN_EDIT_BOARD){
+        alert('Du darfst Beiträge nicht löschen.');
+        return;
+      }
+      const ok = window.confirm('Möchtest du diesen Beitrag wirklich löschen?');
+      if(!ok) return;
+
+      try{
+        const res = await fetch(`/board/${id}`, {
+          method:'DELETE',
+          headers:{ 'Content-Type':'application/json' }
+        });
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok || data.error){
+          throw new Error(data.error || 'Beitrag konnte nicht gelöscht werden.');
+        }
+        await loadBoardPosts();
+      }catch(err){
+        alert(err.message || 'Beitrag konnte nicht gelöscht werden.');
+      }
+    }
+
+    function plannerLabel(user){
+      if(!user) return "";
+      const full = `${user.vorname || ""} ${user.nachname || ""}`.trim();
+      return full || user.username || "";
+    }
+
+    function selectedPlannerValues(selectId){
+      const sel = document.getElementById(selectId);
+      if(!sel) return [];
+      return Array.from(sel.selectedOptions || []).map(o => String(o.value || "").trim()).filter(Boolean).slice(0,3);
+    }
+
+    function normalizePlannerSelection(value){
+      if(Array.isArray(value)) return value.map(v => String(v || "").trim()).filter(Boolean).slice(0,3);
+      const one = String(value || "").trim();
+      return one ? [one] : [];
+    }
+
+    function fillPlannerSelect(selectId, selectedValue){
+      const sel = document.getElementById(selectId);
+      if(!sel) return;
+      const currentValues = normalizePlannerSelection(selectedValue);
+      const currentSet = new Set(currentValues);
+      sel.innerHTML = '';
+      (Array.isArray(plannerBbsUsers) ? plannerBbsUsers : []).forEach(u=>{
+        const opt = document.createElement('option');
+        opt.value = u.username;
+        opt.textContent = plannerLabel(u);
+        if(currentSet.has(String(u.username))) opt.selected = true;
+        sel.appendChild(opt);
+      });
+      currentValues.forEach(current=>{
+        const exists = Array.from(sel.options).some(opt => String(opt.value) === current);
+        if(current && !exists){
+          const fallback = document.createElement('option');
+          fallback.value = current;
+          fallback.textContent = usersCache[current] || current;
+          fallback.selected = true;
+          sel.appendChild(fallback);
+        }
+      });
+    }
+
+    function enforceMaxThree(selectId){
+      const sel = document.getElementById(selectId);
+      if(!sel) return;
+      sel.addEventListener('change', ()=>{
+        const selected = Array.from(sel.selectedOptions || []);
+        if(selected.length > 3){
+          selected[selected.length - 1].selected = false;
+          alert('Es können maximal 3 Einsatzleiter ausgewählt werden.');
+        }
+      });
+    }
+
+    async function loadPlannerBbsUsers(){
+      try{
+        // Einsatzleiter-Liste und öffentliche Mitarbeiterliste parallel laden.
+        // Dadurch wird Kevin Casutt auch dann ergänzt, wenn seine Rolle
+        // „vorgesetzter“ ist und er nicht vom Planner-Endpunkt geliefert wird.
+        const [plannerRes, publicRes] = await Promise.all([
+          fetch('/users_planner_bbs?_=' + Date.now(), {cache:'no-store', credentials:'same-origin'}),
+          fetch('/users_public?_=' + Date.now(), {cache:'no-store', credentials:'same-origin'})
+        ]);
+
+        const plannerData = plannerRes.ok ? await plannerRes.json() : [];
+        const publicData = publicRes.ok ? await publicRes.json() : [];
+        plannerBbsUsers = Array.isArray(plannerData) ? plannerData : [];
+        plannerBbsUsers.forEach(u=>{
+          const fullName = `${u.vorname || ''} ${u.nachname || ''}`.trim() || u.username;
+          if(u.username && fullName) usersCache[u.username] = fullName;
+        });
+        (Array.isArray(publicData) ? publicData : []).forEach(u=>{
+          const fullName = `${u.vorname || ''} ${u.nachname || ''}`.trim() || u.username;
+          if(u.username && fullName) usersCache[u.username] = fullName;
+        });
+        window.usersCache = usersCache;
+
+        const normalizeName = value => String(value || '').trim().replace(/\s+/g, ' ').toLowerCase();
+        const isKevinCasutt = u => normalizeName(`${u?.vorname || ''} ${u?.nachname || ''}`) === 'kevin casutt';
+        const kevin = (Array.isArray(publicData) ? publicData : []).find(isKevinCasutt);
+
+        if(kevin && !plannerBbsUsers.some(u => String(u?.username || '') === String(kevin.username || ''))){
+          plannerBbsUsers.unshift(kevin);
+        }
+
+        // Doppelte Einträge nach Benutzername entfernen.
+        const seen = new Set();
+        plannerBbsUsers = plannerBbsUsers.filter(u => {
+          const key = String(u?.username || '').trim();
+          if(!key || seen.has(key)) return false;
+          seen.add(key);
+          return true;
+        });
+      }catch(err){
+        console.error(err);
+        plannerBbsUsers = [];
+      }
+      fillPlannerSelect('ev-einsatzleitung', selectedPlannerValues('ev-einsatzleitung'));
+      fillPlannerSelect('edit-ev-einsatzleitung', selectedPlannerValues('edit-ev-einsatzleitung'));
+    }
+
+
+    let currentElExtractEvent = null;
+
+    function getAvailableExtractUsers(props){
+      const responses = (props && props.responses) ? props.responses : {};
+      const blocked = new Set(["abgelehnt", "abgelehnt_chef", "entfernt_chef"]);
+      return Object.entries(responses)
+        .filter(([username, r])=>{
+          const status = String((r && r.status) || "").trim().toLowerCase();
+          return username && status && !blocked.has(status);
+        })
+        .map(([username, r])=>({
+          username,
+          status: String((r && r.status) || "").trim(),
+          name: (usersCache && usersCache[username]) ? usersCache[username] : username
+        }))
+        .sort((a,b)=>String(a.name).localeCompare(String(b.name), "de"));
+    }
+
+    function formatDateDe(value){
+      if(!value) return '-';
+      try{
+        const d = new Date(String(value));
+        if(!isNaN(d.getTime())) return d.toLocaleDateString('de-DE');
+      }catch(_){ }
+      return String(value);
+    }
+
+    function renderProfileRows(rows){
+      return `<div class="el-profile-rows">${rows.map(([label, value])=>`
+        <div class="el-profile-row">
+          <div class="el-profile-label">${escapeHtml(label)}</div>
+          <div class="el-profile-value">${escapeHtml(value || '-')}</div>
+        </div>
+      `).join('')}</div>`;
+    }
+
+    async function openElExtractPdf(username){
+      const box = document.getElementById('el-extract-list');
+      if(!box || !currentElExtractEvent) return;
+
+      const activeBoxForSelect = activeExtractBox ? activeExtractBox() : box;
+      const sel = activeBoxForSelect ? activeBoxForSelect.querySelector('#el-user-select') : null;
+      if(sel && sel.value !== username) sel.value = username;
+
+      const activeBox = activeExtractBox ? activeExtractBox() : box;
+      const viewer = activeBox ? activeBox.querySelector('#el-profile-preview') : document.getElementById('el-profile-preview');
+      if(!viewer) return;
+      const userName = (usersCache && usersCache[username]) ? usersCache[username] : username;
+      viewer.innerHTML = `<div class="el-preview-loading">Auszug für <b>${escapeHtml(userName)}</b> wird geladen...</div>`;
+
+      try{
+        const eventId = encodeURIComponent(String(currentElExtractEvent.eventId || ''));
+        const u = encodeURIComponent(String(username || ''));
+        const res = await fetch(`/einsatzleitung/user_extract/${eventId}/${u}`);
+        const data = await res.json().catch(()=>null);
+        if(!res.ok || !data){
+          throw new Error((data && data.error) ? data.error : 'Vorschau konnte nicht geladen werden.');
+        }
+
+        const profile = data.user || {};
+        const resolvedFullName = String(profile.full_name || ((profile.vorname || '') + ' ' + (profile.nachname || '')).trim() || userName).trim();
+        if(sel && resolvedFullName){
+          const selectedOption = Array.from(sel.options || []).find(opt => opt.value === username);
+          if(selectedOption) selectedOption.textContent = resolvedFullName;
+          usersCache[username] = resolvedFullName;
+          window.usersCache = usersCache;
+        }
+        const eventData = data.event || {};
+        const resp = data.response || {};
+        const languages = profile.language_skills || {};
+        const languageEntries = Object.entries(languages).filter(([k])=>String(k||'').trim());
+        let quals = Array.isArray(profile.qualifications) ? profile.qualifications : [];
+        const seenQuals = new Set();
+        quals = quals.filter(q=>{ const key=String(q||'').trim().toLowerCase(); if(!key || seenQuals.has(key)) return false; seenQuals.add(key); return true; });
+        const licenseItems = quals.filter(q=>String(q||'').toLowerCase().includes('führerschein'));
+        if(licenseItems.length){
+          const withClass = licenseItems.find(q=>/klasse\s*[a-z0-9]|:\s*[a-z0-9]/i.test(String(q||''))) || licenseItems[licenseItems.length - 1];
+          let licenseText = String(withClass || 'Führerschein').trim();
+          const clsMatch = licenseText.match(/(?:klasse|:)\s*[-–]?\s*(.+)$/i);
+          licenseText = clsMatch && clsMatch[1] ? `Führerschein-Klasse ${clsMatch[1].trim()}` : 'Führerschein';
+          quals = quals.filter(q=>!String(q||'').toLowerCase().includes('führerschein'));
+          quals.push(licenseText);
+        }
+        const img = String(profile.image_data || '').trim();
+        const s34aType = String(profile.s34a_art || '').trim();
+        const s34aDisplay = /sachkunde/i.test(s34aType)
+          ? 'Sachkunde'
+          : (/unterrichtung/i.test(s34aType) ? 'Unterrichtung' : 'Service');
+
+        viewer.innerHTML = `
+          <div class="el-profile-head el-profile-head-simple">
+            <h4>${escapeHtml(resolvedFullName)}</h4>
+          </div>
+          <div class="el-profile-body">
+            <div style="display:grid;gap:14px;align-content:start;">
+              <div class="el-profile-card el-basis-card">
+                <h5>Basisdaten</h5>
+                ${renderProfileRows([
+                  ['Vorname', profile.vorname || '-'],
+                  ['Nachname', profile.nachname || '-'],
+                  ['Geburtstag', formatDateDe(profile.geburtstag)],
+                  ['Geburtsort', profile.geburtsort || '-'],
+                  ['Amtl. Dokument', profile.ausweis_art || '-'],
+                  ['Dokumentennr.', profile.ausweis_nr || '-'],
+                  ['§ 34a GewO', s34aDisplay],
+                  ['Bewacher ID', profile.bewach_id || '-']
+                ])}
+              </div>
+              <div class="el-profile-card el-qual-card">
+                <h5>Qualifikationen</h5>
+                <div class="el-chip-wrap">${(quals.length ? quals : ['-']).map(q=>`<span class="el-chip">${escapeHtml(q)}</span>`).join('')}</div>
+              </div>
+            </div>
+            <div style="display:grid;gap:14px;align-content:start;">
+              <div class="el-profile-card el-photo-card">
+                <h5>Foto</h5>
+                <div class="el-profile-photo">${img ? `<img src="${escapeAttr(img)}" alt="Mitarbeiterfoto">` : `<div class="el-profile-placeholder">Kein Bild<br><span class="muted">Kein Foto hinterlegt</span></div>`}</div>
+              </div>
+              <div class="el-profile-card el-language-card">
+                <h5>Fremdsprachen</h5>
+                <div class="el-lang-list">
+                  ${languageEntries.length ? languageEntries.map(([lang, level])=>`
+                    <div class="el-lang-item"><strong>${escapeHtml(lang)}</strong><span>${escapeHtml(level || 'Verhandlungssicher in Wort und Schrift')}</span></div>
+                  `).join('') : `<div class="el-lang-item"><strong>Keine Fremdsprache ausgewählt</strong></div>`}
+                </div>
+              </div>
+            </div>
+          </div>
+        `;
+
+        // Untere Karten auf dem Desktop immer exakt gleich hoch darstellen.
+        requestAnimationFrame(()=>{
+          const pairs = [
+            [viewer.querySelector('.el-basis-card'), viewer.querySelector('.el-photo-card')],
+            [viewer.querySelector('.el-qual-card'), viewer.querySelector('.el-language-card')]
+          ];
+          pairs.forEach(([a,b])=>{
+            if(!a || !b) return;
+            a.style.height=''; b.style.height='';
+            if(window.matchMedia('(min-width: 901px)').matches){
+              const sameHeight=Math.max(a.scrollHeight,b.scrollHeight,a.getBoundingClientRect().height,b.getBoundingClientRect().height);
+              a.style.height=`${Math.ceil(sameHeight)}px`;
+              b.style.height=`${Math.ceil(sameHeight)}px`;
+            }
+          });
+        });
+      }catch(err){
+        viewer.innerHTML = `<div class="el-preview-error">${escapeHtml(err.message || 'Vorschau konnte nicht geladen werden.')}</div>`;
+      }
+    }
+
+    function activeExtractBox(){
+      const modal = document.getElementById('planningCommentsModal');
+      const modalBox = document.getElementById('plan-cmt-extract-box');
+      if(modal && modal.style.display === 'flex' && modalBox){
+        modalBox.style.display = 'grid';
+        return modalBox;
+      }
+      return document.getElementById('el-extract-list');
+    }
+
+    function showPlanningExtractFromModal(){
+      if(!currentElExtractEvent){
+        alert("Bitte zuerst einen Einsatz anklicken.");
+        return;
+      }
+      renderEinsatzleitungExtractForEvent(
+        currentElExtractEvent.eventId,
+        currentElExtractEvent.title,
+        currentElExtractEvent.props
+      );
+    }
+
+    function renderEinsatzleitungExtractForEvent(eventId, title, props){
+      const box = activeExtractBox();
+      if(!box) return;
+
+      currentElExtractEvent = {eventId, title, props};
+      const users = getAvailableExtractUsers(props || {});
+      box.dataset.loaded = '1';
+      box.classList.add('pdf-mode');
+
+      if(users.length === 0){
+        box.innerHTML = `<div class="el-extract-empty">Für diesen Einsatz sind aktuell keine verfügbaren Mitarbeiter eingetragen.</div>`;
+        return;
+      }
+
+      box.innerHTML = `
+        <div class="el-pdf-user-list">
+          <div class="el-pdf-title">Mitarbeiter-Auszüge</div>
+          <select id="el-user-select" class="el-pdf-select">
+            ${users.map(u=>`<option value="${escapeAttr(u.username)}">${escapeHtml(u.name)}</option>`).join('')}
+          </select>
+        </div>
+        <div id="el-profile-preview" class="el-profile-preview">
+          <div class="el-preview-loading">Auszug wird geladen…</div>
+        </div>
+      `;
+
+      const sel = box.querySelector('#el-user-select');
+      if(sel){ sel.addEventListener('change', ()=>openElExtractPdf(sel.value)); }
+      openElExtractPdf(users[0].username);
+    }
+
+    async function loadEinsatzleitungExtract(force=false){
+      const box = document.getElementById('el-extract-list');
+      if(!box) return;
+
+      if(currentElExtractEvent){
+        renderEinsatzleitungExtractForEvent(
+          currentElExtractEvent.eventId,
+          currentElExtractEvent.title,
+          currentElExtractEvent.props
+        );
+        return;
+      }
+
+      box.classList.remove('pdf-mode');
+      box.innerHTML = '<div class="el-extract-empty">Bitte zuerst einen Einsatz in der Einsatzleitung anklicken. Danach erscheint hier die PDF-Vorschau der verfügbaren Mitarbeiter.</div>';
+      box.dataset.loaded = '0';
+    }
+
+        document.addEventListener('DOMContentLoaded', async function() {
+      // Performance: Personaldaten werden nicht mehr direkt beim Start geladen.
+      // Sie werden erst bei Bedarf geladen (Personal, Report, Details, Planung oder Einsatz erstellen).
+
+      // Einsatzleitungs-Liste wird erst bei Bedarf geladen, damit die Startseite schneller erscheint.
+      loadPlannerBbsUsers();
+        enforceMaxThree('ev-einsatzleitung');
+        enforceMaxThree('edit-ev-einsatzleitung');
+      toggleEventRateInputs('create');
+
+      // Meine Termine: Default Monat/Jahr + Filter-Listener
+      const nowT = new Date();
+      const tMonth = document.getElementById("termine-month");
+      const tYear  = document.getElementById("termine-year");
+      if(tMonth && tYear){
+        tMonth.value = String(nowT.getMonth()+1);
+        tYear.value  = String(nowT.getFullYear());
+        tMonth.addEventListener("change", loadMyTermine);
+        tYear.addEventListener("change", loadMyTermine);
+      }
+
+
+      // Tabs
+      if(!IS_PLANNER){
+      document.getElementById("tab-home").onclick = e=>{
+        e.preventDefault();
+        document.getElementById("home").style.display="block";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        hideTermine();
+        document.getElementById("planning").style.display="none";
+        document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        setActiveTab("tab-home");
+        loadBoardPosts();
+      };
+
+      document.getElementById("tab-calendar").onclick = e=>{
+        e.preventDefault();
+        document.getElementById("home").style.display="none";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="block";
+        document.getElementById("planning").style.display="none";
+        hideTermine();
+        document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        setActiveTab("tab-calendar");
+        setTimeout(()=>{
+          try{ if(calendar){ calendar.changeView('dayGridMonth'); } }catch(_e){}
+          try{ if(calendar){ calendar.render(); } }catch(_e){}
+          try{ if(calendar){ calendar.updateSize(); } }catch(_e){}
+          try{ if(calendar){ calendar.refetchEvents(); } }catch(_e){}
+          try{ window.dispatchEvent(new Event('resize')); }catch(_e){}
+          try{
+            const sc = document.querySelector('#calendar .fc-scroller');
+            if(sc) sc.scrollTop = 0;
+          }catch(_e){}
+        }, 30);
+      };
+
+      // 🗓️ Meine Termine (Chef)
+      document.getElementById("tab-termine").onclick = e=>{
+        e.preventDefault();
+        document.getElementById("home").style.display="none";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        document.getElementById("termine").style.display="block";
+        document.getElementById("planning").style.display="none";
+document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        setActiveTab("tab-termine");
+        loadMyTermine();
+      };
+
+      }
+
+      if(!IS_PLANNER){
+        // Personal-Tab nur für Chef/Vorgesetzter
+        if(String(ROLE).toLowerCase() === 'chef' || String(ROLE).toLowerCase() === 'vorgesetzter' || String(ROLE).toLowerCase() === 'vorgesetzter_cp'){
+          document.getElementById("tab-users").onclick = e=>{
+        e.preventDefault();
+        document.getElementById("home").style.display="none";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        hideTermine();
+document.getElementById("planning").style.display="none";
+        hideTermine();
+document.getElementById("user-management").style.display="block";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        setActiveTab("tab-users");
+        loadUsers();
+          };
+        }
+      document.getElementById("tab-report").onclick = e=>{
+        e.preventDefault();
+        document.getElementById("home").style.display="none";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        hideTermine();
+document.getElementById("planning").style.display="none";
+        hideTermine();
+document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="block";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        setActiveTab("tab-report");
+        const _rt = document.getElementById('report-type');
+        if(_rt && (!_rt.value)){
+          _rt.value = (String(ROLE).toLowerCase() === 'vorgesetzter_cp') ? 'CP' : 'CV';
+        }
+        loadReport();
+      };
+      // Zähler wurde in den Report integriert.
+
+
+      }
+
+      document.getElementById("tab-planning").onclick = async e=>{
+        e.preventDefault();
+        document.getElementById("home").style.display="none";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        hideTermine();
+document.getElementById("planning").style.display="block";
+        document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        setActiveTab("tab-planning");
+        // Planung initialisieren (einmalig) + aktualisieren
+        await ensureUsersLoaded(false);
+        await loadEinsatzleitungExtract();
+        if(!planningCalendar){ initPlanningCalendar(); }
+        planningCalendar.refetchEvents();
+      };
+
+      if(IS_PLANNER){
+        // Nur Planung sichtbar
+        setActiveTab("tab-planning");
+        document.getElementById("home").style.display="none";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        hideTermine();
+document.getElementById("planning").style.display="block";
+        document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        loadEinsatzleitungExtract();
+        if(!planningCalendar){ initPlanningCalendar(); }
+        planningCalendar.refetchEvents();
+      } else {
+        setActiveTab("tab-home");
+        document.getElementById("home").style.display="block";
+        const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none";
+        hideTermine();
+        document.getElementById("planning").style.display="none";
+        document.getElementById("user-management").style.display="none";
+        document.getElementById("report").style.display="none";
+        const _counter=document.getElementById("counter"); if(_counter) _counter.style.display="none";
+        loadBoardPosts();
+      }
+
+      document.getElementById('board-save')?.addEventListener('click', ()=>saveBoardPost(false));
+      document.getElementById('board-save-send')?.addEventListener('click', ()=>saveBoardPost(true));
+      loadBoardPosts();
+
+      // Kalender
+      if(!IS_PLANNER){
+      const CAN_MAIL_ALL = (ROLE === "vorgesetzter" || ROLE === "vorgesetzter_cp");
+      calendar=new FullCalendar.Calendar(document.getElementById('calendar'),{
+        initialView:'dayGridMonth',
+        locale:'de',
+        firstDay: 1,
+        buttonText: { today: "Heute", month: "Monat", week: "Woche", year: "Jahr", day: "Tag", list: "Liste" },
+        views: {
+          multiMonthYear: {
+            buttonText: "Jahr",
+            multiMonthMaxColumns: 3,
+            multiMonthMinWidth: 250
+          }
+        },
+        height:"85vh",
+
+        dayCellClassNames: (arg)=>{
+          const dow = arg.date.getDay();
+          return (dow===0 || dow===6) ? ['weekend'] : [];
+        },
+
+        customButtons: {
+          duplicateBtn: {
+            text: "📄 Duplizieren",
+            click: () => openDuplicateModal()
+          },
+          ...(CAN_MAIL_ALL ? {
+            mailAllBtn: {
+              text: "📧 E-Mail versenden",
+              click: () => sendEventMailFromCalendar()
+            }
+          } : {})
+        },
+        headerToolbar: {
+          left: CAN_MAIL_ALL ? "prev,next today duplicateBtn mailAllBtn" : "prev,next today duplicateBtn",
+          center: "title",
+          right: CAN_USE_YEAR_VIEW ? "dayGridMonth,dayGridWeek,multiMonthYear" : "dayGridMonth,dayGridWeek"
+        },
+        selectable:true,
+
+        eventDisplay: "list-item",
+        displayEventTime: true,
+        eventTimeFormat: { hour: '2-digit', minute: '2-digit', hour12: false },
+
+        dateClick: info => {
+          // ✅ Mobile: ignore taps on existing events (otherwise iOS queues and opens create modal)
+          try{
+            if(info && info.jsEvent && info.jsEvent.target && info.jsEvent.target.closest && info.jsEvent.target.closest('.fc-event')){
+              return;
+            }
+          }catch(_){}
+          // Mobile-friendly: single tap opens create modal
+          selectedDate = info.dateStr;
+          openEventModal();
+        },
+        eventClick: info => {
+          // ✅ Mobile: open immediately and stop any delayed/queued click behavior
+          try{ info.jsEvent && info.jsEvent.preventDefault(); }catch(_){}
+          try{ info.jsEvent && info.jsEvent.stopPropagation(); }catch(_){}
+          openDetailsModal(info.event);
+        },
+        eventDidMount: function(info){
+          // Attach id for global router (mobile)
+          try{
+            info.el.setAttribute("data-event-id", String(info.event.id || ""));
+            info.el.setAttribute("data-cal","main");
+            if(window.__fcTapRouter && window.__fcTapRouter.register){
+              window.__fcTapRouter.register('main', info.event);
+            }
+            // Also bind immediate tap on element as fallback
+            bindImmediateTap(info.el, () => openDetailsModal(info.event));
+            // ✅ Hard fix for iOS/Safari: open on pointerdown/touchstart to avoid queued taps
+            info.el.addEventListener('pointerdown', function(ev){
+              try{ ev.preventDefault(); }catch(_){}
+              try{ ev.stopPropagation(); }catch(_){}
+              openDetailsModal(info.event);
+            }, {capture:true});
+            info.el.addEventListener('touchstart', function(ev){
+              try{ ev.preventDefault(); }catch(_){}
+              try{ ev.stopPropagation(); }catch(_){}
+              openDetailsModal(info.event);
+            }, {capture:true, passive:false});
+
+          }catch(_){}
+        },
+
+        events: async (info,success)=>{
+          // counts=1: Besetzung kommt als confirmed_count vom Server, Responses werden erst im Detail-Modal geladen.
+          let res=await fetch(`/events?start=${encodeURIComponent(info.startStr)}&end=${encodeURIComponent(info.endStr)}&lite=1&counts=1&ts=${Date.now()}`);
+          let events=await res.json();
+
+          // ✅ Titel zeigt IMMER Event.start (bleibt unverändert, egal was du pro Mitarbeiter setzt)
+          events.forEach(ev=>{
+            if(ev.start){
+              const d = new Date(ev.start);
+              if(!isNaN(d)){
+                const hh = String(d.getHours()).padStart(2,'0');
+                const mm = String(d.getMinutes()).padStart(2,'0');
+                const base = (ev.title || "").trim();
+                ev.title = `${base} (${hh}:${mm})`.trim();
+              }
+            }
+
+            if(ev.status==="geplant"){
+              ev.color="gray"; ev.textColor="gray";
+            }
+
+            if(ev.status==="offen"){
+              let confirmedCount = Number(ev.confirmed_count || 0);
+
+              const c = (confirmedCount >= (ev.required_staff || 0)) ? "green" : "darkblue";
+              ev.color = c; ev.textColor = c;
+            }
+          });
+
+          success(events);
+        }
+      });
+      calendar.render();
+      window.calendar = calendar;
+      try{ const cw=document.getElementById("calendar-wrap"); if(cw) cw.style.display="none"; }catch(_e){}
+      }
+
+      // ===== Planung-Kalender =====
+      // Baut HTML für bestätigte Mitarbeiterliste.
+      // ✅ Neu:
+      // - Kevin (username "kevin") wird in der Planung magenta dargestellt.
+      // - Jeder Name erhält data-username, damit wir per Doppelklick Zeiten bearbeiten können.
+      function buildStaffList(ev){
+        const responses = ev.responses || {};
+        const items = [];
+
+        // ✅ Planer: Zeiten nur ab HEUTE (inkl.) anzeigen – Vergangenheit ohne Start/Ende
+        const isPlaner = (typeof IS_PLANNER !== 'undefined' && IS_PLANNER);
+        let showTimes = true;
+        if(isPlaner){
+          const today = new Date();
+          today.setHours(0,0,0,0);
+          const evDate = new Date(ev.start || '');
+          if(!isNaN(evDate)){
+            evDate.setHours(0,0,0,0);
+            if(evDate.getTime() < today.getTime()) showTimes = false;
+          }
+        }
+
+        // Basis-Startzeit (Uhrzeit) des Einsatzes
+        let baseStart = "-";
+        if(ev.start){
+          const d = new Date(ev.start);
+          if(!isNaN(d)){
+            const hh = String(d.getHours()).padStart(2,'0');
+            const mm = String(d.getMinutes()).padStart(2,'0');
+            baseStart = `${hh}:${mm}`;
+          }
+        }
+
+        for(const username in responses){
+          const r = responses[username] || {};
+          if(String(r.status || "").trim() === "bestätigt"){
+            const name = responseDisplayName(username, r);
+
+            // Startzeit: Chef-Startzeit (response.start_time) hat Priorität, sonst Event-Start
+            const st = (r.start_time && String(r.start_time).trim()) ? String(r.start_time).trim() : baseStart;
+
+            // Endzeit: kommt vom Mitarbeiter (response.end_time) – falls vorhanden, anzeigen
+            const et = (r.end_time && String(r.end_time).trim()) ? String(r.end_time).trim() : "";
+
+            // ✅ Zeile grün markieren, wenn Start UND Ende eingetragen sind (pro Mitarbeiter)
+                        // ✅ Zeile grün markieren, wenn Ende gesetzt ist und ein Start existiert (entweder eigener Start oder Einsatz-Start)
+            const hasStart = ((r.start_time && String(r.start_time).trim()) || (baseStart && baseStart !== "-"));
+            const hasEnd = (r.end_time && String(r.end_time).trim());
+            const done = hasStart && hasEnd;
+
+            // Anzeige: (Start) oder (Start–Ende)
+            const times = et ? `${st}–${et}` : st;
+
+            // ✅ Kevin (username "kevin") magenta
+            const isKevin = String(username).toLowerCase() === "kevin";
+            const remark = (r.remark || "").trim();
+            // ✅ Hover: Bemerkung als Tooltip (nur wenn vorhanden)
+            const tip = remark ? ` title="${escapeAttr(remark)}"` : "";
+            const nameHtml = `<span class="plan-staff-user" data-username="${username}"${tip} style="cursor:pointer;${isKevin ? "color:magenta;font-weight:700;" : ""}">${name}</span>`;
+            const rowClass = `plan-staff-row${(showTimes && done) ? " done" : ""}`;
+
+            if(showTimes){
+              items.push(`<div class="${rowClass}">${nameHtml}<br><span class="plan-staff-times">(${times})</span></div>`);
+            } else {
+              // Planer + Vergangenheit: nur Name (keine Zeiten)
+              items.push(`<div class="plan-staff-row">${nameHtml}</div>`);
+            }
+          }
+        }
+
+        // Sortiert für Ordnung (ohne HTML-Tags als grobe Ordnung)
+        items.sort((a,b)=>{
+          const ta = a.replace(/<[^>]*>/g,'').trim();
+          const tb = b.replace(/<[^>]*>/g,'').trim();
+          const ka = /^Kevin\s+Casutt\b/i.test(ta);
+          const kb = /^Kevin\s+Casutt\b/i.test(tb);
+          if(ka && !kb) return -1;
+          if(!ka && kb) return 1;
+          return ta.localeCompare(tb, "de");
+        });
+        if(items.length === 0) return "—";
+
+        // ✅ Planer-Ansicht: alle bestätigten anzeigen
+        return items.join("");
+      }
+
+
+      function initPlanningCalendar(){
+        planningCalendar = new FullCalendar.Calendar(document.getElementById('planning-calendar'),{
+          headerToolbar: { left: 'prev,next today', center: 'title', right: '' },
+          initialView:'dayGridWeek',
+          locale:'de',
+          firstDay: 1,
+
+          // ✅ Wochen-Titel mit Punkt nach Start-Tag (z.B. 23. – 29. März 2026)
+          datesSet: (arg) => {
+            try{
+              const start = arg.view.currentStart;
+              const endExclusive = arg.view.currentEnd;
+              const end = new Date(endExclusive.getTime() - 1); // end ist exklusiv
+
+              const sd = start.getDate();
+              const ed = end.getDate();
+
+              const sameMonth = start.getMonth() === end.getMonth() && start.getFullYear() === end.getFullYear();
+
+              const startMonth = start.toLocaleDateString('de-DE', { month: 'long' });
+              const endMonth   = end.toLocaleDateString('de-DE',   { month: 'long' });
+              const yearEnd    = end.getFullYear();
+              const yearStart  = start.getFullYear();
+
+              let title = "";
+              if(sameMonth){
+                title = `${sd}. – ${ed}. ${startMonth} ${yearStart}`;
+              } else {
+                // über Monats-/Jahresgrenze
+                title = `${sd}. ${startMonth} – ${ed}. ${endMonth} ${yearEnd}`;
+                if(yearStart !== yearEnd){
+                  title = `${sd}. ${startMonth} ${yearStart} – ${ed}. ${endMonth} ${yearEnd}`;
+                }
+              }
+
+              const root = document.getElementById('planning-calendar');
+              const tEl = root ? root.querySelector('.fc-toolbar-title') : null;
+              if(tEl) tEl.textContent = title;
+            }catch(_){}
+          },
+
+
+        buttonText: { today: "Heute", month: "Monat", week: "Woche", day: "Tag", list: "Liste" },
+          height:"85vh",
+
+        dayCellClassNames: (arg)=>{
+          const dow = arg.date.getDay();
+          return (dow===0 || dow===6) ? ['weekend'] : [];
+        },
+          selectable:false,
+          eventDisplay: "block",
+          displayEventTime: false,          dayHeaderContent: (arg) => {
+            const d = arg.date;
+            const dd = String(d.getDate()).padStart(2,'0');
+            const mm = String(d.getMonth()+1).padStart(2,'0');
+            const wd = ['So','Mo','Di','Mi','Do','Fr','Sa'][d.getDay()];
+            return { html: `<b>${wd}., ${dd}.${mm}.</b>` };
+          },
+          dayMaxEventRows: false,
+          dayMaxEvents: false,
+
+          events: async (info,success)=>{
+            let res=await fetch(`/events?start=${encodeURIComponent(info.startStr)}&end=${encodeURIComponent(info.endStr)}&lite=1&ts=${Date.now()}`);
+            let events=await res.json();
+
+            // Für Planung: keine Titel-Uhrzeit-Anreicherung wie im Hauptkalender,
+            // stattdessen Titel + Mitarbeiterliste im Event-Block.
+            events.forEach(ev=>{
+              // Nur Tage mit Einsätzen anzeigen (alle Status)
+              const staff = buildStaffList(ev);
+              ev._plan_staff = staff;
+            });
+
+            success(events);
+          },
+
+          eventContent: (arg)=>{
+            const ev = arg.event.extendedProps || {};
+            const baseTitle = (arg.event.title || "").replace(/\s*\(\d{2}:\d{2}\)\s*$/, "");
+            const staff = (ev._plan_staff !== undefined) ? ev._plan_staff : "—";
+
+            // ✅ Titel in Planung: "(bestätigt/benötigt)" anzeigen, z.B. "VCT Show (6/6)"
+            const responses = ev.responses || {};
+            const confirmed = Object.values(responses).filter(r => String((r && r.status) || "").trim() === "bestätigt").length;
+
+            // robust: required_staff kann als Zahl oder String kommen
+            let required = 0;
+            if(ev.required_staff !== undefined && ev.required_staff !== null && String(ev.required_staff).trim() !== ""){
+              required = Number(ev.required_staff);
+            } else if(ev.required !== undefined && ev.required !== null && String(ev.required).trim() !== ""){
+              required = Number(ev.required);
+            }
+            if(isNaN(required) || required < 0) required = 0;
+
+            const title = `${(baseTitle || "(ohne Titel)")} (${confirmed}/${required})`;
+
+            const cat = String(ev.category || "CP").toUpperCase();
+            const titleCls = (cat === "CV") ? "plan-title title-cv" : "plan-title title-cp";
+
+            const wrap = document.createElement("div");
+            const leadList = normalizePlannerSelection(ev.einsatzleitung_usernames || ev.einsatzleitung_username || "");
+            const leadsHtml = leadList.length
+              ? `<div class="plan-staff" style="font-weight:700;">EL: ${leadList.map(u => escapeHtml(usersCache[u] || u)).join(", ")}</div>`
+              : "";
+            wrap.innerHTML = `
+              <div class="${titleCls}">${title}</div>
+              ${leadsHtml}
+              <div class="plan-staff">${staff}</div>
+            `;
+            return { domNodes: [wrap] };
+          },
+
+          // ✅ Planung: Doppelklick auf einen Einsatzblock
+          // - Chef/Vorgesetzter: Zeiten/Kommentare für ALLE bestätigten bearbeiten
+          // - Planer: NUR Kommentare sehen
+          eventDidMount: (info)=>{
+            info.el.addEventListener('click', async (e)=>{
+              e.preventDefault();
+              if(e.stopImmediatePropagation){ e.stopImmediatePropagation(); } else { e.stopPropagation(); }
+
+              const props = info.event.extendedProps || {};
+              const event_id = (props.id || info.event.id);
+              const title = (info.event.title || props.title || "(ohne Titel)");
+
+      if(IS_PLANNER){
+        await ensureUsersLoaded(false);
+        await loadPlannerBbsUsers();
+                // Einsatzleitung: Erst Einsatz anklicken, dann im Popup per Button den Mitarbeiter-Auszug anzeigen.
+                currentElExtractEvent = {eventId: event_id, title: title, props: props};
+                const modal = document.getElementById('planningCommentsModal');
+                const curId = (document.getElementById('plan-cmt-event-id')?.value || '');
+                if(modal && modal.style.display === 'flex' && String(curId) === String(event_id)){
+                  closePlanningCommentsModal();
+                  return;
+                }
+                openPlanningCommentsModal(event_id, title, props);
+                return;
+              }
+
+              // ✅ Vorgesetzter-Varianten dürfen hier wie Chef bearbeiten
+              if(!(ROLE === 'vorgesetzter' || ROLE === 'chef' || ROLE === 'vorgesetzter_cp')) return;
+
+              // Toggle: Doppelklick auf denselben Block schließt das Popup
+              const modal = document.getElementById('planningBulkEditModal');
+              const curId = (document.getElementById('plan-bulk-event-id')?.value || '');
+              if(modal && modal.style.display === 'flex' && String(curId) === String(event_id)){
+                closePlanningBulkEditModal();
+                return;
+              }
+              openPlanningBulkEdit(event_id, title, props);
+            });
+          },
+
+          eventClick: ()=>{ /* Planung: nur Übersicht */ }
+});
+        planningCalendar.render();
+
+        
+      window.planningCalendar = planningCalendar;
+// Auto-Refresh (wenn sich was ändert, wird es spätestens nach 20s aktualisiert)
+        setInterval(()=>{ 
+          if(document.getElementById("planning").style.display !== "none"){
+            planningCalendar.refetchEvents();
+          }
+        }, 20000);
+      }
+
+
+
+    function collectLanguageSkills(prefix){
+      const result = {};
+      document.querySelectorAll(`input.lang-check[data-prefix="${prefix}"]`).forEach(cb => {
+        const lang = cb.dataset.lang;
+        const sel = document.getElementById(`${prefix}-lang-${lang}`);
+        if(cb.checked && sel && sel.value){
+          result[lang] = sel.value;
+        }
+      });
+      return result;
+    }
+    window.collectLanguageSkills = collectLanguageSkills;
+
+    function getLanguageSkillsSafe(prefix){
+      try{
+        if(typeof collectLanguageSkills === 'function') return collectLanguageSkills(prefix);
+      }catch(e){}
+      try{
+        if(typeof window.collectLanguageSkills === 'function') return window.collectLanguageSkills(prefix);
+      }catch(e){}
+      const result = {};
+      document.querySelectorAll(`input.lang-check[data-prefix="${prefix}"]`).forEach(cb => {
+        const lang = cb.dataset.lang;
+        const sel = document.getElementById(`${prefix}-lang-${lang}`);
+        if(cb.checked && sel && sel.value){
+          result[lang] = sel.value;
+        }
+      });
+      return result;
+    }
+    window.getLanguageSkillsSafe = getLanguageSkillsSafe;
+
+    function setLanguageSkills(prefix, data){
+      const map = data || {};
+      document.querySelectorAll(`input.lang-check[data-prefix="${prefix}"]`).forEach(cb => {
+        const lang = cb.dataset.lang;
+        const sel = document.getElementById(`${prefix}-lang-${lang}`);
+        const val = map[lang] || "";
+        cb.checked = !!val;
+        if(sel){
+          sel.style.display = cb.checked ? 'inline-block' : 'none';
+          sel.value = val;
+        }
+      });
+    }
+    window.setLanguageSkills = setLanguageSkills;
+
+
+
+    function renderImagePreview(prefix, value){
+      const box = document.getElementById(prefix === 'edit' ? 'edit-image-preview-box' : 'image-preview-box');
+      const hidden = document.getElementById(prefix === 'edit' ? 'edit-image_data' : 'image_data');
+      if(!box || !hidden) return;
+      hidden.value = value || '';
+      if(value){
+        box.innerHTML = `<img src="${value}" alt="Mitarbeiterbild">`;
+      } else {
+        box.innerHTML = '<div class="image-preview-placeholder">Noch kein Bild hinterlegt</div>';
+      }
+    }
+    window.renderImagePreview = renderImagePreview;
+
+    function clearImagePreview(prefix){
+      renderImagePreview(prefix, '');
+      const fileInput = document.getElementById(prefix === 'edit' ? 'edit-image-upload' : 'image-upload');
+      if(fileInput) fileInput.value = '';
+    }
+
+    function bindImageUpload(inputId, prefix){
+      const input = document.getElementById(inputId);
+      if(!input) return;
+      input.addEventListener('change', () => {
+        const file = input.files && input.files[0];
+        if(!file){
+          if(prefix !== 'edit') clearImagePreview(prefix);
+          return;
+        }
+        const reader = new FileReader();
+        reader.onload = () => renderImagePreview(prefix, String(reader.result || ''));
+        reader.readAsDataURL(file);
+      });
+    }
+
+    function bindQualificationUi(){
+      document.querySelectorAll('.lang-check').forEach(cb => {
+        cb.addEventListener('change', () => {
+          const sel = document.getElementById(`${cb.dataset.prefix}-lang-${cb.dataset.lang}`);
+          if(!sel) return;
+          sel.style.display = cb.checked ? 'inline-block' : 'none';
+          if(cb.checked && !sel.value) sel.value = 'Grundkenntnisse';
+          if(!cb.checked) sel.value = '';
+        });
+      });
+      [['fuehrerschein','fuehrerschein_klassen'],['edit-fuehrerschein','edit-fuehrerschein_klassen']].forEach(([a,b])=>{
+        const cb=document.getElementById(a); const inp=document.getElementById(b);
+        if(!cb || !inp) return;
+        const sync=()=>{inp.style.display=cb.checked?'block':'none'; if(!cb.checked) inp.value='';};
+        cb.addEventListener('change', sync); sync();
+      });
+    }
+
+      // User hinzufügen
+      bindQualificationUi();
+      bindImageUpload('image-upload', 'add');
+      bindImageUpload('edit-image-upload', 'edit');
+      if(!IS_PLANNER){
+      document.getElementById("add-user-form").onsubmit=async e=>{
+        e.preventDefault();
+        let data={
+          vorname:document.getElementById("vorname").value,
+          nachname:document.getElementById("nachname").value,
+          email:(document.getElementById("email").value || "").trim(),
+          geburtsort:(document.getElementById("geburtsort").value || "").trim(),
+          geburtstag:(document.getElementById("geburtstag").value || "").trim(),
+          bemerkung:(document.getElementById("bemerkung").value || "").trim(),
+          username:document.getElementById("new-username").value,
+          password:document.getElementById("new-password").value,
+          role:document.getElementById("new-role").value,
+          s34a:document.getElementById("s34a").value,
+          s34a_art:document.getElementById("s34a_art").value,
+          pschein:document.getElementById("pschein").checked ? "ja" : "nein",
+          bewach_id: document.getElementById("bewach_id").value,
+          steuernummer: document.getElementById("steuernummer").value,
+          bsw: document.getElementById("bsw").checked ? "ja" : "nein",
+          sanitaeter: document.getElementById("sanitaeter").checked ? "ja" : "nein",
+          stundensatz: document.getElementById("stundensatz").value,
+          ausweis_art: document.getElementById('ausweis_art').value,
+          ausweis_nr: document.getElementById('ausweis_nr').value,
+          ausweis_behoerde: document.getElementById('ausweis_behoerde').value,
+          ausweis_gueltig_bis: document.getElementById('ausweis_gueltig_bis').value,
+          language_skills: getLanguageSkillsSafe('add'),
+          brandschutzhelfer: document.getElementById('brandschutzhelfer').checked ? 'ja' : 'nein',
+          deeskalation: document.getElementById('deeskalation').checked ? 'ja' : 'nein',
+          gssk: document.getElementById('gssk').checked ? 'ja' : 'nein',
+          fachkraft_ss: document.getElementById('fachkraft_ss').checked ? 'ja' : 'nein',
+          personenschutz: document.getElementById('personenschutz').checked ? 'ja' : 'nein',
+          waffensachkunde: document.getElementById('waffensachkunde').checked ? 'ja' : 'nein',
+          behoerdlich_studium: document.getElementById('behoerdlich_studium').checked ? 'ja' : 'nein',
+          fuehrerschein: document.getElementById('fuehrerschein').checked ? 'ja' : 'nein',
+          fuehrerschein_klassen: document.getElementById('fuehrerschein_klassen').value,
+          image_data: document.getElementById('image_data').value
+        };
+        const resAdd = await fetch("/users",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify(data)});
+        const rAdd = await resAdd.json().catch(()=>({}));
+        if(!resAdd.ok || rAdd.error){
+          alert(rAdd.error || "Hinzufügen fehlgeschlagen");
+          return;
+        }
+
+        let successMsg = "Mitarbeiter erfolgreich hinzugefügt.";
+        if(rAdd.mail_sent){
+          successMsg += " Die Zugangsdaten wurden per E-Mail versendet.";
+        } else if(rAdd.mail_error){
+          successMsg += ` Mail konnte nicht versendet werden: ${rAdd.mail_error}`;
+        } else {
+          successMsg += " Es wurde keine E-Mail versendet.";
+        }
+
+        if(rAdd.user){
+          const createdUser = Object.assign({ consent_given:false, is_locked:false }, rAdd.user);
+          createdUser.language_skills = createdUser.language_skills || {};
+          usersList = sortUsersSpecial([createdUser, ...(Array.isArray(usersList) ? usersList.filter(u => String(u.username) !== String(createdUser.username)) : [])]);
+          usersCache = {};
+          usersList.forEach(u => { usersCache[u.username] = `${u.vorname || ""} ${u.nachname || ""}`.trim(); });
+          window.usersList = usersList;
+          window.usersCache = usersCache;
+          renderUsersTable(usersList);
+        }
+
+        alert(successMsg);
+        await loadUsers();
+        e.target.reset();
+        setLanguageSkills('add', {});
+        const addFs=document.getElementById('fuehrerschein'); if(addFs){ addFs.checked=false; addFs.dispatchEvent(new Event('change')); }
+        ['bsw','sanitaeter','pschein'].forEach(id => { const el = document.getElementById(id); if(el) el.checked = false; });
+        const addAusweisDate = document.getElementById('ausweis_gueltig_bis'); if(addAusweisDate) addAusweisDate.value = '';
+        clearImagePreview('add');
+      };
+      }
+    });
+
+    
+    // ===== Duplizieren (Kalender-Header) =====
+    let dupSelectedDates = [];
+    let dupSourceCategoryById = {}; // event_id -> 'CP'/'CV'
+
+    // Kategorie robust aus Event-Objekt lesen (Backend liefert je nach Quelle category oder extendedProps.category)
+    function normalizeDupCategory(raw){
+      const c = String(raw || 'CP').toUpperCase();
+      return (c === 'CV') ? 'CV' : 'CP';
+    }
+
+
+    function openDuplicateModal(){
+      document.getElementById("duplicateModal").style.display = "flex";
+      dupSelectedDates = [];
+      dupSourceCategoryById = {};
+
+      document.getElementById("dup-date-list").innerHTML = "";
+document.getElementById("dup-date").value = "";
+
+      // Einsätze laden (aktuell im Kalender) – wir nutzen /events
+      loadDuplicateSourceOptions();
+      renderDupDateList();
+    }
+
+    function closeDuplicateModal(){
+      document.getElementById("duplicateModal").style.display = "none";
+    }
+
+    async function loadDuplicateSourceOptions(){
+      const sel = document.getElementById("dup-source-event");
+      sel.innerHTML = "<option value=''>Lade…</option>";
+
+      const res = await fetch(`/events?start=${encodeURIComponent((new Date()).getFullYear()+"-01-01")}&end=${encodeURIComponent((new Date((new Date()).getFullYear()+1,0,1)).toISOString().slice(0,10))}&ts=${Date.now()}`);
+      const events = await res.json();
+
+      // sort: Datum absteigend
+      events.sort((a,b)=> String(b.start||"").localeCompare(String(a.start||"")) );
+
+      sel.innerHTML = "";
+      events.forEach(ev=>{
+        const opt = document.createElement("option");
+        opt.value = ev.id;
+        const catRaw = (ev && (ev.category ?? ev.event_category ?? ev.eventCategory ?? ev.ev_category ?? (ev.extendedProps && (ev.extendedProps.category ?? ev.extendedProps.CATEGORY ?? ev.extendedProps.kategorie ?? ev.extendedProps.Kategorie ?? ev.extendedProps.event_category ?? ev.extendedProps.eventCategory ?? ev.extendedProps.ev_category))));
+        const cat = normalizeDupCategory(catRaw);
+        dupSourceCategoryById[String(ev.id)] = cat;
+        opt.dataset.category = cat;
+        const startTxt = ev.start ? fmtDateTimeDE(ev.start) : "";
+        opt.textContent = `[${dupSourceCategoryById[String(ev.id)]}] ${(ev.title || "(ohne Titel)")} – ${startTxt}`;
+        sel.appendChild(opt);
+      });
+
+      if(events.length === 0){
+        sel.innerHTML = "<option value=''>Keine Einsätze vorhanden</option>";
+      }
+    }
+
+    function addDupDate(){
+      const d = (document.getElementById("dup-date").value || "").trim();
+      if(!d){ alert("Bitte ein Datum auswählen."); return; }
+      if(!/^\d{4}-\d{2}-\d{2}$/.test(d)){ alert("Ungültiges Datum."); return; }
+      if(!dupSelectedDates.includes(d)) dupSelectedDates.push(d);
+      renderDupDateList();
+    }
+
+    function removeDupDate(d){
+      dupSelectedDates = dupSelectedDates.filter(x=>x!==d);
+      renderDupDateList();
+    }
+
+    function renderDupDateList(){
+      dupSelectedDates.sort();
+      const ul = document.getElementById("dup-date-list");
+      ul.innerHTML = "";
+      dupSelectedDates.forEach(d=>{
+        const li = document.createElement("li");
+        li.innerHTML = `${d} <button class="reject inline" style="margin-left:8px;" type="button">Entfernen</button>`;
+        li.querySelector("button").onclick = ()=>removeDupDate(d);
+        ul.appendChild(li);
+      });
+      if(dupSelectedDates.length===0){
+        ul.innerHTML = "<li class='muted'>—</li>";
+      }
+    }
+
+    async function runDuplicate(){
+      const sel = document.getElementById("dup-source-event");
+      const event_id = (sel && sel.value ? String(sel.value).trim() : "");
+      if(!event_id){ alert("Bitte einen Einsatz auswählen."); return; }
+      if(!dupSelectedDates || dupSelectedDates.length === 0){
+        alert("Bitte mindestens ein Datum auswählen.");
+        return;
+      }
+
+      // ✅ Auftraggeber automatisch vom ausgewählten Einsatz übernehmen (CP bleibt CP, CV bleibt CV)
+      const category = normalizeDupCategory(
+        (dupSourceCategoryById && dupSourceCategoryById[String(event_id)])
+      );
+
+      const res = await fetch("/events/duplicate", {
+        method:"POST",
+        headers:{"Content-Type":"application/json"},
+        body: JSON.stringify({ event_id, dates: dupSelectedDates, category, cat: category, source_category: category, event_category: category })
+      });
+
+      const r = await res.json().catch(()=>({}));
+      if(!res.ok || r.error){
+        alert(r.error || "Duplizieren fehlgeschlagen");
+        return;
+      }
+
+      closeDuplicateModal();
+      if(calendar) calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+    }
+
+
+
+    // Einsatz anlegen
+    async function openEventModal(){
+  await ensureUsersLoaded(false);
+  if(!Array.isArray(plannerBbsUsers) || plannerBbsUsers.length === 0) await loadPlannerBbsUsers();
+  const m = document.getElementById("eventModal");
+  if(!m) return;
+  fillPlannerSelect('ev-einsatzleitung', selectedPlannerValues('ev-einsatzleitung'));
+  document.body.classList.add("modal-open");
+  m.style.display="flex";
+  void m.offsetHeight;
+  requestAnimationFrame(()=>{ void m.offsetHeight; try{ m.scrollTop = 0; }catch(_){} try{ const c=m.querySelector('.modal-content'); c && c.focus && c.focus(); }catch(_){} });
+  try{ syncModalCatButtons(); }catch(e){}
+}
+    function closeEventModal(){ const m=document.getElementById("eventModal"); if(m) m.style.display="none"; document.body.classList.remove("modal-open"); }
+
+    async function saveEvent(status){
+      let time = document.getElementById("start-time").value;
+      let start = selectedDate + "T" + time;
+
+      const useEventRate = document.getElementById("use-event-rate").checked;
+
+      let data={
+        title:document.getElementById("title").value,
+        ort:document.getElementById("ort").value,
+        dienstkleidung:document.getElementById("dienst").value,
+        auftraggeber:document.getElementById("auftrag").value,
+        start:start,
+        status:status,
+        category:(document.getElementById("ev-category").value || "CP"),
+        required_staff: document.getElementById("required-staff").value,
+        required_qualifications: Array.from(document.querySelectorAll('input[name="create-required-qualification"]:checked')).map(el=>el.value),
+        planned_end_time: document.getElementById("planned-end-time").value,
+        frist: document.getElementById("frist").value,
+        einsatzleitung_usernames: selectedPlannerValues("ev-einsatzleitung"),
+        einsatzleitung_username: selectedPlannerValues("ev-einsatzleitung")[0] || "",
+        use_event_rate: useEventRate ? 1 : 0,
+        stundensatz: useEventRate ? document.getElementById("event-rate").value : ""
+      };
+
+      const res = await fetch("/events",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify(data)});
+      const r = await res.json().catch(()=>({}));
+      if(!res.ok || r.error){
+        alert(r.error || "Speichern fehlgeschlagen");
+        return;
+      }
+      closeEventModal();
+      calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+      }
+
+    // Details
+    async function openDetailsModal(ev){
+      currentEventId = ev.extendedProps.id || ev.id;
+      await ensureUsersLoaded(false);
+      if(!Array.isArray(plannerBbsUsers) || plannerBbsUsers.length === 0){
+        await loadPlannerBbsUsers();
+      }else{
+        plannerBbsUsers.forEach(u=>{
+          const fullName = `${u.vorname || ''} ${u.nachname || ''}`.trim() || u.username;
+          if(u.username && fullName) usersCache[u.username] = fullName;
+        });
+        window.usersCache = usersCache;
+      }
+      let fullProps = ev.extendedProps || {};
+      try{
+        const res = await fetch(`/events?event_id=${encodeURIComponent(currentEventId)}&ts=${Date.now()}`, {cache:'no-store'});
+        const arr = await res.json();
+        if(Array.isArray(arr) && arr[0]) fullProps = arr[0];
+      }catch(_e){}
+      currentDetailsData = fullProps;
+      buildDetailsModal(fullProps, ev);
+
+      const m = document.getElementById("detailsModal");
+      if(!m) return;
+
+      // ✅ iOS/Safari: force immediate paint (otherwise shows only after next UI action)
+      document.body.classList.add("modal-open");
+      m.style.display = "flex";
+      // force reflow
+      void m.offsetHeight;
+      requestAnimationFrame(()=>{ void m.offsetHeight; try{ m.scrollTop = 0; }catch(_){} try{ const c=m.querySelector('.modal-content'); c && c.focus && c.focus(); }catch(_){} });
+    }
+    function closeDetailsModal(){ const m=document.getElementById("detailsModal"); if(m) m.style.display="none"; document.body.classList.remove("modal-open"); }
+
+    async function refreshDetailsModal() {
+      // Nur den geöffneten Einsatz laden, nicht mehr das komplette Kalenderjahr.
+      const res = await fetch(`/events?event_id=${encodeURIComponent(currentEventId)}&ts=${Date.now()}`, {cache:"no-store"});
+      const events = await res.json();
+      const e = Array.isArray(events) ? events[0] : null;
+
+      if (e) {
+        currentDetailsData = e;
+        buildDetailsModal(e, { title: e.title, start: new Date(e.start), id: e.id });
+      }
+    }
+
+    let visibleCalendarRefreshTimer = null;
+    function refreshVisibleCalendarsSoon(){
+      clearTimeout(visibleCalendarRefreshTimer);
+      visibleCalendarRefreshTimer = setTimeout(()=>{
+        const calendarWrap = document.getElementById("calendar-wrap");
+        const planningWrap = document.getElementById("planning");
+        if(calendar && calendarWrap && calendarWrap.style.display !== "none") calendar.refetchEvents();
+        if(planningCalendar && planningWrap && planningWrap.style.display !== "none") planningCalendar.refetchEvents();
+      }, 80);
+    }
+
+    function setCurrentActionBusy(busyText){
+      const btn = document.activeElement;
+      if(!btn || btn.tagName !== "BUTTON") return ()=>{};
+      const oldText = btn.textContent;
+      btn.disabled = true;
+      if(busyText) btn.textContent = busyText;
+      return ()=>{
+        btn.disabled = false;
+        btn.textContent = oldText;
+      };
+    }
+
+    // =========================
+    // ⚠️ Kollisionswarnung Personal
+    // =========================
+    function _collisionPad(n){ return String(n).padStart(2,"0"); }
+
+    function _collisionDateKey(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "";
+      return `${d.getFullYear()}-${_collisionPad(d.getMonth()+1)}-${_collisionPad(d.getDate())}`;
+    }
+
+    function _collisionTimeToMinutes(value){
+      if(value === undefined || value === null) return null;
+      const m = String(value).trim().match(/^(\d{1,2}):(\d{2})/);
+      if(!m) return null;
+      const h = Number(m[1]);
+      const min = Number(m[2]);
+      if(isNaN(h) || isNaN(min)) return null;
+      return h * 60 + min;
+    }
+
+    function _collisionTimeFromDate(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return null;
+      return d.getHours() * 60 + d.getMinutes();
+    }
+
+    function _collisionHHMM(mins){
+      if(mins === null || mins === undefined || isNaN(mins)) return "-";
+      mins = ((Number(mins) % 1440) + 1440) % 1440;
+      return `${_collisionPad(Math.floor(mins/60))}:${_collisionPad(mins%60)}`;
+    }
+
+    function _collisionInterval(ev, response){
+      if(!ev || !ev.start) return null;
+      const startDate = new Date(ev.start);
+      if(isNaN(startDate)) return null;
+      const dateKey = _collisionDateKey(startDate);
+      let start = _collisionTimeToMinutes(response && response.start_time);
+      if(start === null) start = _collisionTimeFromDate(startDate);
+
+      let end = _collisionTimeToMinutes(response && response.end_time);
+      if(end === null) end = _collisionTimeToMinutes(ev.planned_end_time);
+      // Fallback: wenn kein Ende gepflegt ist, warnen wir für dieselbe Startzeit mit 1 Minute Fenster.
+      if(end === null) end = start + 1;
+      if(end <= start) end += 24 * 60; // über Mitternacht
+      return { dateKey, start, end };
+    }
+
+    function _collisionOverlaps(a, b){
+      if(!a || !b || a.dateKey !== b.dateKey) return false;
+      return a.start < b.end && b.start < a.end;
+    }
+
+    function _collisionTitle(ev){
+      return String(ev?.title || "Einsatz").replace(/\s*\(\d{2}:\d{2}\)\s*$/,"").trim() || "Einsatz";
+    }
+
+    async function warnPersonalCollisionBefore(user, actionLabel){
+      try{
+        if(!user || !currentEventId) return true;
+        let current = currentDetailsData;
+        if(!current || String(current.id) !== String(currentEventId)){
+          const currentRes = await fetch(`/events?event_id=${encodeURIComponent(currentEventId)}&ts=${Date.now()}`, {cache:"no-store"});
+          const currentRows = await currentRes.json();
+          current = Array.isArray(currentRows) ? currentRows[0] : null;
+        }
+        if(!current || !current.start) return true;
+
+        const currentDate = new Date(current.start);
+        if(isNaN(currentDate)) return true;
+        const dayStart = _collisionDateKey(currentDate);
+        const nextDate = new Date(currentDate.getFullYear(), currentDate.getMonth(), currentDate.getDate() + 1);
+        const dayEnd = _collisionDateKey(nextDate);
+        const res = await fetch(`/events?start=${encodeURIComponent(dayStart)}&end=${encodeURIComponent(dayEnd)}&ts=${Date.now()}`, {cache:"no-store"});
+        const events = await res.json();
+        if(!Array.isArray(events)) return true;
+
+        const currentResp = (current.responses || {})[user] || {};
+        const currentInterval = _collisionInterval(current, currentResp);
+        if(!currentInterval) return true;
+
+        const conflicts = [];
+        for(const ev of events){
+          if(String(ev.id) === String(currentEventId)) continue;
+          const r = (ev.responses || {})[user];
+          if(!r || String(r.status || "").trim() !== "bestätigt") continue;
+          const otherInterval = _collisionInterval(ev, r);
+          if(_collisionOverlaps(currentInterval, otherInterval)){
+            conflicts.push({ ev, interval: otherInterval });
+          }
+        }
+
+        if(conflicts.length === 0) return true;
+
+        const name = usersCache[user] || user;
+        const currentText = `${fmtDateOnlyDE(current.start)} ${_collisionHHMM(currentInterval.start)}–${_collisionHHMM(currentInterval.end)}`;
+        const lines = conflicts.slice(0,5).map(c => {
+          return `• ${_collisionTitle(c.ev)} (${fmtDateOnlyDE(c.ev.start)} ${_collisionHHMM(c.interval.start)}–${_collisionHHMM(c.interval.end)})`;
+        }).join("\n");
+
+        return confirm(
+          `⚠️ Kollisionswarnung für ${name}\n\n` +
+          `Dieser Einsatz (${currentText}) überschneidet sich mit bereits bestätigten Einsätzen:\n` +
+          `${lines}\n\n` +
+          `Trotzdem ${actionLabel}?`
+        );
+      }catch(e){
+        console.warn("Kollisionsprüfung fehlgeschlagen", e);
+        return true;
+      }
+    }
+
+    async function confirmResponse(user, decision) {
+      if(decision === "bestätigt"){
+        const ok = await warnPersonalCollisionBefore(user, "bestätigen");
+        if(!ok) return;
+      }
+      const restoreButton = setCurrentActionBusy("Wird gespeichert …");
+      try{
+        const res = await fetch("/events/confirm", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ event_id: currentEventId, username: user, decision })
+        });
+        const r = await res.json().catch(()=>({}));
+        if(!res.ok || r.error){
+          alert(r.error || "Aktion fehlgeschlagen");
+          return;
+        }
+        await refreshDetailsModal();
+        refreshVisibleCalendarsSoon();
+        if(decision === "bestätigt" && r.mail_error){
+          alert("Bestätigung gespeichert, aber E-Mail konnte nicht gesendet werden: " + r.mail_error);
+        }
+      }finally{
+        restoreButton();
+      }
+    }
+
+    async function removeUserFromEvent(user){
+      if(!confirm(`Soll ${usersCache[user] || user} wirklich aus dem Einsatz entfernt werden?`)) return;
+      const restoreButton = setCurrentActionBusy("Wird entfernt …");
+      try{
+        const res = await fetch("/events/remove_user", {
+          method:"POST", headers:{"Content-Type":"application/json"},
+          body:JSON.stringify({ event_id: currentEventId, username: user })
+        });
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok || data.error){
+          alert(data.error || "Entfernen fehlgeschlagen.");
+          return;
+        }
+        await refreshDetailsModal();
+        refreshVisibleCalendarsSoon();
+      }finally{
+        restoreButton();
+      }
+    }
+
+    // Vorschläge aus /events/<id>/candidates (qualifiziert, ohne Überschneidung, wenigste Stunden)
+    // oben im Ersatz-Dropdown; die vollständige Liste bleibt darunter.
+    async function loadReplacementSuggestions(eventId){
+      const sel = document.getElementById("replacement-user");
+      if(!sel || !eventId) return;
+      try{
+        const res = await fetch(`/events/${encodeURIComponent(eventId)}/candidates?limit=10&_=${Date.now()}`, {cache:"no-store", credentials:"same-origin"});
+        if(!res.ok) return;
+        const list = await res.json().catch(()=>[]);
+        if(eventId !== currentEventId || !Array.isArray(list) || list.length === 0) return;
+        sel.querySelectorAll("optgroup[data-suggestions]").forEach(g => g.remove());
+        const group = document.createElement("optgroup");
+        group.label = "Vorschläge";
+        group.setAttribute("data-suggestions", "1");
+        list.forEach(c => {
+          const opt = document.createElement("option");
+          opt.value = c.username;
+          const hints = [`${Number(c.month_hours || 0).toLocaleString("de-DE")} h im Monat`];
+          if(c.applied) hints.unshift("beworben");
+          if(c.language_matches) hints.push(`${c.language_matches} Sprache(n)`);
+          opt.textContent = `⭐ ${c.display_name} (${hints.join(", ")})`;
+          group.appendChild(opt);
+        });
+        sel.insertBefore(group, sel.firstChild);
+        sel.value = list[0].username;
+      }catch(e){
+        console.warn("Vorschläge konnten nicht geladen werden", e);
+      }
+    }
+
+    async function assignReplacement(){
+      const sel = document.getElementById("replacement-user");
+      const user = sel.value;
+      if(!user){ alert("Bitte eine Person auswählen."); return; }
+      const ok = await warnPersonalCollisionBefore(user, "zuweisen");
+      if(!ok) return;
+      const restoreButton = setCurrentActionBusy("Wird zugewiesen …");
+      try{
+        const res = await fetch("/events/assign_user", {
+          method:"POST", headers:{"Content-Type":"application/json"},
+          body:JSON.stringify({ event_id: currentEventId, username: user })
+        });
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok || data.error){
+          alert(data.error || "Zuweisen fehlgeschlagen.");
+          return;
+        }
+        await refreshDetailsModal();
+        refreshVisibleCalendarsSoon();
+        if(data.mail_error){
+          alert("Zuweisung gespeichert, aber E-Mail konnte nicht gesendet werden: " + data.mail_error);
+        }
+      }finally{
+        restoreButton();
+      }
+    }
+
+    async function duplicateEvent(id){
+      if(!id) return;
+      const res = await fetch('/events/duplicate', {
+        method:'POST', headers:{'Content-Type':'application/json'},
+        body: JSON.stringify({ event_id: id })
+      });
+      const r = await res.json().catch(()=>({}));
+      if(!res.ok || r.error){
+        alert(r.error || 'Duplizieren fehlgeschlagen');
+        return;
+      }
+      await refreshDetailsModal();
+      calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+    }
+
+    async function deleteEvent() {
+      if (!currentEventId) return;
+      if (!confirm("Soll dieser Einsatz wirklich gelöscht werden?")) return;
+      await fetch("/events/" + currentEventId, { method: "DELETE" });
+      closeDetailsModal();
+      calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+    }
+
+    async function releaseEvent(id){
+      await fetch("/events/release", {
+        method:"POST", headers:{"Content-Type":"application/json"},
+        body:JSON.stringify({event_id:id})
+      });
+      await refreshDetailsModal();
+      calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+    }
+
+    // Einsatz bearbeiten
+    function openEditEventModal(ev, props){
+
+      const p = props || {};
+      // Firma existiert in den Event-Daten ggf. nicht – dennoch sauber anzeigen
+      const firmaEl = document.getElementById("d-firma");
+      if(firmaEl){
+        const _c = String(p.category || "CP").toUpperCase()==="CV"?"CV":"CP";
+        firmaEl.textContent = catToAuftraggeber(_c);
+      }
+
+      // ✅ CP/CV Badge direkt neben Firma setzen
+      updateFirmaCategoryBadge(p);
+
+      document.getElementById("edit-event-id").value = p.id || ev.id || currentEventId;
+      const cleanTitle = (ev && ev.title) ? String(ev.title).replace(/\s*\(\d{2}:\d{2}\)\s*$/,"").trim() : "";
+      document.getElementById("edit-ev-title").value = (p.title ?? cleanTitle ?? "");
+      {
+        const rawCat = String(p.category || "CP").toUpperCase();
+        document.getElementById("edit-ev-category").value = (rawCat === "CV" || rawCat === "BS") ? rawCat : "CP";
+      }
+      fillPlannerSelect('edit-ev-einsatzleitung', p.einsatzleitung_usernames || p.einsatzleitung_username || "");
+      document.getElementById("edit-ev-ort").value = (p.ort ?? "");
+      document.getElementById("edit-ev-dienst").value = (p.dienstkleidung ?? "");
+      document.getElementById("edit-ev-auftrag").value = (p.auftraggeber ?? "");
+
+      let startIso = "";
+      if (typeof p.start === "string" && p.start.length >= 16) {
+        startIso = p.start.slice(0,16);
+      } else if (ev && ev.start instanceof Date && !isNaN(ev.start)) {
+        startIso = toDateTimeLocalValue(ev.start);
+      } else if (ev && typeof ev.start === "string" && ev.start.length >= 16) {
+        startIso = ev.start.slice(0,16);
+      }
+      document.getElementById("edit-ev-start").value = startIso;
+
+      // Frist (optional)
+      let fristIso = "";
+      if (typeof p.frist === "string" && p.frist.length >= 16) {
+        fristIso = p.frist.slice(0,16);
+      }
+      document.getElementById("edit-ev-frist").value = fristIso;
+
+      document.getElementById("edit-ev-planned-end").value = p.planned_end_time || "";
+      document.getElementById("edit-ev-status").value = (p.status ?? "geplant");
+      document.getElementById("edit-ev-required").value = (p.required_staff ?? 0);
+      {
+        const required = new Set(Array.isArray(p.required_qualifications) ? p.required_qualifications : []);
+        document.querySelectorAll('input[name="edit-required-qualification"]').forEach(el=>{ el.checked = required.has(el.value); });
+      }
+
+      const useEventRate = (Number(p.use_event_rate ?? 1) === 1);
+      document.getElementById("edit-use-event-rate").checked = useEventRate;
+      document.getElementById("edit-ev-rate").value = useEventRate ? (p.stundensatz ?? "") : "";
+
+      toggleEventRateInputs('edit');
+
+      
+      // ✅ Modal-Stack: Details ausblenden, Edit anzeigen (Mobile Scroll Fix)
+      const details = document.getElementById('detailsModal');
+      if(details) details.style.display = 'none';
+      const m = document.getElementById('editEventModal');
+      if(!m) return;
+      document.body.classList.add('modal-open');
+      m.style.display = 'flex';
+      // force reflow + scroll to top
+      void m.offsetHeight;
+      requestAnimationFrame(()=>{
+        try{ m.scrollTop = 0; }catch(_){}
+        try{ const c=m.querySelector('.modal-content'); if(c){ c.scrollTop = 0; c.focus && c.focus(); } }catch(_){}
+      });
+    }
+function closeEditEventModal(){
+      const m = document.getElementById('editEventModal');
+      if(m) m.style.display = 'none';
+      // ✅ Details wieder anzeigen (falls vorhanden)
+      const d = document.getElementById('detailsModal');
+      if(d) d.style.display = 'flex';
+      // body bleibt modal-open solange Details offen ist
+      document.body.classList.add('modal-open');
+    }
+async function saveEventEdit(){
+      const useEventRate = document.getElementById("edit-use-event-rate").checked;
+
+      const payload = {
+        event_id: document.getElementById("edit-event-id").value,
+        title: document.getElementById("edit-ev-title").value,
+        ort: document.getElementById("edit-ev-ort").value,
+        dienstkleidung: document.getElementById("edit-ev-dienst").value,
+        auftraggeber: document.getElementById("edit-ev-auftrag").value,
+        category: (document.getElementById("edit-ev-category").value || "CP"),
+        start: document.getElementById("edit-ev-start").value,
+        frist: document.getElementById("edit-ev-frist").value,
+        planned_end_time: document.getElementById("edit-ev-planned-end").value,
+        status: document.getElementById("edit-ev-status").value,
+        required_staff: document.getElementById("edit-ev-required").value,
+        required_qualifications: Array.from(document.querySelectorAll('input[name="edit-required-qualification"]:checked')).map(el=>el.value),
+        einsatzleitung_usernames: selectedPlannerValues("edit-ev-einsatzleitung"),
+        einsatzleitung_username: selectedPlannerValues("edit-ev-einsatzleitung")[0] || "",
+        use_event_rate: useEventRate ? 1 : 0,
+        stundensatz: useEventRate ? document.getElementById("edit-ev-rate").value : ""
+      };
+      // ✅ Schutz: leere Pflichtfelder verhindern (sonst kann Einsatz "verschwinden")
+      if(!payload.title || !payload.title.trim()){
+        alert("Bitte einen Titel eingeben (darf nicht leer sein).");
+        return;
+      }
+      if(!payload.start || String(payload.start).trim().length < 16){
+        alert("Bitte ein Startdatum + Uhrzeit auswählen.");
+        return;
+      }
+
+
+      await fetch("/events/update",{
+        method:"POST", headers:{"Content-Type":"application/json"},
+        body:JSON.stringify(payload)
+      });
+
+      closeEditEventModal();
+      await refreshDetailsModal();
+      calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+    }
+
+    // Zeiten pro Mitarbeiter
+    function cancelTimeEdit(){
+      document.getElementById("time-edit-box").style.display = "none";
+      const rr = document.getElementById("time-remark"); if(rr) rr.value="";
+    }
+
+    function prepareTimeEdit(){
+      const sel = document.getElementById("time-user-select");
+      const user = sel.value;
+      if(!user){ alert("Bitte Mitarbeiter auswählen."); return; }
+
+      const r = (window._currentEventProps?.responses || {})[user] || {};
+      document.getElementById("time-start").value  = r.start_time || "";
+      document.getElementById("time-remark").value = r.remark || "";
+      document.getElementById("time-edit-box").style.display = "block";
+    }
+
+    async function saveSelectedUserTimes(){
+      const sel = document.getElementById("time-user-select");
+      const user = sel.value;
+      if(!user){ alert("Bitte Mitarbeiter auswählen."); return; }
+
+      const start_time = document.getElementById("time-start").value;
+      const remark = document.getElementById("time-remark").value || "";
+      const res = await fetch("/events/edit_entry", {
+        method:"POST",
+        headers:{"Content-Type":"application/json"},
+        body: JSON.stringify({ event_id: currentEventId, username: user, start_time, remark })
+      });
+
+      if(!res.ok){
+        const t = await res.text();
+        alert("Speichern fehlgeschlagen: " + t);
+        return;
+      }
+
+      cancelTimeEdit();
+      await refreshDetailsModal();
+      calendar.refetchEvents();
+      if(planningCalendar) planningCalendar.refetchEvents();
+      loadReport(); // falls Report offen
+    }
+
+    function buildDetailsModal(props, ev){
+      const p = props || {};
+      window._currentEventProps = p;
+
+      document.getElementById("d-title").textContent = p.title || (ev && ev.title) || "-";
+      const detailStart = p.start || (ev && ev.start) || null;
+      document.getElementById("d-date").textContent = detailStart ? fmtDateOnlyDE(detailStart) : "-";
+      // ✅ Firma = Kategorie (CP/CV)
+      const _cat = String(p.category || (ev && (ev.category || ev.extendedProps?.category)) || "CP").toUpperCase();
+      const firmaEl = document.getElementById("d-firma");
+      if(firmaEl){ firmaEl.textContent = catToAuftraggeber(_cat); }
+
+      document.getElementById("d-ort").textContent = p.ort || "-";
+      document.getElementById("d-dienst").textContent = p.dienstkleidung || "-";
+      document.getElementById("d-auftrag").textContent = p.auftraggeber || "-";
+
+      // ✅ nur Uhrzeit vom Event.start
+      document.getElementById("d-start").textContent = (p.start ? fmtTimeOnly(p.start) : (ev && ev.start ? fmtTimeOnly(ev.start) : "-"));
+
+      document.getElementById("d-planned-end").textContent = p.planned_end_time || "-";
+
+      // Frist anzeigen
+      const fr = (p.frist || "").trim();
+      if(fr){
+        const fd = new Date(fr);
+        document.getElementById("d-frist").textContent = isNaN(fd) ? fr : fmtDateTimeDE(fd);
+      } else {
+        document.getElementById("d-frist").textContent = "-";
+      }
+      document.getElementById("d-required").textContent = (p.required_staff ?? 0);
+      const einsatzleitungList = normalizePlannerSelection(p.einsatzleitung_usernames || p.einsatzleitung_username || "");
+      const einsatzleitungName = einsatzleitungList.length
+        ? einsatzleitungList.map(u => usersCache[u] || u).join(", ")
+        : "-";
+      document.getElementById("d-einsatzleitung").textContent = einsatzleitungName;
+
+      const useEventRate = (Number(p.use_event_rate ?? 1) === 1);
+      if(useEventRate){
+        const rate = (p.stundensatz === "" || p.stundensatz === null || p.stundensatz === undefined)
+          ? "-"
+          : (fmtNumDE(Number(p.stundensatz),2) + " €/h");
+        document.getElementById("d-rate-mode").textContent = `Einsatz-Stundensatz: ${rate}`;
+      } else {
+        document.getElementById("d-rate-mode").textContent = "Mitarbeiter-Stundensätze (aus Verwaltung)";
+      }
+
+      let actions=document.querySelector("#detailsModal .modal-actions");
+      actions.innerHTML="";
+
+      let del=document.createElement("button");
+      del.className="delete";
+      del.textContent="🗑️ Einsatz löschen";
+      del.onclick=()=>deleteEvent();
+      actions.appendChild(del);
+
+      let editBtn=document.createElement("button");
+      editBtn.className="confirm";
+      editBtn.textContent="✏️ Einsatz bearbeiten";
+      editBtn.onclick=()=>openEditEventModal(ev, p);
+      actions.appendChild(editBtn);
+
+      if(p.status==="geplant"){
+        let release=document.createElement("button");
+        release.className="release";
+        release.textContent="🚀 Freigeben";
+        release.onclick=()=>releaseEvent(p.id || ev.id);
+        actions.appendChild(release);
+      }
+
+      // Antworten + Start/Ende neben Name (pro Mitarbeiter)
+      let list=document.getElementById("response-list");
+      list.innerHTML="";
+      let confirmedNames=[];
+      // Basis-Startzeit (Uhrzeit) des Einsatzes für Anzeige bei Mitarbeitenden ohne Chef-Startzeit
+      let baseStartSource = p.start || (ev ? ev.start : null);
+      let baseStartHHMM = "-";
+      if(typeof baseStartSource === "string"){
+        const s = baseStartSource.trim();
+        const m = s.match(/^([0-9]{1,2}):([0-9]{2})$/);
+        if(m){
+          baseStartHHMM = String(m[1]).padStart(2,"0")+":"+m[2];
+        } else {
+          baseStartHHMM = fmtTimeOnly(s);
+        }
+      } else {
+        baseStartHHMM = fmtTimeOnly(baseStartSource);
+      }
+
+
+      // ✅ Reihenfolge in Einsatzdetails:
+// 1) bestätigte hintereinander
+// 2) alle anderen Status hintereinander (zugesagt/abgelehnt/entfernt/...)
+// (Stabile Gruppierung – keine unnötige Um-Sortierung)
+      const _respEntries = Object.entries(p.responses || {});
+      const _best = [];
+      const _other = [];
+
+      for(const [user, r0] of _respEntries){
+        const r = r0 || {};
+        const stStatus = String(r.status || "").trim();
+        // ✅ Wenn Mitarbeiter Zusage/Absage zurückzieht (status leer/NULL):
+        // keine Karte anzeigen => keine Umrandung / kein leeres Kästchen.
+        if(!stStatus) continue;
+
+        if(stStatus === "bestätigt") _best.push([user, r, stStatus]);
+        else _other.push([user, r, stStatus]);
+      }
+
+      for(const [user, r, stStatus] of _best.concat(_other)){
+        let fullname = responseDisplayName(user, r);
+
+        const st = (r.start_time && String(r.start_time).trim()) ? r.start_time : baseStartHHMM;
+        const en = (r.end_time && String(r.end_time).trim()) ? r.end_time : "";
+
+        let timeLabel = "";
+        if(st || en){
+          timeLabel =
+            ` <span style="font-weight:normal;color:#444;">(` +
+            `Start: <b>${st || "-"}</b> | Ende: <b>${en || "-"}</b>` +
+            `)</span>`;
+        }
+
+        let li=document.createElement("li");
+
+        // status als Klasse setzen (z.B. abgelehnt_chef, entfernt_chef)
+        li.classList.add(stStatus);
+
+        if(stStatus==="zugesagt"){
+          li.innerHTML=`<b>${fullname}</b>${timeLabel} ✅ Zugesagt ${r.remark?`<i>(${r.remark})</i>`:""}`;
+
+          let btnYes=document.createElement("button");
+          btnYes.textContent="✅ Bestätigen"; btnYes.className="confirm inline"; btnYes.onclick=()=>confirmResponse(user,"bestätigt");
+
+          let btnNo=document.createElement("button");
+          btnNo.textContent="❌ Ablehnen"; btnNo.className="reject inline"; btnNo.onclick=()=>confirmResponse(user,"abgelehnt");
+
+          li.appendChild(btnYes); li.appendChild(btnNo);
+
+        } else if(stStatus==="bestätigt"){
+          li.innerHTML=`<b>${fullname}</b>${timeLabel} ✅ Bestätigt ${r.remark?`<i>(${r.remark})</i>`:""}`;
+          confirmedNames.push(fullname);
+
+          let btnRemove=document.createElement("button");
+          btnRemove.textContent="🗑️ Entfernen";
+          btnRemove.className="reject inline";
+          btnRemove.onclick=()=>removeUserFromEvent(user);
+          li.appendChild(btnRemove);
+
+        } else if(stStatus==="abgelehnt" || stStatus==="abgelehnt_Vorgesetzter" || stStatus==="abgelehnt_chef"){
+          li.innerHTML=`<b>${fullname}</b>${timeLabel} ❌ Abgelehnt ${r.remark?`<i>(${r.remark})</i>`:""}`;
+
+        } else if(stStatus==="entfernt_Vorgesetzter" || stStatus==="entfernt_chef"){
+          li.innerHTML=`<b>${fullname}</b>${timeLabel} 🗑️ Entfernt ${r.remark?`<i>(${r.remark})</i>`:""}`;
+        }
+
+        // Nur anzeigen, wenn wir auch Inhalt gesetzt haben
+        if(li.innerHTML && li.innerHTML.trim() !== ""){
+          list.appendChild(li);
+        }
+      }
+document.getElementById("confirmed-counter").textContent =
+        "Bestätigt: "+confirmedNames.length+" / Benötigt: "+(p.required_staff || 0);
+      document.getElementById("confirmed-counter").title = confirmedNames.join(", ");
+
+      // Replacement
+      const replacementSelect = document.getElementById("replacement-user");
+      replacementSelect.innerHTML = "";
+
+      const candidates = (Array.isArray(usersList) ? usersList : []).filter(u => {
+        const role = String(u.role || "").trim().toLowerCase();
+        return !["planner_bbs", "planer", "einsatzleitung", "einsatzleiter"].includes(role);
+      });
+
+      candidates.forEach(u=>{
+        const opt=document.createElement("option");
+        opt.value=u.username;
+        const resp = (p.responses||{})[u.username] || null;
+        let label = `${u.vorname} ${u.nachname}`;
+        if(resp && resp.status){ label += ` (${resp.status})`; }
+        opt.textContent = label;
+        replacementSelect.appendChild(opt);
+      });
+
+      if(candidates.length===0){
+        const opt=document.createElement("option");
+        opt.value="";
+        opt.textContent="Keine verfügbaren Kandidaten";
+        replacementSelect.appendChild(opt);
+      }
+      loadReplacementSuggestions(currentEventId);
+
+      // Dropdown Zeiten: nur bestätigte
+      const timeSel = document.getElementById("time-user-select");
+      timeSel.innerHTML = "";
+
+      const confirmedUsers = Object.entries(p.responses || {})
+        .filter(([u, r]) => r.status === "bestätigt")
+        .map(([u]) => u);
+
+      if(confirmedUsers.length === 0){
+        const opt=document.createElement("option");
+        opt.value="";
+        opt.textContent="Keine bestätigten Mitarbeiter";
+        timeSel.appendChild(opt);
+        cancelTimeEdit();
+      } else {
+        confirmedUsers.forEach(u=>{
+          const opt=document.createElement("option");
+          opt.value=u;
+          opt.textContent=usersCache[u] || u;
+          timeSel.appendChild(opt);
+        });
+      }
+    }
+
+    function sortUsersSpecial(list){
+      const arr = Array.isArray(list) ? [...list] : [];
+      return arr.sort((a,b)=>{
+        const aFirst = String(a?.vorname || '').trim().toLocaleLowerCase('de');
+        const aLast  = String(a?.nachname || '').trim().toLocaleLowerCase('de');
+        const bFirst = String(b?.vorname || '').trim().toLocaleLowerCase('de');
+        const bLast  = String(b?.nachname || '').trim().toLocaleLowerCase('de');
+        const aUser  = String(a?.username || '').trim().toLocaleLowerCase('de');
+        const bUser  = String(b?.username || '').trim().toLocaleLowerCase('de');
+
+        const aIsKevin = aFirst === 'kevin' && aLast === 'casutt';
+        const bIsKevin = bFirst === 'kevin' && bLast === 'casutt';
+        if(aIsKevin && !bIsKevin) return -1;
+        if(!aIsKevin && bIsKevin) return 1;
+
+        const byFirst = aFirst.localeCompare(bFirst, 'de');
+        if(byFirst !== 0) return byFirst;
+        const byLast = aLast.localeCompare(bLast, 'de');
+        if(byLast !== 0) return byLast;
+        return aUser.localeCompare(bUser, 'de');
+      });
+    }
+
+
+    function formatLanguageSkillsForPersonalList(languageSkills){
+      const skills = languageSkills && typeof languageSkills === "object" ? languageSkills : {};
+      const entries = Object.entries(skills).filter(([lang, level]) => String(level || "").trim() !== "");
+      if(!entries.length) return "-";
+
+      return `<div class="personal-language-list">` + entries.map(([lang, level]) => `
+        <div class="personal-language-item">
+          <span class="personal-language-name">${escapeHtml(lang)}</span>
+          <span class="personal-language-level">${escapeHtml(level)}</span>
+        </div>
+      `).join("") + `</div>`;
+    }
+
+    function formatLastActivityClient(value){
+      const raw = String(value || "").trim();
+      if(!raw) return "";
+      try{
+        const d = new Date(raw.replace(" ", "T"));
+        if(!Number.isNaN(d.getTime())){
+          const pad = n => String(n).padStart(2, "0");
+          return `Zuletzt online: ${pad(d.getDate())}.${pad(d.getMonth()+1)}.${d.getFullYear()}, ${pad(d.getHours())}:${pad(d.getMinutes())} Uhr`;
+        }
+      }catch(e){}
+      return "Zuletzt online: " + raw;
+    }
+
+    function renderUsersTable(users){
+      const list=document.getElementById("user-list");
+      if(!list) return;
+      list.innerHTML="";
+
+      (Array.isArray(users) ? users : []).forEach(u=>{
+        let tr=document.createElement("tr");
+        if(u.is_locked) tr.classList.add("is-locked-row");
+
+        const fullName = `${u.vorname || ""} ${u.nachname || ""}`.trim() || u.username;
+        const lockBtnLabel = u.is_locked ? '🔓 Entsperren' : ' Sperren';
+        const s34aText = `${capYesNo(u.s34a)}${String(u.s34a||'').toLowerCase()==="ja" ? " ("+(u.s34a_art||"")+")" : ""}`;
+
+        const activityText = u.last_activity_label || formatLastActivityClient(u.last_activity_at) || "Noch keine Aktivität";
+
+        tr.innerHTML=`
+          <td class="personal-name-cell"><b>${escapeHtml(fullName)}</b><br><span class="muted">${escapeHtml(activityText)}</span></td>
+          <td class="personal-note-cell">${escapeHtml(u.bemerkung || '-')}</td>
+                    <td>${escapeHtml(s34aText)}</td>
+          <td>${escapeHtml(u.bewach_id || '-')}</td>
+          <td>${escapeHtml(capYesNo(u.bsw || "nein"))}</td>
+          <td>${escapeHtml(capYesNo(u.sanitaeter || "nein"))}</td>
+          <td>${escapeHtml(capYesNo(u.pschein || "nein"))}</td>
+          <td>${(u.stundensatz!=="" && u.stundensatz!==null && u.stundensatz!==undefined) ? (fmtNumDE(Number(u.stundensatz),2) + " €/h") : "-"}</td>
+          <td>${consentIcons(u)}</td>
+          <td>
+            <div class="personal-action-btns">
+              <button class="release personal-btn-pdf" onclick="downloadUserPdf('${escapeHtml(u.username)}')">PDF erzeugen</button>
+              <button class="confirm personal-btn-edit" onclick="openEditModalByUsername('${encodeURIComponent(u.username)}')">Bearbeiten</button>
+              <button class="confirm personal-btn-lock" onclick="toggleUserLock('${escapeHtml(u.username)}')">${lockBtnLabel}</button>
+              <button class="reject personal-btn-delete" onclick="deleteUser('${escapeHtml(u.username)}')">Löschen</button>
+            </div>
+          </td>
+        `;
+        list.appendChild(tr);
+      });
+    }
+
+    // User Management
+    async function loadUsers(){
+      let res=await fetch("/users?_=" + Date.now(), { cache: "no-store", credentials:"same-origin" });
+      let users=await res.json();
+
+      users = sortUsersSpecial(Array.isArray(users) ? users : []);
+
+      usersList = users;
+      usersCache = {};
+      users.forEach(u=>{ usersCache[u.username] = `${u.vorname} ${u.nachname}`.trim(); });
+
+      renderUsersTable(users);
+
+
+      // ✅ Summenzeile (alle Mitarbeiter zusammen) aktualisieren
+      function updateReportSumRow(){
+        const monthHours = Array(12).fill(0);
+        const monthCost  = Array(12).fill(0);
+        let totalHours = 0;
+        let totalCost  = 0;
+
+        usersList.forEach(u=>{
+          const username = u.username;
+          const d = (window.reportData || reportData || {})[username];
+          if(!d) return;
+          for(let mi=0; mi<12; mi++){
+            const md = d.months[mi];
+            monthHours[mi] += Number(md.hours || 0);
+            monthCost[mi]  += Number(md.cost  || 0);
+          }
+          totalHours += Number(d.totalHours || 0);
+          totalCost  += Number(d.totalCost  || 0);
+        });
+
+        const ids = ["rpt-sum-jan","rpt-sum-feb","rpt-sum-mar","rpt-sum-apr","rpt-sum-mai","rpt-sum-jun",
+                     "rpt-sum-jul","rpt-sum-aug","rpt-sum-sep","rpt-sum-okt","rpt-sum-nov","rpt-sum-dez"];
+        ids.forEach((id,i)=>{
+          const el = document.getElementById(id);
+          if(!el) return;
+          const h = monthHours[i];
+          const c = monthCost[i];
+          if(!h && !c){
+            el.innerHTML = `<span class="muted">-</span>`;
+          } else {
+            el.innerHTML = `<div><b>${fmtNumDE(h,2)} h</b></div><div><span class="money-soft">${fmtNumDE(c,2)} €</span></div>`;
+          }
+        });
+
+        const hEl = document.getElementById("rpt-sum-hours");
+        if(hEl) hEl.innerHTML = `<b>${fmtNumDE(totalHours,2)} h</b>`;
+        const cEl = document.getElementById("rpt-sum-cost");
+        if(cEl) cEl.innerHTML = `<b>${fmtNumDE(totalCost,2)} €</b>`;
+      }
+
+      updateReportSumRow();
+    }
+
+    async function deleteUser(username){
+      const ok = confirm(
+        `⚠️ Mitarbeiter "${username}" wirklich löschen?\n\nDieser Vorgang kann nicht rückgängig gemacht werden!`
+      );
+      if(!ok) return;
+
+      await fetch("/users/" + encodeURIComponent(username), { method: "DELETE" });
+      loadUsers();
+    }
+
+    
+    async function openEditModalByUsername(usernameEncoded){
+      try {
+        const username = decodeURIComponent(usernameEncoded || "");
+        console.log("Bearbeiten angeklickt:", username);
+
+        if(!Array.isArray(usersList) || usersList.length === 0){
+          await loadUsers();
+        }
+
+        let user = (usersList || []).find(u => String(u.username) === String(username));
+
+        if(!user){
+          const res = await fetch("/users", { cache: "no-store" });
+          const users = await res.json();
+          if(Array.isArray(users)){
+            usersList = sortUsersSpecial(Array.isArray(users) ? users : []);
+            usersCache = {};
+            usersList.forEach(u => { usersCache[u.username] = `${u.vorname || ""} ${u.nachname || ""}`.trim(); });
+            window.usersList = usersList;
+            window.usersCache = usersCache;
+            user = users.find(u => String(u.username) === String(username));
+          }
+        }
+
+        if(!user){
+          alert("Benutzer nicht gefunden. Bitte Seite neu laden und erneut versuchen.");
+          return;
+        }
+
+        openEditModal(user);
+      } catch(err){
+        console.error("Bearbeiten konnte nicht geöffnet werden:", err);
+        alert("Bearbeiten konnte nicht geöffnet werden. Details stehen in der Browser-Konsole (F12).");
+      }
+    }
+
+    function isAmineSalehUserObj(user){
+      const full = `${user?.vorname || ""} ${user?.nachname || ""}`.replace(/\s+/g," ").trim().toLowerCase();
+      const username = String(user?.username || "").trim().toLowerCase();
+      return full === "amine saleh" || full === "amine salah" || username === "amine.saleh" || username === "aminesaleh" || username === "amine.salah" || username === "aminesalah";
+    }
+
+    function passwordProtectedForCurrentViewer(user){
+      const roleNow = String(DASHBOARD_CONTEXT.role).trim().toLowerCase().replace(" ", "_");
+      return (roleNow === "vorgesetzter" || roleNow === "vorgesetzter_cp") && isAmineSalehUserObj(user);
+    }
+
+    function setEditPasswordVisibility(user){
+      const input = document.getElementById("edit-password");
+      if(!input) return;
+      const wrap = input.parentElement;
+      const label = Array.from(document.querySelectorAll("#editUserModal label")).find(l => String(l.textContent||"").trim().toLowerCase() === "passwort");
+      const locked = passwordProtectedForCurrentViewer(user);
+      if(label) label.style.display = locked ? "none" : "";
+      if(wrap) wrap.style.display = locked ? "none" : "flex";
+      input.value = locked ? "" : (user.password || "");
+      input.dataset.protected = locked ? "1" : "0";
+    }
+
+    function openEditModal(user){
+      document.getElementById("edit-username").value=user.username;
+      currentEditUser = user.username;
+
+      document.getElementById("edit-vorname").value=user.vorname || "";
+      document.getElementById("edit-nachname").value=user.nachname || "";
+      document.getElementById("edit-email").value=user.email || "";
+      document.getElementById("edit-geburtsort").value=user.geburtsort || "";
+      document.getElementById("edit-geburtstag").value=user.geburtstag || "";
+      document.getElementById("edit-bemerkung").value=user.bemerkung || "";
+      setEditPasswordVisibility(user);
+      document.getElementById("edit-role").value=user.role || "mitarbeiter";
+      document.getElementById("edit-s34a").value=user.s34a || "nein";
+      document.getElementById("edit-s34a_art").value=user.s34a_art || "";
+      document.getElementById("edit-pschein").checked=String(user.pschein || "nein").toLowerCase()==="ja";
+
+      document.getElementById("edit-bewach-id").value=user.bewach_id || "";
+      document.getElementById("edit-steuernummer").value=user.steuernummer || "";
+      document.getElementById("edit-bsw").checked=String(user.bsw || "nein").toLowerCase()==="ja";
+      document.getElementById("edit-sanitaeter").checked=String(user.sanitaeter || "nein").toLowerCase()==="ja";
+      document.getElementById("edit-ausweis_art").value=user.ausweis_art || "";
+      document.getElementById("edit-ausweis_nr").value=user.ausweis_nr || "";
+      document.getElementById("edit-ausweis_behoerde").value=user.ausweis_behoerde || "";
+      document.getElementById("edit-ausweis_gueltig_bis").value=user.ausweis_gueltig_bis || "";
+
+      document.getElementById("edit-brandschutzhelfer").checked=String(user.brandschutzhelfer || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-deeskalation").checked=String(user.deeskalation || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-gssk").checked=String(user.gssk || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-fachkraft_ss").checked=String(user.fachkraft_ss || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-personenschutz").checked=String(user.personenschutz || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-waffensachkunde").checked=String(user.waffensachkunde || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-behoerdlich_studium").checked=String(user.behoerdlich_studium || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-fuehrerschein").checked=String(user.fuehrerschein || 'nein').toLowerCase()==='ja';
+      document.getElementById("edit-fuehrerschein_klassen").value=user.fuehrerschein_klassen || "";
+      window.setLanguageSkills('edit', user.language_skills || {});
+      document.getElementById("edit-fuehrerschein").dispatchEvent(new Event('change'));
+      window.renderImagePreview('edit', user.image_data || "");
+      document.getElementById("edit-stundensatz").value=(user.stundensatz ?? "") === "" ? "" : Number(user.stundensatz);
+      document.getElementById("editUserModal").style.display="flex";
+    }
+
+    function closeEditModal(){ document.getElementById("editUserModal").style.display="none"; }
+
+    async function saveUserEdit(){
+      const oldUsername = currentEditUser;
+      const newUsernameRaw = document.getElementById("edit-username").value.trim();
+      const newUsername = newUsernameRaw; // Anzeige
+      const newUsernameUrl = encodeURIComponent(newUsernameRaw); // ✅ für URL
+
+      if(!newUsernameRaw){ alert("Benutzername darf nicht leer sein."); return; }
+
+      // 1) ggf. umbenennen
+      if(oldUsername !== newUsernameRaw){
+        const resRename = await fetch("/users/rename", {
+          method:"POST", headers:{"Content-Type":"application/json"},
+          body:JSON.stringify({ old_username: oldUsername, new_username: newUsernameRaw })
+        });
+        const rRename = await resRename.json().catch(()=>({error:"Ungültige Server-Antwort"}));
+        if(!resRename.ok || rRename.error){
+          alert(rRename.error || "Umbenennen fehlgeschlagen");
+          return;
+        }
+        // ✅ wichtig: internen Edit-User aktualisieren
+        currentEditUser = newUsernameRaw;
+      }
+
+      // 2) Daten speichern
+      let data={
+        vorname:document.getElementById("edit-vorname").value,
+        nachname:document.getElementById("edit-nachname").value,
+        email:(document.getElementById("edit-email").value || "").trim(),
+        geburtsort:(document.getElementById("edit-geburtsort").value || "").trim(),
+        geburtstag:(document.getElementById("edit-geburtstag").value || "").trim(),
+        bemerkung:(document.getElementById("edit-bemerkung").value || "").trim(),
+        password:(document.getElementById("edit-password").value || "").trim() ? document.getElementById("edit-password").value : null,
+        role:document.getElementById("edit-role").value,
+        s34a:document.getElementById("edit-s34a").value,
+        s34a_art:document.getElementById("edit-s34a_art").value,
+        pschein:document.getElementById("edit-pschein").checked ? "ja" : "nein",
+        bewach_id: document.getElementById("edit-bewach-id").value,
+        steuernummer: document.getElementById("edit-steuernummer").value,
+        bsw: document.getElementById("edit-bsw").checked ? "ja" : "nein",
+        sanitaeter: document.getElementById("edit-sanitaeter").checked ? "ja" : "nein",
+        stundensatz:document.getElementById("edit-stundensatz").value,
+        ausweis_art: document.getElementById('edit-ausweis_art').value,
+        ausweis_nr: document.getElementById('edit-ausweis_nr').value,
+        ausweis_behoerde: document.getElementById('edit-ausweis_behoerde').value,
+        ausweis_gueltig_bis: document.getElementById('edit-ausweis_gueltig_bis').value,
+        language_skills: getLanguageSkillsSafe('edit'),
+        brandschutzhelfer: document.getElementById('edit-brandschutzhelfer').checked ? 'ja' : 'nein',
+        deeskalation: document.getElementById('edit-deeskalation').checked ? 'ja' : 'nein',
+        gssk: document.getElementById('edit-gssk').checked ? 'ja' : 'nein',
+        fachkraft_ss: document.getElementById('edit-fachkraft_ss').checked ? 'ja' : 'nein',
+        personenschutz: document.getElementById('edit-personenschutz').checked ? 'ja' : 'nein',
+        waffensachkunde: document.getElementById('edit-waffensachkunde').checked ? 'ja' : 'nein',
+        behoerdlich_studium: document.getElementById('edit-behoerdlich_studium').checked ? 'ja' : 'nein',
+        fuehrerschein: document.getElementById('edit-fuehrerschein').checked ? 'ja' : 'nein',
+        fuehrerschein_klassen: document.getElementById('edit-fuehrerschein_klassen').value,
+        image_data: document.getElementById('edit-image_data').value
+      };
+
+      const editedUserObj = (usersList || []).find(u => String(u.username) === String(currentEditUser || newUsernameRaw)) || { username:newUsernameRaw, vorname:data.vorname, nachname:data.nachname };
+      if(passwordProtectedForCurrentViewer(editedUserObj)){
+        delete data.password;
+      }
+
+      const resSave = await fetch("/users/"+newUsernameUrl,{
+        method:"PUT", headers:{"Content-Type":"application/json"},
+        body:JSON.stringify(data)
+      });
+
+      const rSave = await resSave.json().catch(()=>({}));
+      if(!resSave.ok || rSave.error){
+        alert(rSave.error || "Speichern fehlgeschlagen");
+        return;
+      }
+
+      closeEditModal();
+
+      // ✅ sicher aktualisieren (Tabelle + Cache)
+      await loadUsers();
+
+      // optional: Kalender/Planung aktualisieren, falls Namen/Stundensatz geändert wurden
+      if(typeof calendar !== "undefined" && calendar) calendar.refetchEvents();
+      if(typeof planningCalendar !== "undefined" && planningCalendar) planningCalendar.refetchEvents();
+    }
+
+    function togglePassword(id){
+      let input=document.getElementById(id);
+      input.type=input.type==="password"?"text":"password";
+    }
+
+    function consentIcons(user){
+      const icons = [];
+      if(user && user.consent_given){
+        icons.push('<span class="consent-status consent-status-cv" title="CV-Subunternehmervertrag unterschrieben"><span>CV</span><span class="consent-check" aria-label="unterschrieben">✓</span></span>');
+      }
+      if(user && user.cp_consent_given){
+        icons.push('<span class="consent-status consent-status-cp" title="CP-Subunternehmervertrag unterschrieben"><span>CP</span><span class="consent-check" aria-label="unterschrieben">✓</span></span>');
+      }
+      return icons.length ? `<div class="consent-statuses">${icons.join("")}</div>` : '-';
+    }
+
+    function escapeHtml(value){
+      return String(value ?? "")
+        .replace(/&/g, "&amp;")
+        .replace(/</g, "&lt;")
+        .replace(/>/g, "&gt;")
+        .replace(/"/g, "&quot;")
+        .replace(/'/g, "&#039;");
+    }
+
+    let currentPdfUsername = "";
+
+    function downloadUserPdf(username){
+      currentPdfUsername = String(username || "");
+      const modal = document.getElementById('pdf-choice-modal');
+      const select = document.getElementById('pdf-type-select');
+      if(select) select.value = 'CV';
+      if(modal){
+        modal.classList.add('show');
+        modal.setAttribute('aria-hidden', 'false');
+      }
+    }
+
+    function closePdfChoiceModal(){
+      const modal = document.getElementById('pdf-choice-modal');
+      if(modal){
+        modal.classList.remove('show');
+        modal.setAttribute('aria-hidden', 'true');
+      }
+      currentPdfUsername = "";
+    }
+
+    async function confirmPdfChoice(){
+      const select = document.getElementById('pdf-type-select');
+      const pdfType = String(select?.value || 'CV').trim().toUpperCase();
+      const username = currentPdfUsername;
+      if(!username) return closePdfChoiceModal();
+      closePdfChoiceModal();
+      try{
+        await downloadExportJob('user_pdf', {username, pdf_type: pdfType});
+      }catch(err){
+        alert(err.message || 'PDF konnte nicht erstellt werden.');
+      }
+    }
+
+    async function toggleUserLock(username){
+      const user = (usersList || []).find(x => x.username === username) || {};
+      const currentlyLocked = !!user.is_locked;
+      const actionText = currentlyLocked ? 'entsperren' : 'sperren';
+      const ok = confirm(`Mitarbeiteraccount "${username}" wirklich ${actionText}?`);
+      if(!ok) return;
+
+      const res = await fetch('/users/' + encodeURIComponent(username) + '/lock', { method:'POST' });
+      const data = await res.json().catch(()=>({}));
+      if(!res.ok || data.error){
+        alert(data.error || 'Aktion fehlgeschlagen');
+        return;
+      }
+      await loadUsers();
+    }
+
+    // ✅ Hilfsfunktion: Endzeit kann am nächsten Tag liegen (z.B. 22:00–06:00)
+    function calcEndAndHours(startDate, endTimeStr){
+      if(!startDate || isNaN(startDate)) return { end: null, hours: 0 };
+
+      const eParts = String(endTimeStr || "").split(":");
+      if(eParts.length < 2) return { end: null, hours: 0 };
+
+      const eh = Number(eParts[0]); const em = Number(eParts[1]);
+      if(isNaN(eh) || isNaN(em)) return { end: null, hours: 0 };
+
+      const end = new Date(startDate);
+      end.setHours(eh, em, 0, 0);
+
+      // Wenn Endzeit "früher" ist als Startzeit -> nächster Tag
+      if(end.getTime() < startDate.getTime()){
+        end.setDate(end.getDate() + 1);
+      }
+
+      let hours = (end - startDate) / (1000*60*60);
+      if(!isFinite(hours) || hours < 0) hours = 0;
+
+      return { end, hours };
+    }
+
+    // REPORT laden + Endzeit-Edit Aktion
+    
+
+    function parseMoneyInput(v){
+      const n = Number(String(v || '0').replace('€','').replace(/\s/g,'').replace(',', '.'));
+      return Number.isFinite(n) ? n : 0;
+    }
+    function extraCostTotal(costs){ return (costs || []).reduce((sum,c)=>sum + parseMoneyInput(c.amount),0); }
+    function renderRepExtraCostRows(costs){
+      const box=document.getElementById('rep-extra-costs-list'); if(!box) return;
+      box.innerHTML=''; (costs||[]).forEach(c=>addRepExtraCostRow(c)); updateRepExtraCostSummary();
+    }
+    function addRepExtraCostRow(cost){
+      const box=document.getElementById('rep-extra-costs-list'); if(!box) return;
+      const row=document.createElement('div'); row.className='extra-cost-row'; row.dataset.id=cost?.id||'';
+      const label = cost?.label || 'Verpflegungspauschale';
+      row.innerHTML=`<select class="extra-cost-label"><option value="Verpflegungspauschale">Verpflegungspauschale</option><option value="Reisezeit">Reisezeit</option><option value="Sonstiges">Sonstiges</option></select><input class="extra-cost-description" type="text" placeholder="Beschreibung optional" value="${String(cost?.description||'').replace(/"/g,'&quot;')}"><input class="extra-cost-amount" type="number" min="0" step="0.01" value="${Number(cost?.amount||0).toFixed(2)}"><button type="button" class="bs-action-btn extra-cost-remove">✕</button>`;
+      box.appendChild(row); row.querySelector('.extra-cost-label').value=label;
+      row.querySelector('.extra-cost-remove').onclick=()=>{row.remove(); updateRepExtraCostSummary();};
+      row.querySelectorAll('input,select').forEach(el=>el.addEventListener('input', updateRepExtraCostSummary));
+    }
+    function collectRepExtraCosts(){
+      return Array.from(document.querySelectorAll('#rep-extra-costs-list .extra-cost-row')).map(row=>({
+        id: row.dataset.id || '', label: row.querySelector('.extra-cost-label')?.value || '', description: row.querySelector('.extra-cost-description')?.value || '', amount: parseMoneyInput(row.querySelector('.extra-cost-amount')?.value || '0')
+      })).filter(c=>String(c.label).trim() && Number(c.amount)>=0);
+    }
+    function updateRepExtraCostSummary(){
+      const el=document.getElementById('rep-extra-costs-summary'); if(el) el.textContent = `Summe Zusatzkosten: ${fmtNumDE(extraCostTotal(collectRepExtraCosts()),2)} €`;
+    }
+    document.getElementById('rep-add-extra-cost')?.addEventListener('click',()=>addRepExtraCostRow({label:'Verpflegungspauschale', amount:0}));
+
+    // Kleine Frontend-Caches reduzieren doppelte Datenbank-/Netzwerkabfragen.
+    const cvDataCache = window.cvDataCache || (window.cvDataCache = {users:null, usersAt:0, events:new Map()});
+    async function fetchJsonCached(url, key, ttlMs=30000){
+      const now=Date.now();
+      if(key==='users' && cvDataCache.users && (now-cvDataCache.usersAt)<ttlMs) return cvDataCache.users;
+      if(key!=='users'){
+        const hit=cvDataCache.events.get(key);
+        if(hit && (now-hit.at)<ttlMs) return hit.data;
+      }
+      const res=await fetch(url);
+      if(!res.ok) throw new Error('Daten konnten nicht geladen werden.');
+      const data=await res.json();
+      if(key==='users'){cvDataCache.users=data;cvDataCache.usersAt=now;} else cvDataCache.events.set(key,{data,at:now});
+      return data;
+    }
+
+    // REPORT laden (Jahresübersicht: Jan–Dez)
+    async function loadReport(){
+      // Users + Cache
+      const usersUrl = (String(ROLE).toLowerCase() === 'chef' || String(ROLE).toLowerCase() === 'vorgesetzter' || String(ROLE).toLowerCase() === 'vorgesetzter_cp')
+        ? "/users"
+        : "/users_public";
+      usersList = await fetchJsonCached(usersUrl, 'users', 60000);
+      const uMap = userByUsername();
+      usersCache = {};
+      usersList.forEach(u=>{ usersCache[u.username] = `${u.vorname} ${u.nachname}`; });
+
+      // Jahr
+      const yRaw = (document.getElementById("report-year")?.value || "").trim();
+      const year = yRaw ? parseInt(yRaw, 10) : (new Date()).getFullYear();
+
+      const reportStart = `${year}-01-01`;
+      const reportEnd = `${year + 1}-01-01`;
+      const reportKey = `report-events-${year}`;
+      let events = await fetchJsonCached(`/events?start=${encodeURIComponent(reportStart)}&end=${encodeURIComponent(reportEnd)}`, reportKey, 30000);
+
+            const type = (document.getElementById("report-type")?.value || "CV").toUpperCase();
+
+const monthNames = ["Januar","Februar","März","April","Mai","Juni","Juli","August","September","Oktober","November","Dezember"];
+
+      // username -> { months: [{hours,cost,details:[]}], totalHours, totalCost }
+      let reportData = {};
+      window.reportData = reportData;
+
+      function ensureUser(username){
+        if(!reportData[username]){
+          reportData[username] = {
+            months: Array.from({length:12}, ()=>({count:0, hours:0, cost:0, details:[]})),
+            totalCount: 0,
+            totalHours: 0,
+            totalCost: 0
+          };
+        }
+        return reportData[username];
+      }
+
+      events.forEach(ev=>{
+        if(!ev || !ev.start) return;
+        const baseStart = new Date(ev.start);
+        if(isNaN(baseStart)) return;
+
+        // Filter: nur dieses Jahr
+        if(baseStart.getFullYear() !== year) return;
+
+        // ✅ Kategorie-Filter (Report-Type) – damit Doppelklick nur CP oder nur CV zeigt
+        const evCat = String(ev.category || "CP").toUpperCase();
+        if(evCat !== type) return;
+        const monthIdx = baseStart.getMonth(); // 0..11
+
+        for (let user in (ev.responses || {})) {
+          const r = ev.responses[user];
+          if(!r) continue;
+
+          if (String(r.status || "").trim() === "bestätigt") {
+            // ✅ Bestätigte Aufträge zählen sofort im Report – auch ohne Endzeit.
+            // Stunden und Kosten werden erst berechnet, sobald eine Endzeit vorhanden ist.
+            let startDate = new Date(baseStart);
+            if(r.start_time){
+              const parts = String(r.start_time).split(":");
+              if(parts.length >= 2){
+                const sh = Number(parts[0]); const sm = Number(parts[1]);
+                if(!isNaN(sh) && !isNaN(sm)) startDate.setHours(sh, sm, 0, 0);
+              }
+            }
+
+            let hours = 0;
+            let hasEndTime = false;
+            if(r.end_time){
+              const eParts = String(r.end_time).split(":");
+              if(eParts.length >= 2){
+                const eh = Number(eParts[0]); const em = Number(eParts[1]);
+                if(!isNaN(eh) && !isNaN(em)){
+                  const calc = calcEndAndHours(startDate, r.end_time);
+                  hours = calc.hours;
+                  hasEndTime = true;
+                }
+              }
+            }
+
+            let rate = null;
+
+            // ✅ WICHTIG:
+            // Für historische Einsätze mit dem eingefrorenen Snapshot rechnen.
+            // Der Snapshot enthält bereits den damals gültigen Event- oder Profil-Stundensatz.
+            if(r.rate_override !== undefined && r.rate_override !== null && String(r.rate_override) !== ""){
+              const parsed = Number(r.rate_override);
+              rate = isNaN(parsed) ? null : parsed;
+            } else if(r.profile_rate_snapshot !== undefined && r.profile_rate_snapshot !== null && String(r.profile_rate_snapshot) !== "") {
+              const parsed = Number(r.profile_rate_snapshot);
+              rate = isNaN(parsed) ? null : parsed;
+            } else if(r.effective_rate !== undefined && r.effective_rate !== null && String(r.effective_rate) !== "") {
+              // Für zukünftige bestätigte Einsätze kann der Snapshot bewusst leer sein,
+              // damit Änderungen am Personal-Stundensatz übernommen werden.
+              // Dann kommt der aktuell gültige Satz aus dem Backend als effective_rate.
+              const parsed = Number(r.effective_rate);
+              rate = isNaN(parsed) ? null : parsed;
+            } else {
+              rate = null;
+            }
+
+            const extras = Array.isArray(r.extra_costs) ? r.extra_costs : [];
+            const extrasTotal = hasEndTime ? extraCostTotal(extras) : 0;
+            const cost = (hours * (rate ?? 0)) + extrasTotal;
+
+            const bucket = ensureUser(user);
+            bucket.months[monthIdx].count += 1;
+            bucket.months[monthIdx].hours += hours;
+            bucket.months[monthIdx].cost  += cost;
+            bucket.months[monthIdx].details.push({
+              ev: ev,
+              hours: hours,
+              start_time: r.start_time || "",
+              end_time: r.end_time || "",
+              has_end_time: hasEndTime,
+              remark: r.remark,
+              rate: rate,
+              rate_override: (r.rate_override ?? ""),
+              extra_costs: extras,
+              extrasTotal: extrasTotal,
+              cost: cost,
+              year: year,
+              monthIdx: monthIdx
+            });
+
+            bucket.totalCount += 1;
+            bucket.totalHours += hours;
+            bucket.totalCost  += cost;
+          }
+        }
+      });
+
+      // Render
+      let list = document.getElementById("report-list");
+      list.innerHTML = "";
+
+      // Reihenfolge: wie User-Liste
+      usersList.forEach(u=>{
+        const username = u.username;
+        const d = reportData[username];
+        if(!d) return;
+
+        const tr = document.createElement("tr");
+
+        // Name
+        const tdName = document.createElement("td");
+        tdName.textContent = usersCache[username] || username;
+        tr.appendChild(tdName);
+
+        // Monate
+        for(let mi=0; mi<12; mi++){
+          const md = d.months[mi];
+          const td = document.createElement("td");
+          td.style.cursor = "pointer";
+
+          if(md.details.length === 0){
+            td.innerHTML = `<span class="muted">-</span>`;
+          } else {
+            td.classList.add("report-month-cell");
+            td.innerHTML = `<div>${Number(md.count || 0)}</div><div>${fmtNumDE(md.hours,2)} h</div><div><b>${fmtNumDE(md.cost,2)} €</b></div>`;
+          }
+
+          td.onclick = ()=>{
+            if(md.details.length === 0){
+              alert(`Keine Einsätze für ${usersCache[username] || username} im ${monthNames[mi]} ${year}.`);
+              return;
+            }
+            openUserReport(username, md.details, { year, monthIdx: mi, monthName: monthNames[mi] });
+          };
+
+          tr.appendChild(td);
+        }
+
+        // Gesamt wie im Beispiel: Einsätze / Stunden / Summe
+        const tdTotal = document.createElement("td");
+        tdTotal.className = "report-total-cell";
+        tdTotal.innerHTML = `<div><b>${Number(d.totalCount || 0)}</b></div><div>${fmtNumDE(d.totalHours,2)} h</div><div><b>${fmtNumDE(d.totalCost,2)} €</b></div>`;
+        tr.appendChild(tdTotal);
+
+        const tdLabels = document.createElement("td");
+        tdLabels.className = "report-side-labels";
+        tdLabels.innerHTML = `<div>Einsätze</div><div>Stunden</div><div>Summe</div>`;
+        tr.appendChild(tdLabels);
+
+        list.appendChild(tr);
+      });
+
+
+
+      // ✅ Summenzeile (alle Mitarbeiter zusammen) aktualisieren
+      function updateReportSumRow(){
+        const monthCounts = Array(12).fill(0);
+        const monthHours = Array(12).fill(0);
+        const monthCosts = Array(12).fill(0);
+        let totalCount = 0;
+        let totalHours = 0;
+        let totalCost = 0;
+
+        // Summen aus den berechneten Daten (nicht aus HTML)
+        usersList.forEach(u=>{
+          const username = u.username;
+          const d = reportData[username];
+          if(!d) return;
+          for(let mi=0; mi<12; mi++){
+            const md = d.months[mi];
+            monthCounts[mi] += Number(md.count || 0);
+            monthHours[mi] += Number(md.hours || 0);
+            monthCosts[mi] += Number(md.cost || 0);
+          }
+          totalCount += Number(d.totalCount || 0);
+          totalHours += Number(d.totalHours || 0);
+          totalCost  += Number(d.totalCost || 0);
+        });
+
+        const map = [
+          ['rpt-sum-jan',0],['rpt-sum-feb',1],['rpt-sum-mar',2],['rpt-sum-apr',3],['rpt-sum-mai',4],['rpt-sum-jun',5],
+          ['rpt-sum-jul',6],['rpt-sum-aug',7],['rpt-sum-sep',8],['rpt-sum-okt',9],['rpt-sum-nov',10],['rpt-sum-dez',11]
+        ];
+        map.forEach(([id, idx])=>{
+          const el = document.getElementById(id);
+          if(!el) return;
+          const n = monthCounts[idx];
+          const h = monthHours[idx];
+          const c = monthCosts[idx];
+          if(!n && !h && !c){
+            el.innerHTML = `<span class="muted">-</span>`;
+          } else {
+            el.innerHTML = `<div><b>${Number(n || 0)}</b></div><div>${fmtNumDE(h,2)} h</div><div><b>${fmtNumDE(c,2)} €</b></div>`;
+          }
+        });
+
+        const totalEl = document.getElementById('rpt-sum-total');
+        if(totalEl) totalEl.innerHTML = `<div><b>${Number(totalCount || 0)}</b></div><div>${fmtNumDE(totalHours,2)} h</div><div><b>${fmtNumDE(totalCost,2)} €</b></div>`;
+      }
+
+      updateReportSumRow();
+    }
+
+    
+    // ZÄHLER laden (Einsätze pro Mitarbeiter: Jan–Dez)
+    async function loadCounter(){
+      // Users + Cache
+      let ures = await fetch("/users");
+      usersList = await ures.json();
+      usersCache = {};
+      usersList.forEach(u=>{ usersCache[u.username] = `${u.vorname} ${u.nachname}`; });
+
+      // Jahr
+      const yRaw = (document.getElementById("counter-year")?.value || "").trim();
+      const year = yRaw ? parseInt(yRaw, 10) : (new Date()).getFullYear();
+
+      let res = await fetch(`/events?start=${encodeURIComponent((new Date()).getFullYear()+"-01-01")}&end=${encodeURIComponent((new Date((new Date()).getFullYear()+1,0,1)).toISOString().slice(0,10))}&ts=${Date.now()}`);
+      let events = await res.json();
+
+      const catFilter = (document.getElementById("counter-type")?.value || "CV").toUpperCase();
+      events = events.filter(ev => String(ev.category || "CP").toUpperCase() === catFilter);
+
+      // username -> { months:[12], total }
+      let counterData = {};
+      function ensureUser(username){
+        if(!counterData[username]){
+          counterData[username] = { months: Array.from({length:12}, ()=>0), total: 0 };
+        }
+        return counterData[username];
+      }
+
+      events.forEach(ev=>{
+        if(!ev || !ev.start) return;
+        const baseStart = new Date(ev.start);
+        if(isNaN(baseStart)) return;
+
+        if(baseStart.getFullYear() !== year) return;
+        const monthIdx = baseStart.getMonth();
+
+        for(const user in (ev.responses || {})){
+          const r = ev.responses[user];
+          if(!r) continue;
+          if(String(r.status || "").trim() === "bestätigt"){
+            const bucket = ensureUser(user);
+            bucket.months[monthIdx] += 1;
+            bucket.total += 1;
+          }
+        }
+      });
+
+      // Render
+      let list = document.getElementById("counter-list");
+      list.innerHTML = "";
+
+      // Reihenfolge: wie User-Liste
+      usersList.forEach(u=>{
+        const username = u.username;
+        const d = counterData[username] || { months: Array.from({length:12}, ()=>0), total: 0 };
+
+        const tr = document.createElement("tr");
+
+        const tdName = document.createElement("td");
+        tdName.textContent = usersCache[username] || username;
+        tr.appendChild(tdName);
+
+        for(let mi=0; mi<12; mi++){
+          const td = document.createElement("td");
+          const v = Number(d.months[mi] || 0);
+          td.innerHTML = v ? `<b>${v}</b>` : `<span class="muted">-</span>`;
+          tr.appendChild(td);
+        }
+
+        const tdT = document.createElement("td");
+        tdT.innerHTML = `<b>${Number(d.total || 0)}</b>`;
+        tr.appendChild(tdT);
+
+        list.appendChild(tr);
+      });
+
+  // ✅ Summenzeile (alle Mitarbeiter zusammen) im Zähler aktualisieren
+  function updateCounterSumRow(){
+    const monthSums = Array(12).fill(0);
+    let yearSum = 0;
+
+    // Summen aus den berechneten Daten (nicht aus HTML)
+    usersList.forEach(u=>{
+      const username = u.username;
+      const d = counterData[username] || { months: Array.from({length:12}, ()=>0), total: 0 };
+      for(let mi=0; mi<12; mi++){
+        monthSums[mi] += Number(d.months[mi] || 0);
+      }
+      yearSum += Number(d.total || 0);
+    });
+
+    const ids = ["sum-jan","sum-feb","sum-mar","sum-apr","sum-mai","sum-jun",
+                 "sum-jul","sum-aug","sum-sep","sum-okt","sum-nov","sum-dez"];
+    ids.forEach((id,i)=>{
+      const el = document.getElementById(id);
+      if(el) el.textContent = monthSums[i];
+    });
+    const yel = document.getElementById("sum-year");
+    if(yel) yel.textContent = yearSum;
+  }
+
+  updateCounterSumRow();
+}
+    let activeUserReportState = null;
+    function openUserReport(username, details, scope){
+      activeUserReportState = { username, scope: scope || null };
+
+      const who = usersCache[username] || username;
+      let head = who;
+      if(scope && scope.monthName && scope.year){ head = `${who} – ${scope.monthName} ${scope.year}`; }
+      else if(scope && scope.year){ head = `${who} – ${scope.year}`; }
+      document.getElementById("report-username").textContent = head;
+      let tbody=document.getElementById("user-report-details");
+      tbody.innerHTML="";
+
+      let sumHours = 0;
+      let sumExtra = 0;
+      let sumCost  = 0;
+
+      // ✅ Immer nach Datum (Start) sortieren – damit die Liste im Report bei Doppelklick
+      // sauber nach Datum geordnet ist.
+      details.sort((a,b)=>{
+        const sa = new Date(a?.ev?.start || 0).getTime();
+        const sb = new Date(b?.ev?.start || 0).getTime();
+        if(sa !== sb) return sa - sb;
+
+        // Falls gleicher Tag: nach Startzeit (pro Mitarbeiter) sortieren
+        const ta = (a?.start_time || '').trim();
+        const tb = (b?.start_time || '').trim();
+        return ta.localeCompare(tb, 'de');
+      });
+
+      details.forEach(d=>{
+        let ev=d.ev;
+
+        let start = new Date(ev.start);
+        if(d.start_time){
+          let [sh, sm] = d.start_time.split(":");
+          start.setHours(Number(sh), Number(sm), 0, 0);
+        }
+
+        const hasEndTime = !!String(d.end_time || "").trim();
+        let end = null;
+        if(hasEndTime){
+          let calc = calcEndAndHours(start, d.end_time);
+          end = calc.end;
+        }
+
+        const endLabel = end ? fmtTimeOnly(end) : "-";
+        const hoursValue = hasEndTime ? Number(d.hours || 0) : 0;
+        const extraValue = hasEndTime ? Number(d.extrasTotal || 0) : 0;
+        const costValue = hasEndTime ? Number(d.cost || 0) : 0;
+
+        sumHours += hoursValue;
+        sumExtra += extraValue;
+        sumCost  += costValue;
+
+        let tr=document.createElement("tr");
+        const rateLabel = (d.rate === null || d.rate === undefined || Number.isNaN(Number(d.rate)))
+          ? "-"
+          : `${fmtNumDE(Number(d.rate),2)} €/h`;
+        const costLabel = (d.rate === null || d.rate === undefined || Number.isNaN(Number(d.rate)))
+          ? "-"
+          : `${fmtNumDE(Number(d.cost),2)} €`;
+
+        const extraLabel = hasEndTime && extraValue ? (d.extra_costs || []).map(c=>`${c.label}: ${fmtNumDE(Number(c.amount||0),2)} €`).join('<br>') : '-';
+        tr.innerHTML=`
+          <td>${fmtDateOnlyDE(start)}</td>
+          <td>${ev.title}</td>
+          <td>${ev.ort || "-"}</td>
+          <td>${fmtTimeOnly(start)}</td>
+          <td>${endLabel}</td>
+          <td>${hasEndTime ? fmtNumDE(hoursValue,2) + " h" : "-"}</td>
+          <td>${rateLabel}</td>
+          <td>${extraLabel}</td>
+          <td>${hasEndTime ? costLabel : "-"}</td>
+          <td><button class="confirm">✏️ Bearbeiten</button></td>
+        `;
+        tr.querySelector("button").onclick = ()=>openReportEndEdit(username, ev, d.start_time, d.end_time, d.remark, d.rate_override, d.extra_costs || []);
+        tbody.appendChild(tr);
+      });
+
+      document.getElementById("user-report-sum-hours").textContent = `${fmtNumDE(sumHours,2)} h`;
+      document.getElementById("user-report-sum-extra").textContent = `${fmtNumDE(sumExtra,2)} €`;
+      document.getElementById("user-report-sum-cost").textContent  = `${fmtNumDE(sumCost,2)} €`;
+
+      document.getElementById("userReportModal").style.display="flex";
+    }
+
+    function closeUserReportModal(){document.getElementById("userReportModal").style.display="none";}
+
+    // Report Endzeit ändern
+    function openReportEndEdit(username, ev, startTime, endTime, remark, rateOverride, extraCosts){
+      document.getElementById("rep-event-id").value = ev.id;
+      document.getElementById("rep-username").value = username;
+      document.getElementById("rep-user-label").textContent = usersCache[username] || username;
+      document.getElementById("rep-title-label").textContent = ev.title || "(ohne Titel)";
+      document.getElementById("rep-start-time").value = startTime || "";
+      document.getElementById("rep-end-time").value = endTime || "";
+      document.getElementById("rep-rate").value = (rateOverride !== undefined && rateOverride !== null && String(rateOverride) !== "") ? fmtNumDE(Number(rateOverride),2) : "";
+      document.getElementById("rep-remark").value = remark || "";
+      renderRepExtraCostRows(extraCosts || []);
+      document.getElementById("reportEndEditModal").style.display="flex";
+    }
+    function closeReportEndEditModal(){ document.getElementById("reportEndEditModal").style.display="none"; }
+
+    async function saveReportEndTime(){
+      const event_id = document.getElementById("rep-event-id").value;
+      const username = document.getElementById("rep-username").value;
+      const start_time = document.getElementById("rep-start-time").value;
+      const end_time = document.getElementById("rep-end-time").value;
+
+      const rate_raw = (document.getElementById("rep-rate").value || "").trim();
+      const remark   = document.getElementById("rep-remark").value || "";
+
+      // ✅ Stundensatz: Komma oder Punkt akzeptieren
+      let rate_override = null;
+      if(rate_raw !== ""){
+        const parsed = parseDeNumber(rate_raw);
+        if(parsed === null){
+          alert("Stundensatz ungültig. Bitte z.B. 20,00 eingeben.");
+          return;
+        }
+        rate_override = parsed;
+      }
+
+      const res = await fetch("/events/edit_entry", {
+        method:"POST",
+        headers:{"Content-Type":"application/json"},
+        body:JSON.stringify({
+          event_id,
+          username,
+          start_time,
+          end_time,
+          rate_override,
+          remark,
+          extra_costs: collectRepExtraCosts(),
+          send_notification: false
+        })
+      });
+
+      if(!res.ok){
+        const t = await res.text();
+        alert("Speichern fehlgeschlagen: " + t);
+        return;
+      }
+
+      closeReportEndEditModal();
+
+      // ✅ Report neu berechnen (damit € sofort stimmen)
+      await loadReport();
+
+      // optional: Kalender/Planung aktualisieren
+      if(typeof calendar !== "undefined" && calendar) calendar.refetchEvents();
+      if(typeof planningCalendar !== "undefined" && planningCalendar) planningCalendar.refetchEvents();
+
+      // Nach dem Speichern im gerade geöffneten Mitarbeiter-/Monatsreport bleiben.
+      if(activeUserReportState){
+        const state = activeUserReportState;
+        const d = (window.reportData || reportData || {})[state.username];
+        let details = [];
+        if(d){
+          if(state.scope && Number.isInteger(state.scope.monthIdx) && d.months && d.months[state.scope.monthIdx]) details = d.months[state.scope.monthIdx].details || [];
+          else details = d.details || [];
+        }
+        openUserReport(state.username, details, state.scope);
+      }
+    }
+
+    // =========================
+    // 🗂️ Einsatzleitung: Bulk-Zeiten bearbeiten (für alle bestätigten)
+    // =========================
+    function openPlanningBulkEdit(event_id, title, props){
+      document.getElementById("plan-bulk-event-id").value = event_id || "";
+      document.getElementById("plan-bulk-title").textContent = (title || "").replace(/\s*\(\d{2}:\d{2}\)\s*$/,"").trim();
+
+      const list = document.getElementById("plan-bulk-list");
+      list.innerHTML = "";
+
+      const pdfCategoryInput = document.getElementById("plan-bulk-category");
+      if(pdfCategoryInput) pdfCategoryInput.value = String((props && (props.category || props.kategorie || props.pdf_type)) || 'CV').trim().toUpperCase() === 'CP' ? 'CP' : 'CV';
+
+      const responses = (props && props.responses) ? props.responses : {};
+      const baseStart = props && props.start ? fmtTimeOnly(props.start) : "-";
+
+      const confirmed = [];
+      for(const username in responses){
+        const r = responses[username] || {};
+        if(String(r.status || "").trim() === "bestätigt"){
+          confirmed.push({ username, r });
+        }
+      }
+
+      confirmed.sort((a,b)=>{
+        const an = (usersCache[a.username] || a.username);
+        const bn = (usersCache[b.username] || b.username);
+        return an.localeCompare(bn, "de");
+      });
+
+
+      if(confirmed.length === 0){
+        list.innerHTML = ``;
+      } else {
+        confirmed.forEach((x)=>{
+          const username = x.username;
+          const r = x.r || {};
+          const name = usersCache[username] || username;
+
+          const st = (r.start_time && String(r.start_time).trim()) ? String(r.start_time).trim() : (baseStart && baseStart !== "-" ? baseStart : "");
+          const et = (r.end_time && String(r.end_time).trim()) ? String(r.end_time).trim() : "";
+          const rm = (r.remark || "").trim();
+
+          const row = document.createElement("div");
+          row.className = "detail-box";
+          row.style.marginBottom = "10px";
+          row.innerHTML = `
+            <div style="font-weight:700;margin-bottom:6px;">${name}</div>
+            <div class="form-row">
+              <div>
+                <label>Start</label>
+                <input type="time" class="plan-bulk-start" data-username="${username}" value="${st}">
+              </div>
+              <div>
+                <label>Ende</label>
+                <input type="time" class="plan-bulk-end" data-username="${username}" value="${et}">
+              </div>
+            </div>
+            <div class="form-row">
+              <div>
+                <label>Bemerkung</label>
+                <input type="text" class="plan-bulk-remark" data-username="${username}" value="${rm}" placeholder="optional">
+              </div>
+            </div>
+            <div style="border-top:1px dashed #ddd;margin-top:8px;"></div>
+          `;
+          list.appendChild(row);
+        });
+      }
+
+      document.getElementById("planningBulkEditModal").style.display = "flex";
+    }
+
+    function closePlanningBulkEditModal(){
+      document.getElementById("planningBulkEditModal").style.display = "none";
+    }
+
+
+    // =========================
+    // 🗂️ Einsatzleitung (Planer): nur Kommentare anzeigen
+    // =========================
+    function openPlanningCommentsModal(event_id, title, props){
+      currentElExtractEvent = {eventId: event_id, title: title, props: props || {}};
+      document.getElementById("plan-cmt-event-id").value = event_id || "";
+      document.getElementById("plan-cmt-title").textContent = (title || "").replace(/\s*\(\d{2}:\d{2}\)\s*$/,"").trim();
+
+      const extractBox = document.getElementById("plan-cmt-extract-box");
+      if(extractBox){
+        extractBox.style.display = "none";
+        extractBox.classList.remove("pdf-mode");
+        extractBox.innerHTML = "";
+      }
+
+      const list = document.getElementById("plan-cmt-list");
+      list.innerHTML = "";
+
+      const responses = (props && props.responses) ? props.responses : {};
+
+      const confirmedWithComments = [];
+      for(const username in responses){
+        const r = responses[username] || {};
+        if(String(r.status || "").trim() !== "bestätigt") continue;
+        const remark = (r.remark || "").trim();
+        if(!remark) continue;
+        confirmedWithComments.push({ username, remark });
+      }
+
+      confirmedWithComments.sort((a,b)=>{
+        const an = (usersCache[a.username] || a.username);
+        const bn = (usersCache[b.username] || b.username);
+        return an.localeCompare(bn, "de");
+      });
+
+      if(confirmedWithComments.length === 0){
+        list.innerHTML = ``;
+      } else {
+        confirmedWithComments.forEach(x=>{
+          const name = usersCache[x.username] || x.username;
+          const box = document.createElement("div");
+          box.className = "detail-box";
+          box.style.marginBottom = "10px";
+          box.innerHTML = `
+            <div style="font-weight:700;margin-bottom:6px;">${name}</div>
+            <div style="white-space:pre-wrap;">${escapeAttr(x.remark).replace(/\n/g,"<br>")}</div>
+          `;
+          list.appendChild(box);
+        });
+      }
+
+      document.getElementById("planningCommentsModal").style.display = "flex";
+    }
+
+    function closePlanningCommentsModal(){
+      document.getElementById("planningCommentsModal").style.display = "none";
+      const extractBox = document.getElementById("plan-cmt-extract-box");
+      if(extractBox){
+        extractBox.style.display = "none";
+        extractBox.classList.remove("pdf-mode");
+        extractBox.innerHTML = "";
+      }
+    }
+
+    async function openPlanningBulkAllPdfs(){
+      // Der Button kann sowohl aus dem großen Planungsfenster als auch aus
+      // dem Einsatzleitungs-Kommentarfenster ausgelöst werden. Deshalb wird
+      // die aktive Einsatz-ID aus allen zuverlässigen Quellen ermittelt.
+      const eventId = String(
+        currentElExtractEvent?.eventId ||
+        document.getElementById("plan-cmt-event-id")?.value ||
+        document.getElementById("plan-bulk-event-id")?.value ||
+        ""
+      ).trim();
+      if(!eventId){ alert("Kein Einsatz gewählt."); return; }
+
+      const pdfTypeRaw = String(
+        currentElExtractEvent?.props?.category ||
+        document.getElementById("plan-bulk-category")?.value ||
+        "CV"
+      ).trim().toUpperCase();
+      const pdfType = pdfTypeRaw === "CP" ? "CP" : "CV";
+
+      // Export-Job statt direktem Download: Fehler der Route kommen als
+      // verständliche Meldung zurück, der Web-Worker bleibt frei.
+      try{
+        await downloadExportJob('event_extract_pdf', {event_id: eventId, pdf_type: pdfType});
+      }catch(err){
+        alert(err.message || 'Die gemeinsame PDF konnte nicht erstellt werden.');
+      }
+    }
+
+    async function savePlanningBulkEdits(){
+      const event_id = document.getElementById("plan-bulk-event-id").value;
+      if(!event_id){ alert("Kein Einsatz gewählt."); return; }
+
+      // Inputs nur aus dem Bulk-Modal lesen (verhindert "fremde" Inputs bei mehreren offenen Modals)
+      const modal = document.getElementById("planningBulkEditModal");
+      const starts  = Array.from(modal.querySelectorAll(".plan-bulk-start"));
+      const ends    = Array.from(modal.querySelectorAll(".plan-bulk-end"));
+      const remarks = Array.from(modal.querySelectorAll(".plan-bulk-remark"));
+
+      // Änderungen pro Mitarbeiter sammeln
+      const byUser = {};
+      const ensureUser = (u)=>{
+        const username = (u || "").trim();
+        if(!username) return null;
+        if(!byUser[username]) byUser[username] = { start_time:"", end_time:"", remark:"" };
+        return username;
+      };
+
+      starts.forEach(i=>{
+        const u = ensureUser(i.getAttribute("data-username"));
+        if(!u) return;
+        byUser[u].start_time = (i.value || "").trim();
+      });
+      ends.forEach(i=>{
+        const u = ensureUser(i.getAttribute("data-username"));
+        if(!u) return;
+        byUser[u].end_time = (i.value || "").trim();
+      });
+      remarks.forEach(i=>{
+        const u = ensureUser(i.getAttribute("data-username"));
+        if(!u) return;
+        byUser[u].remark = (i.value || "");
+      });
+
+      const users = Object.keys(byUser);
+      if(users.length === 0){
+        alert("Keine Mitarbeiter gefunden.");
+        return;
+      }
+
+      // Speichern: für ALLE ausgewählten Mitarbeiter (auch wenn Felder leer sind → kann Werte löschen)
+      const failed = [];
+      for(const u of users){
+        const payload = {
+          event_id,
+          username: u,
+          start_time: (byUser[u].start_time || ""),
+          end_time: (byUser[u].end_time || ""),   // immer mitsenden (damit 'leeren' möglich ist)
+          remark: (byUser[u].remark || "")
+        };
+
+        let res;
+        try{
+          res = await fetch("/events/edit_entry", {
+            method:"POST",
+            headers:{"Content-Type":"application/json"},
+            body: JSON.stringify(payload)
+          });
+        } catch(err){
+          failed.push(`${u}: Netzwerkfehler`);
+          continue;
+        }
+
+        if(!res.ok){
+          let t = "";
+          try{ t = await res.text(); } catch(_){}
+          failed.push(`${u}: ${t || res.status}`);
+        }
+      }
+
+      if(failed.length){
+        alert("Nicht alles konnte gespeichert werden:\n\n" + failed.join("\n"));
+        return;
+      }
+
+      closePlanningBulkEditModal();
+
+      if(typeof calendar !== "undefined" && calendar) calendar.refetchEvents();
+      if(typeof planningCalendar !== "undefined" && planningCalendar) planningCalendar.refetchEvents();
+      if(typeof loadReport === "function") loadReport();
+    }
+
+
+    /* REPORT_SORT_BY_DATE */
+    function fmtDateOnlyDE(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      const dd = String(d.getDate()).padStart(2,'0');
+      const mm = String(d.getMonth()+1).padStart(2,'0');
+      const yy = String(d.getFullYear());
+      return `${dd}.${mm}.${yy}`;
+    }
+    
+
+function setCategoryBadge(cat){
+  const el = document.getElementById("d-category-badge");
+  if(!el) return;
+  const raw = String(cat||"CP").toUpperCase();
+  const c = (raw === "CV" || raw === "BS") ? raw : "CP";
+  const txt = catToAuftraggeber(c);
+  el.innerHTML = `<span class="badge badge-${c.toLowerCase()}">${txt}</span>`;
+}
+
+document.addEventListener("DOMContentLoaded", function(){
+  // ✅ Defaults: Report & Zähler starten mit CV
+  const rt = document.getElementById("report-type");
+  if(rt && (!rt.value)) rt.value = "CV";
+  const ct = document.getElementById("counter-type");
+  if(ct && (!ct.value)) ct.value = "CV";
+
+  // Buttons initialisieren + Kopfzeilen einfärben
+  if(typeof initCategoryButtons === "function") initCategoryButtons();
+});
+
+/* ✅ Modal-Kategorie Buttons (Create) */
+function syncModalCatButtons(){
+  const sel = document.getElementById("ev-category");
+  const toggle = document.getElementById("create-ev-cat-toggle");
+  if(!sel || !toggle) return;
+  const current = String(sel.value || "CV").toUpperCase();
+  toggle.querySelectorAll("button.modal-cat-btn").forEach(btn=>{
+    const v = String(btn.dataset.value || "").toUpperCase();
+    btn.classList.toggle("active", v === current);
+  });
+}
+function initModalCatButtons(){
+  const sel = document.getElementById("ev-category");
+  const toggle = document.getElementById("create-ev-cat-toggle");
+  if(!sel || !toggle) return;
+
+  toggle.querySelectorAll("button.modal-cat-btn").forEach(btn=>{
+    btn.addEventListener("click", ()=>{
+      const v = String(btn.dataset.value || "CV").toUpperCase();
+      sel.value = v;
+      sel.dispatchEvent(new Event("change"));
+      syncModalCatButtons();
+    });
+  });
+
+  sel.addEventListener("change", syncModalCatButtons);
+  if(!sel.value) sel.value = "CV";
+  syncModalCatButtons();
+}
+document.addEventListener("DOMContentLoaded", initModalCatButtons);
+
+(function(){
+  let role = String(DASHBOARD_CONTEXT.role).trim().toLowerCase();
+  if(role === "planner bbs") role = "planner_bbs";
+  if(role === "vorgesetzter cp") role = "vorgesetzter_cp";
+
+  const hide = (id)=>{ const el=document.getElementById(id); if(el) el.style.display="none"; };
+  const hideTab = (tabId)=>{ const el=document.getElementById(tabId); if(el) el.style.display="none"; };
+
+  // Einsatzleitung: nur Planung + nur CV
+  if(role === "planner_bbs"){
+    // Tabs ausblenden (alles außer Planung)
+    ["tab-home","tab-calendar","tab-termine","tab-users","tab-report","tab-counter"].forEach(hideTab);
+
+    // Wenn es eine zentrale Funktion gibt, nutze sie (init + refetch + view)
+    if(typeof showPlanningTab === "function"){
+      try{ showPlanningTab(); }catch(e){}
+    }else{
+      // Fallback
+      ["home","calendar","termine","user-management","report","counter"].forEach(hide);
+      const planning = document.getElementById("planning");
+      if(planning) planning.style.display = "block";
+      const planningTab = document.getElementById("tab-planning");
+      if(planningTab) { try{ planningTab.click(); }catch(e){} }
+      try{
+        if(typeof initPlanningCalendar === "function" && !planningCalendar){ initPlanningCalendar(); }
+        if(planningCalendar){ planningCalendar.refetchEvents(); planningCalendar.render(); window.dispatchEvent(new Event("resize")); }
+      }catch(e){}
+    }
+
+    // Nur CV: CP-Buttons ausblenden (falls vorhanden)
+    document.querySelectorAll('[id*="cat-toggle"], .category-toggle, .modal-cat-toggle').forEach(tgl=>{
+      tgl.querySelectorAll("button").forEach(b=>{
+        const v = String(b.dataset.value||"").toUpperCase();
+        if(v === "CP") b.style.display = "none";
+      });
+    });
+  }
+
+  // Vorgesetzter CP: wie Vorgesetzter mit Personal-Zugriff, aber ohne Zähler,
+  // und Report NUR CP (Filter weg + Kopfzeile Gold)
+  if(role === "vorgesetzter_cp"){
+    // Zähler weg
+    hideTab("tab-counter");
+    hide("counter");
+
+    // Personal bleibt sichtbar
+
+    // Report: CP erzwingen + Filter UI ausblenden
+    const rtgl = document.getElementById("report-cat-toggle");
+    if(rtgl){
+      rtgl.querySelectorAll("button").forEach(b=>{
+        const v = String(b.dataset.value||"").toUpperCase();
+        if(v === "CV") b.style.display = "none";
+        if(v === "CP"){ b.classList.add("active"); }
+    // Kategorie-Label im Report entfernen
+    const rptFilter = document.querySelector("#report .filter-card");
+    if(rptFilter){
+      rptFilter.querySelectorAll("label").forEach(l=>{
+        if(String(l.textContent||"").toLowerCase().includes("kategorie")) l.style.display="none";
+      });
+    }
+  });
+      rtgl.style.display = "none";
+    }
+
+    // Falls es ein Select gibt (z.B. report-type), auf CP fixieren und ausblenden
+    const rsel = document.getElementById("report-category") || document.getElementById("report-type");
+    if(rsel){
+      rsel.value = "CP";
+      rsel.style.display = "none";
+      const prev = rsel.previousElementSibling;
+      if(prev && prev.tagName && prev.tagName.toLowerCase()==="label") prev.style.display="none";
+      rsel.addEventListener("change", ()=>{ rsel.value="CP"; });
+    }
+
+    // Kopfzeile Gold im Report erzwingen
+    const forceGold = ()=>{
+      const t = document.querySelector("#report table.user-table");
+      if(t) t.classList.add("gold-headers");
+    };
+    forceGold(); setTimeout(forceGold, 100);
+  }
+})();
+
+/* ✅ Mobile Fix (iOS/Safari):
+   - verhindert "queued/ghost clicks" in overflow scroll containers
+   - sorgt dafür, dass Tabs (Navbar) auf Touch-Geräten sofort reagieren, ohne Doppelauslösung
+*/
+(function(){
+  function closest(el, sel){ return el && el.closest ? el.closest(sel) : null; }
+
+  // Wenn wir per pointerup schon manuell klicken, schlucken wir den danach folgenden "ghost click".
+  let swallowNextNavClick = false;
+
+  // Tabs: sofortiges Umschalten auf Touch-Geräten
+  document.addEventListener('pointerup', function(e){
+    const a = closest(e.target, 'nav a');
+    if(!a) return;
+
+    // Nur für Touch/Pen: dort ist der Ghost-Click am häufigsten
+    const pt = String(e.pointerType || '').toLowerCase();
+    if(pt === 'touch' || pt === 'pen'){
+      swallowNextNavClick = true;
+      try{ e.preventDefault(); }catch(_){}
+      try{ e.stopImmediatePropagation(); }catch(_){}
+      try{ a.click(); }catch(_){}
+    }
+  }, true);
+
+  // Ghost-Click abfangen (kommt oft direkt nach touch/pointerup)
+  document.addEventListener('click', function(e){
+    const a = closest(e.target, 'nav a');
+    if(!a) return;
+    if(swallowNextNavClick){
+      swallowNextNavClick = false;
+      try{ e.preventDefault(); }catch(_){}
+      try{ e.stopImmediatePropagation(); }catch(_){}
+      return;
+    }
+  }, true);
+
+  // Wenn ein Modal offen ist: Hintergrund-Scroll darf keine Taps "klauen"
+  document.addEventListener('touchmove', function(e){
+    const openModal = document.querySelector('.modal[style*="display: flex"], .modal[style*="display:flex"]');
+    if(openModal && !openModal.contains(e.target)){
+      e.preventDefault();
+    }
+  }, {passive:false});
+})();
+
+/* ✅ Mobile fix: move all modals directly under <body> to avoid being clipped by overflow/scroll containers */
+document.addEventListener('DOMContentLoaded', function(){
+  try{
+    document.querySelectorAll('.modal').forEach(function(m){
+      if(m && m.parentElement !== document.body){
+        document.body.appendChild(m);
+      }
+    });
+  }catch(e){}
+});
+
+document.addEventListener("DOMContentLoaded", ()=>{
+  const body = document.body;
+  const toggle = document.getElementById("leadership-nav-toggle");
+  const closeMenu = ()=>body.classList.remove("leadership-menu-open");
+  toggle?.addEventListener("click", event=>{
+    event.stopPropagation();
+    body.classList.toggle("leadership-menu-open");
+  });
+  document.querySelectorAll("nav .left a").forEach(link=>{
+    link.addEventListener("click", ()=>{
+      if(window.matchMedia("(max-width: 900px)").matches) closeMenu();
+    });
+  });
+  document.addEventListener("click", event=>{
+    if(
+      body.classList.contains("leadership-menu-open") &&
+      !event.target.closest("nav") &&
+      !event.target.closest("#leadership-nav-toggle")
+    ) closeMenu();
+  });
+  window.addEventListener("keydown", event=>{
+    if(event.key === "Escape") closeMenu();
+  });
+  let resizeTimer = null;
+  window.addEventListener("resize", ()=>{
+    clearTimeout(resizeTimer);
+    resizeTimer = setTimeout(()=>{
+      try{ if(typeof calendar !== "undefined" && calendar) calendar.updateSize(); }catch(_){}
+      try{ if(typeof planningCalendar !== "undefined" && planningCalendar) planningCalendar.updateSize(); }catch(_){}
+    },100);
+  });
+});
+
+// ✅ Kategorie-Badge bei Firma im Einsatzdetails-Modal setzen
+function setFirmaCategoryBadge(ev){
+  const cat = (ev?.category || "CP").toUpperCase();
+  const badgeClass = cat === "CV" ? "badge badge-cv" : "badge badge-cp";
+  const el = document.getElementById("d-firma-category");
+  if(el){
+    el.innerHTML = `<span class="${badgeClass}">${cat}</span>`;
+  }
+}
+
+async function sendEventMailFromCalendar(){
+  if(!confirm("E-Mail an alle Mitarbeiter senden?")){
+    return;
+  }
+  const res = await fetch("/events/send_mail_all", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({})
+  });
+  const r = await res.json().catch(()=>({}));
+  if(!res.ok || r.error){
+    alert(r.error || "E-Mail konnte nicht gesendet werden");
+    return;
+  }
+  alert("E-Mail wurde an alle Mitarbeiter versendet.");
+}
+
+// ✅ Personal-Reiter automatisch aktualisieren, damit neue Mitarbeiter-Aktivität
+// ohne komplettes Neuladen sichtbar wird.
+(function(){
+  async function refreshPersonalActivityIfVisible(){
+    try{
+      const tab = document.getElementById('user-management');
+      const visible = tab && tab.style.display !== 'none' && getComputedStyle(tab).display !== 'none';
+      const modalOpen = document.querySelector('.modal[style*="display: block"], .modal.show');
+      if(visible && !modalOpen && typeof loadUsers === 'function'){
+        await loadUsers();
+      }
+    }catch(_){ }
+  }
+  setInterval(refreshPersonalActivityIfVisible, 30000);
+  document.addEventListener('visibilitychange', ()=>{ if(!document.hidden) refreshPersonalActivityIfVisible(); });
+})();
@@ -0,0 +1,2550 @@
+    let calendar, currentEventId=null;
+
+    function fmtTime(d){
+      if(!(d instanceof Date) || isNaN(d)) return "-";
+      return d.toLocaleTimeString("de-DE",{hour:"2-digit",minute:"2-digit"});
+    }
+
+    function normTime(t){
+      // erwartet "HH:MM" oder leer
+      const s = String(t || "").trim();
+      const m = s.match(/^(\d{1,2}):(\d{2})$/);
+      if(!m) return "";
+      const hh = String(Math.min(23, Math.max(0, Number(m[1])))).padStart(2,"0");
+      const mm = String(Math.min(59, Math.max(0, Number(m[2])))).padStart(2,"0");
+      return `${hh}:${mm}`;
+    }
+
+    function fmtRate(n){
+      const v = Number(n);
+      if(isNaN(v)) return "-";
+      // de-DE: Komma als Dezimaltrennzeichen
+      const nf = new Intl.NumberFormat("de-DE",{minimumFractionDigits:2, maximumFractionDigits:2});
+      return nf.format(v) + " €/h";
+    }
+
+
+    function fmtDateOnlyDE(dt){
+      const d = new Date(dt);
+      if(isNaN(d)) return "-";
+      const dd = String(d.getDate()).padStart(2,"0");
+      const mm = String(d.getMonth()+1).padStart(2,"0");
+      const yy = String(d.getFullYear());
+      return `${dd}.${mm}.${yy}`;
+    }
+
+    // ✅ Auftraggeber-Map (UI zeigt keine Abkürzungen)
+    function catToAuftraggeber(cat){
+      const c = String(cat || "").toUpperCase();
+      const managed = (typeof managedClients !== 'undefined' ? managedClients : []).find(item=>String(item.code || '').toUpperCase() === c);
+      if(managed) return managed.company_name || c;
+      if(c === "CV") return "Casutt Veranstaltungsservice";
+      if(c === "BS") return "BS";
+      if(c === "HB") return "HB";
+      return "CP-Security-Solutions";
+    }
+
+    function auftraggeberToCat(name){
+      const s = String(name || "").toLowerCase();
+      if(s.includes("casutt")) return "CV";
+      if(s.includes("cp-security")) return "CP";
+      if(s === "bs" || s.includes("bs")) return "BS";
+      if(s === "hb" || s.includes("hb")) return "HB";
+      return "CP";
+    }
+
+
+    // ✅ Kategorie-Buttons (CV/CP) steuern den versteckten Select
+    function syncCatButtons(toggleId, selectId){
+      const toggle = document.getElementById(toggleId);
+      const sel = document.getElementById(selectId);
+      if(!toggle || !sel) return;
+
+      const current = String(sel.value || "CV").toUpperCase();
+      toggle.querySelectorAll("button.cat-btn").forEach(btn=>{
+        const v = String(btn.dataset.value || "").toUpperCase();
+        btn.classList.toggle("active", v === current);
+      });
+    }
+
+    function applyGoldHeaders(){
+  const v = String(document.getElementById("report-category")?.value || "CV").toUpperCase();
+  const tbl = document.querySelector("#report table.user-table");
+  if(tbl){
+    tbl.classList.toggle("gold-headers", v === "CP");
+    tbl.classList.toggle("bs-headers", v === "BS");
+    tbl.classList.toggle("hb-headers", v === "HB");
+  }
+  const cv = String(document.getElementById("counter-category")?.value || "CV").toUpperCase();
+  const ctbl = document.querySelector("#counter table.user-table");
+  if(ctbl){
+    ctbl.classList.toggle("gold-headers", cv === "CP");
+    ctbl.classList.toggle("bs-headers", cv === "BS");
+    ctbl.classList.toggle("hb-headers", cv === "HB");
+  }
+}
+
+    function initCategoryButtons(){
+      const sel = document.getElementById("report-category");
+      const toggle = document.getElementById("report-cat-toggle");
+      if(!sel || !toggle) return;
+
+      toggle.querySelectorAll("button.cat-btn").forEach(btn=>{
+        btn.addEventListener("click", ()=>{
+          const v = String(btn.dataset.value || "CV").toUpperCase();
+          sel.value = v;
+          sel.dispatchEvent(new Event("change"));
+          syncCatButtons("report-cat-toggle","report-category");
+          applyGoldHeaders();
+        });
+      });
+
+      renderReportCustomClientButtons?.();
+      syncCatButtons("report-cat-toggle","report-category");
+      applyGoldHeaders();
+    }
+
+    function renderReportCustomClientButtons(){
+      const sel = document.getElementById("report-category");
+      const toggle = document.getElementById("report-cat-toggle");
+      if(!sel || !toggle || typeof getCustomClients !== "function") return;
+      getCustomClients().forEach(c=>{
+        const val = normalizeClientToken(c.value);
+        if(!sel.querySelector(`option[value="${CSS.escape(val)}"]`)){ const opt=document.createElement('option'); opt.value=val; opt.textContent=c.label||val; sel.appendChild(opt); }
+        if(!toggle.querySelector(`button[data-value="${CSS.escape(val)}"]`)){ const btn=document.createElement('button'); btn.type='button'; btn.className='cat-btn'; btn.dataset.target='report-category'; btn.dataset.value=val; btn.textContent=c.label||val; toggle.appendChild(btn); }
+      });
+      if(typeof injectCustomClientStyles === "function") injectCustomClientStyles();
+    }
+
+
+    // ✅ Historischer Stundensatz pro Einsatz:
+    // Priorität: Override -> gespeicherter Snapshot.
+    // Der Snapshot enthält bereits den effektiv gültigen Satz
+    // (Einsatz-Stundensatz oder Profil-Stundensatz zum damaligen Zeitpunkt).
+    function getMyRate(ev){
+      const me = DASHBOARD_CONTEXT.user;
+      const r = ev.responses?.[me] || null;
+
+      if(r && r.rate_override !== undefined && r.rate_override !== null && String(r.rate_override).trim() !== ""){
+        const ov = Number(r.rate_override);
+        return Number.isFinite(ov) ? ov : null;
+      }
+
+      if(r && r.profile_rate_snapshot !== undefined && r.profile_rate_snapshot !== null && String(r.profile_rate_snapshot).trim() !== ""){
+        const snap = Number(r.profile_rate_snapshot);
+        return Number.isFinite(snap) ? snap : null;
+      }
+
+      // Backend liefert den finalen effektiven Satz: Override > Snapshot > aktueller Einsatz-/Personal-SVS.
+      if(r && r.effective_rate !== undefined && r.effective_rate !== null && String(r.effective_rate).trim() !== ""){
+        const eff = Number(r.effective_rate);
+        return Number.isFinite(eff) ? eff : null;
+      }
+
+      // Kein Snapshot vorhanden = zukünftiger/dynamischer Profil-Satz aus dem Backend.
+      if(ev && ev.my_rate !== undefined && ev.my_rate !== null && String(ev.my_rate).trim() !== ""){
+        const liveRate = Number(ev.my_rate);
+        return Number.isFinite(liveRate) ? liveRate : null;
+      }
+
+      return null;
+    }
+
+    function rateLabel(ev, myResponse){
+      // Wenn Override gesetzt wurde, immer so anzeigen
+      if(myResponse && myResponse.rate_override !== undefined && myResponse.rate_override !== null && String(myResponse.rate_override).trim() !== ""){
+        const ov = Number(myResponse.rate_override);
+        return Number.isFinite(ov) ? fmtRate(ov) : "-";
+      }
+
+      const rate = getMyRate(ev);
+      if(!Number.isFinite(rate)) return "-";
+
+      return fmtRate(rate);
+    }
+
+    // Anzeige im Einsatz-Modal: Hier soll der aktuell am Einsatz gespeicherte SVS stehen.
+    // Historische Snapshots bleiben weiterhin für Report/Meine Termine erhalten.
+    function eventModalRateLabel(ev, myResponse){
+      const useEventRate = Number(ev?.use_event_rate ?? 1) === 1;
+      if(useEventRate && ev?.stundensatz !== undefined && ev?.stundensatz !== null && String(ev.stundensatz).trim() !== ""){
+        const eventRate = Number(ev.stundensatz);
+        return Number.isFinite(eventRate) ? fmtRate(eventRate) : "-";
+      }
+      return rateLabel(ev, myResponse);
+    }
+
+    function formatDateDE(iso){
+  const s = String(iso||"").trim();
+  const m = s.match(/^(\d{4})-(\d{2})-(\d{2})$/);
+  if(!m) return s;
+  return `${m[3]}.${m[2]}.${m[1]}`;
+}
+
+function escapeHtml(value){
+  return String(value ?? "")
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;")
+    .replace(/'/g, "&#039;");
+}
+
+// Für Werte in HTML-Attributen / CSS-Klassen.
+// Wichtig: Diese Funktion wurde von den Startseiten-Kacheln benutzt, fehlte aber bisher.
+// Dadurch brach das Laden mit "escapeAttr is not defined" komplett ab.
+function escapeAttr(value){
+  return String(value ?? "")
+    .toLowerCase()
+    .replace(/ä/g, "ae")
+    .replace(/ö/g, "oe")
+    .replace(/ü/g, "ue")
+    .replace(/ß/g, "ss")
+    .replace(/[^a-z0-9_-]+/g, "-")
+    .replace(/-{2,}/g, "-")
+    .replace(/^-|-$/g, "");
+}
+
+// Fristen robust interpretieren. Bei reinen Datumswerten gilt die Frist bis 23:59:59 Uhr.
+function parseDeadlineCardDate(value){
+  const raw = String(value || '').trim();
+  if(!raw) return null;
+  if(/^\d{4}-\d{2}-\d{2}$/.test(raw)){
+    const d = new Date(raw + 'T23:59:59');
+    return isNaN(d.getTime()) ? null : d;
+  }
+  const d = new Date(raw.replace(' ', 'T'));
+  return isNaN(d.getTime()) ? null : d;
+}
+
+function formatDateTimeBoard(value){
+  const d = new Date(value);
+  if(isNaN(d)) return String(value || "");
+  return d.toLocaleString('de-DE', { dateStyle:'short', timeStyle:'short' });
+}
+
+function applyEmployeeName(fullName){
+  const name = String(fullName || DASHBOARD_CONTEXT.full_name).trim();
+  document.querySelectorAll('.employee-full-name').forEach(el => { el.textContent = name || DASHBOARD_CONTEXT.user; });
+  const input = document.getElementById('consent-name');
+  if(input){ input.value = name || DASHBOARD_CONTEXT.user; }
+}
+
+document.addEventListener("DOMContentLoaded", function() {
+      const today = new Date().toISOString().slice(0,10);
+      const d = document.querySelector("input[type=date]");
+      if(d) d.value = today;
+
+
+      // ✅ Default-Filter: Casutt Veranstaltungsservice
+      const tc = document.getElementById("termine-category");
+      if(tc && (!tc.value)) tc.value = "CV";
+      const rc = document.getElementById("report-category");
+      if(rc && (!rc.value)) rc.value = "CV";
+      if(rc){
+        rc.addEventListener("change", ()=>{ if(typeof loadReport==="function") loadReport(); if(typeof syncCatButtons==="function") syncCatButtons("report-cat-toggle","report-category"); if(typeof applyGoldHeaders==="function") applyGoldHeaders(); });
+      }
+
+      if(typeof initCategoryButtons==="function") initCategoryButtons();
+      // =========================
+      // ✅ DSGVO Einwilligung (Startseite)
+      // =========================
+      const tabs = {
+        home: document.getElementById("tab-home"),
+        cal: document.getElementById("tab-calendar"),
+        ter: document.getElementById("tab-termine"),
+        rep: document.getElementById("tab-report"),
+        card: document.getElementById("tab-id-card"),
+        ctr: document.getElementById("tab-counter"),
+        acc: document.getElementById("tab-accounting"),
+        clients: document.getElementById("tab-clients"),
+        invoices: document.getElementById("tab-invoices"),
+        drv: document.getElementById("tab-driver"),
+      };
+
+      const sections = {
+        home: document.getElementById("home"),
+        cal: document.getElementById("calendar"),
+        ter: document.getElementById("termine"),
+        rep: document.getElementById("report"),
+        card: document.getElementById("id-card"),
+        ctr: document.getElementById("counter"),
+        acc: document.getElementById("accounting"),
+        clients: document.getElementById("clients"),
+        invoices: document.getElementById("invoices"),
+        drv: document.getElementById("driver"),
+      };
+
+      function setActiveTab(which){
+        Object.values(tabs).forEach(a=>a && a.classList.remove("active"));
+        if(tabs[which]) tabs[which].classList.add("active");
+
+        Object.values(sections).forEach(s=>{ if(s) s.style.display="none"; });
+        if(sections[which]) sections[which].style.display="block";
+      }
+
+      function setLocked(isLocked){
+        const locked = !!isLocked;
+
+        // Labels mit Schloss
+        const labels = {
+          cal: "📅 Kalender",
+          ter: "🗓️ Meine Termine",
+          rep: "📊 Report",
+          ctr: "🧮 Zähler",
+          acc: "📒 Buchführung",
+          clients: "🏢 Auftraggeber",
+          invoices: "🧾 Rechnungen",
+          drv: "🚗 Fahrer",
+        };
+
+        ["cal","ter","ctr","acc","clients","invoices","drv"].forEach(k=>{
+          const el = tabs[k];
+          if(!el) return;
+          el.classList.toggle("locked", locked);
+          el.textContent = locked ? ("🔒 " + labels[k]) : labels[k];
+        });
+      }
+
+      async function loadConsent(prefetched){
+        try{
+          const data = prefetched || await (await fetch("/consent_status?ts="+Date.now())).json();
+          const given = !!data.given;
+          applyEmployeeName((data.full_name || DASHBOARD_CONTEXT.full_name).trim());
+
+          // Datum setzen (heute)
+          const dateEl = document.getElementById("consent-date");
+          if(dateEl && !dateEl.value){
+            const now = new Date();
+            const yyyy = now.getFullYear();
+            const mm = String(now.getMonth()+1).padStart(2,"0");
+            const dd = String(now.getDate()).padStart(2,"0");
+            dateEl.value = `${yyyy}-${mm}-${dd}`;
+          }
+
+          // Name vorbelegen (falls vorhanden)
+          const nameEl = document.getElementById("consent-name");
+          if(nameEl && !nameEl.value){
+            nameEl.value = (data.full_name || "").trim();
+          }
+
+          if(given){
+            // Einwilligung steht fest
+            const done = document.getElementById("consent-done");
+            const form = document.getElementById("consent-form");
+            if(form) form.style.display = "none";
+            if(done){
+              done.style.display = "block";
+              done.textContent = `Ich, ${data.name || data.full_name || "Vorname Nachname"}, willige in die Subunternehmervereinbarung einschließlich der Verwendung meiner Daten ein.
+Datum: ${formatDateDE(data.date || "")}.`;
+            }
+            setLocked(false);
+            applyEmployeeName((data.full_name || data.name || DASHBOARD_CONTEXT.full_name).trim());
+          }else{
+            setLocked(true);
+          }
+        }catch(e){
+          // Wenn der Endpoint noch nicht da ist: sicherheitshalber sperren
+          setLocked(true);
+        }
+      }
+
+      function validateConsentForm(){
+        const yes = document.getElementById("consent-yes")?.checked;
+        const name = (document.getElementById("consent-name")?.value || "").trim();
+        const date = new Date().toISOString().slice(0,10);
+        const btn = document.getElementById("consent-save");
+        if(btn) btn.disabled = !(yes && name && date);
+      }
+
+      document.getElementById("consent-yes")?.addEventListener("change", validateConsentForm);
+      document.getElementById("consent-name")?.addEventListener("input", validateConsentForm);
+      document.getElementById("consent-date")?.addEventListener("change", validateConsentForm);
+
+      document.getElementById("consent-save")?.addEventListener("click", async ()=>{
+        const yes = document.getElementById("consent-yes")?.checked;
+        const name = (document.getElementById("consent-name")?.value || "").trim();
+        const date = new Date().toISOString().slice(0,10);
+        if(!yes || !name || !date) return;
+
+        const res = await fetch("/consent", {
+          method:"POST",
+          headers:{ "Content-Type":"application/json" },
+          body: JSON.stringify({ yes:true, name, date })
+        });
+
+        const out = await res.json().catch(()=>({}));
+        if(res.ok && out.status==="ok"){
+          // UI fixieren
+          const done = document.getElementById("consent-done");
+          const form = document.getElementById("consent-form");
+          if(form) form.style.display = "none";
+          if(done){
+            done.style.display = "block";
+            done.textContent = `Ich, ${name}, willige in die Subunternehmervereinbarung einschließlich der Verwendung meiner Daten ein.
+Datum: ${formatDateDE(date)}.`;
+          }
+          setLocked(false);
+        }else{
+          alert(out.error || "Einwilligung konnte nicht gespeichert werden.");
+        }
+      });
+
+      // Starttab immer verfügbar
+      tabs.home?.addEventListener("click", (e)=>{ e.preventDefault(); setActiveTab("home"); if(typeof loadNewEventCards === "function") loadNewEventCards(); });
+      tabs.card?.addEventListener("click", (e)=>{ e.preventDefault(); setActiveTab("card"); window.scrollTo({top:0, behavior:"smooth"}); });
+
+      // Beim Laden: Namen vorbelegen (Einwilligung etc. kommt gesammelt über loadHome)
+      applyEmployeeName(DASHBOARD_CONTEXT.full_name);
+
+      async function loadBoard(prefetched){
+        const list = document.getElementById("board-list");
+        if(!list) return;
+        try{
+          let data = prefetched;
+          if(!data){
+            const res = await fetch("/board?ts="+Date.now());
+            data = await res.json();
+            if(!res.ok){ throw new Error(data.error || "Board konnte nicht geladen werden."); }
+          }
+          if(!Array.isArray(data) || data.length === 0){
+            list.innerHTML = `<div class="board-empty">Aktuell gibt es keine Einträge.</div>`;
+            return;
+          }
+          list.innerHTML = data.map(item => `
+            <div class="board-item">
+              <div class="board-item-head">
+                <strong>${escapeHtml(item.created_by || "Vorgesetzter")}</strong>
+                <span>${escapeHtml(formatDateTimeBoard(item.created_at || ""))}</span>
+              </div>
+              <div class="board-item-text">${escapeHtml(item.content || "")}</div>
+            </div>`).join("");
+        }catch(err){
+          list.innerHTML = `<div class="board-empty">Board konnte nicht geladen werden.</div>`;
+        }
+      }
+
+      // Startseite: Einwilligungen, Board, neue Einsätze und Termine in EINEM Request laden
+      // (wenige Roundtrips für mobile Verbindungen). Fallback: Einzel-Endpunkte wie bisher.
+      async function loadHome(){
+        let home = null;
+        try{
+          const res = await fetch("/api/mitarbeiter/home?ts="+Date.now(), {cache:"no-store"});
+          if(res.ok) home = await res.json();
+        }catch(_){}
+        if(!home){
+          loadConsent();
+          loadCpConsent();
+          loadBoard();
+          if(typeof loadNewEventCards === "function") loadNewEventCards();
+          return;
+        }
+        if(home.termine) window.homeTermine = home.termine;
+        loadConsent(home.consent);
+        loadCpConsent(home.cp_consent);
+        loadBoard(home.board);
+        if(typeof loadNewEventCards === "function") loadNewEventCards(home.new_events || undefined);
+      }
+
+      loadHome();
+
+
+            document.getElementById("tab-calendar").onclick = (e)=>{
+        e.preventDefault();
+        // falls gesperrt, brich ab
+        if(document.getElementById("tab-calendar").classList.contains("locked")) return;
+        setActiveTab("cal");
+        // ✅ Scroll-Position resetten (sonst bleibt man "unten hängen")
+        try{ window.scrollTo({top:0,left:0,behavior:"instant"}); }catch(_){ window.scrollTo(0,0); }
+        // ✅ FullCalendar: nach Einblenden neu berechnen
+        setTimeout(()=>{
+          ensureCalendarVisibleAndLoaded();
+          try{
+            const sc = document.querySelector("#calendar .fc-scroller");
+            if(sc) sc.scrollTop = 0;
+          }catch(e){}
+        }, 0);
+      };
+
+            document.getElementById("tab-termine").onclick = e=>{
+        e.preventDefault();
+        if(document.getElementById("tab-termine").classList.contains("locked")) return;
+        setActiveTab("ter");
+        setEmployeeFiltersToCurrentMonth(true, false);
+        loadTermine();
+      };
+
+            document.getElementById("tab-report").onclick = e=>{
+        e.preventDefault();
+        if(document.getElementById("tab-report").classList.contains("locked")) return;
+        setActiveTab("rep");
+        let now=new Date();
+        const rm = document.getElementById("report-month");
+        const ry = document.getElementById("report-year");
+        if(rm) rm.value = String(now.getMonth()+1);
+        if(ry) ry.value = String(now.getFullYear());
+        updateReportCategoryHeaderColor();
+        loadReport();
+      };
+
+      function updateReportCategoryHeaderColor(){
+        const rep = document.getElementById('report');
+        const cat = String(document.getElementById('report-category')?.value || 'CV').toLowerCase();
+        if(rep){
+          rep.classList.remove('report-cat-cv','report-cat-cp','report-cat-hb','report-cat-bs');
+          rep.classList.add('report-cat-' + cat);
+        }
+      }
+      document.getElementById("report-month")?.addEventListener("change", ()=>{ updateReportCategoryHeaderColor(); loadReport(); updateInvoiceButtonState(); });
+      document.getElementById("report-year")?.addEventListener("change", ()=>{ updateReportCategoryHeaderColor(); loadReport(); updateInvoiceButtonState(); });
+      document.getElementById("report-category")?.addEventListener("change", ()=>{ updateReportCategoryHeaderColor(); });
+      updateReportCategoryHeaderColor();
+
+      document.getElementById("tab-counter")?.addEventListener("click", e=>{
+        e.preventDefault();
+        if(document.getElementById("tab-counter").classList.contains("locked")) return;
+        setActiveTab("ctr");
+        const cy = document.getElementById("counter-year");
+        if(cy && !cy.value) cy.value = String(new Date().getFullYear());
+        loadCounter();
+      });
+
+
+
+      document.getElementById("tab-driver")?.addEventListener("click", e=>{
+        e.preventDefault();
+        if(document.getElementById("tab-driver").classList.contains("locked")) return;
+        setActiveTab("drv");
+        const dd = document.getElementById("driver-duty-date");
+        if(dd && !dd.value) dd.value = new Date().toISOString().slice(0,10);
+        loadDriver();
+      });
+
+      document.getElementById("tab-accounting")?.addEventListener("click", e=>{
+        e.preventDefault();
+        if(document.getElementById("tab-accounting").classList.contains("locked")) return;
+        setActiveTab("acc");
+        const now = new Date();
+        const m = document.getElementById("accounting-month");
+        const y = document.getElementById("accounting-year");
+        if(m && !m.value) m.value = now.getFullYear()+"-"+String(now.getMonth()+1).padStart(2,"0");
+        if(y && !y.value) y.value = String(now.getFullYear());
+        setAccountingFormDatesToSelectedMonth();
+        loadAccounting();
+      });
+
+      document.getElementById("tab-clients")?.addEventListener("click", async e=>{
+        e.preventDefault();
+        if(e.currentTarget.classList.contains("locked")) return;
+        setActiveTab("clients");
+        await loadManagedClients();
+      });
+
+      document.getElementById("tab-invoices")?.addEventListener("click", async e=>{
+        e.preventDefault();
+        if(e.currentTarget.classList.contains("locked")) return;
+        setActiveTab("invoices");
+        const now = new Date();
+        const monthFilter = document.getElementById('invoice-filter-month');
+        const yearFilter = document.getElementById('invoice-filter-year');
+        if(monthFilter) monthFilter.value = String(now.getMonth()+1);
+        if(yearFilter){
+          const currentYear = String(now.getFullYear());
+          if(!yearFilter.querySelector(`option[value="${currentYear}"]`)) yearFilter.insertAdjacentHTML('beforeend', `<option value="${currentYear}">${currentYear}</option>`);
+          yearFilter.value = currentYear;
+        }
+        await loadManagedClients();
+        await loadInvoiceSettings();
+        await loadInvoiceLedger(true);
+      });
+
+      const accExpenseDate = document.getElementById("acc-expense-date");
+      if(accExpenseDate && !accExpenseDate.value) accExpenseDate.value = new Date().toISOString().slice(0,10);
+      const accIncomeDate = document.getElementById("acc-income-date");
+      if(accIncomeDate && !accIncomeDate.value) accIncomeDate.value = new Date().toISOString().slice(0,10);
+
+      // Standard: Startseite
+      setActiveTab("home");
+
+      
+      document.getElementById("report-category").addEventListener("change", ()=>{ loadReport(); updateInvoiceButtonState(); });
+      document.getElementById("counter-year")?.addEventListener("change", loadCounter);
+      document.getElementById("counter-category")?.addEventListener("change", ()=>{ loadCounter(); syncCatButtons("counter-cat-toggle","counter-category"); applyGoldHeaders(); });
+      document.querySelectorAll("#counter-cat-toggle button.cat-btn").forEach(btn=>{
+        btn.addEventListener("click", ()=>{
+          const sel = document.getElementById("counter-category");
+          if(sel){ sel.value = String(btn.dataset.value || "CV").toUpperCase(); sel.dispatchEvent(new Event("change")); }
+        });
+      });
+// Termine: Default Monat/Jahr + Filter-Listener
+      function monthRangeFromParts(year, month){
+        const y = Number(year) || new Date().getFullYear();
+        const m = Number(month) || (new Date().getMonth()+1);
+        const start = `${y}-${String(m).padStart(2,'0')}-01`;
+        const endDate = new Date(y, m, 1);
+        const end = `${endDate.getFullYear()}-${String(endDate.getMonth()+1).padStart(2,'0')}-01`;
+        return {start, end};
+      }
+
+      const nowT = new Date();
+      const currentMonthValue = String(nowT.getMonth()+1);
+      const currentYearValue = String(nowT.getFullYear());
+
+      const tMonth = document.getElementById("termine-month");
+      const tYear  = document.getElementById("termine-year");
+      if(tMonth && tYear){
+        // Beim Öffnen immer aktueller Monat/Jahr vorbelegen.
+        tMonth.value = currentMonthValue;
+        tYear.value  = currentYearValue;
+        tMonth.addEventListener("change", loadTermine);
+        tYear.addEventListener("change", loadTermine);
+      }
+
+      const rMonth = document.getElementById("report-month");
+      const rYear  = document.getElementById("report-year");
+      if(rMonth && rYear){
+        // Report startet ebenfalls immer im aktuellen Monat statt bei Januar.
+        rMonth.value = currentMonthValue;
+        rYear.value  = currentYearValue;
+      }
+
+      calendar = new FullCalendar.Calendar(document.getElementById("calendar"), {
+        initialView: "dayGridMonth",
+        locale: "de",
+        firstDay: 1,
+        ...(DASHBOARD_CONTEXT.amine_enabled ? {
+          customButtons: {
+            yearView: {
+              text: "Jahr",
+              click: function(){
+                try{
+                  calendar.changeView("multiMonthYear");
+                }catch(error){
+                  console.warn("Jahresraster nicht verfügbar, verwende Jahresliste.", error);
+                  calendar.changeView("listYear");
+                }
+              }
+            }
+          },
+          headerToolbar: {
+            left: "title",
+            center: "",
+            right: "dayGridMonth,yearView today prev,next"
+          },
+          buttonText: {
+            today: "Heute",
+            month: "Monat"
+          },
+          multiMonthMaxColumns: 3,
+          height: "auto",
+          contentHeight: "auto",
+          expandRows: false,
+        } : {
+          height: "auto",
+          contentHeight: "auto",
+          expandRows: false,
+        }),
+
+        dayCellClassNames: (arg)=>{
+          const dow = arg.date.getDay();
+          return (dow===0 || dow===6) ? ['weekend'] : [];
+        },
+
+        // Dot-Modus damit die Kreise sichtbar bleiben
+        eventDisplay: "list-item",
+        displayEventTime: true,
+        eventTimeFormat: { hour: "2-digit", minute: "2-digit", hour12: false },
+
+        datesSet: function(){
+          // ✅ Nach Monatswechsel: Größe neu berechnen + Scroller nach oben
+          try{ calendar.updateSize(); }catch(e){}
+          try{
+            const sc = document.querySelector('#calendar .fc-scroller');
+            if(sc) sc.scrollTop = 0;
+          }catch(e){}
+        },
+
+        dateClick: function(arg){
+          if(window.AMINE_BS_ENABLED && typeof openBsCreateModal === "function"){
+            openBsCreateModal(arg.dateStr);
+          }
+        },
+
+        eventClick: function(info) {
+          currentEventId = info.event.extendedProps.id || info.event.id;
+          const ev = info.event.extendedProps || {};
+          const me = DASHBOARD_CONTEXT.user;
+          const myResponse = ev.responses?.[me] || null;
+          editingBsEventData = ev || {};
+          editingBsEventData.title = info.event.title.replace(/\s*\(\d{2}:\d{2}\)\s*$/,'');
+          editingBsEventData.start = info.event.startStr;
+
+          // Kopf/Felder
+          document.getElementById("r-title").textContent = info.event.title || "(ohne Titel)";
+          const _rawCat = String(ev.category || "CP").toUpperCase();
+          const _cat = (_rawCat === "CV" || _rawCat === "HB" || _rawCat === "CP") ? _rawCat : _rawCat;
+          const bsAdminButtons = document.getElementById("bs-admin-buttons");
+          if(bsAdminButtons){
+            bsAdminButtons.style.display = (window.AMINE_BS_ENABLED && String(ev.created_by_username || '') === DASHBOARD_CONTEXT.user) ? "flex" : "none";
+          }
+          const rf = document.getElementById("r-firma"); if(rf) rf.textContent = catToAuftraggeber(_cat);
+          if(typeof setCategoryBadgeM === "function") setCategoryBadgeM(_cat);
+
+          document.getElementById("r-ort").textContent = ev.ort || "-";
+          document.getElementById("r-dienst").textContent = ev.dienstkleidung || "-";
+          document.getElementById("r-auftrag").textContent = ev.auftrag || "-";
+          document.getElementById("r-planned-end").textContent = ev.planned_end_time || "-";
+
+          // Frist
+          const frRaw = String(ev.frist || "").trim();
+          let fristExpired = false;
+          if(frRaw){
+            const fd = new Date(frRaw);
+            document.getElementById("r-frist").textContent = isNaN(fd) ? frRaw : fd.toLocaleString("de-DE");
+            if(!isNaN(fd) && new Date() > fd) fristExpired = true;
+          } else {
+            document.getElementById("r-frist").textContent = "-";
+          }
+
+          // Startanzeige: Chef-Startzeit (response.start_time) hat Priorität
+          const chefStart = normTime(myResponse?.start_time);
+          document.getElementById("r-start").textContent = chefStart || fmtTime(info.event.start);
+
+          // Stundensatz
+          document.getElementById("r-rate").textContent = eventModalRateLabel(ev, myResponse);
+
+          // Remark / Buttons
+          const remarkBlock = document.getElementById("remark-block");
+          const remarkInput = document.getElementById("r-remark");
+          const btnBox = document.getElementById("response-buttons");
+          const btnAgree = document.getElementById("btn-zusagen");
+          const btnWithdraw = document.getElementById("btn-withdraw");
+
+          const status = myResponse?.status || "";
+          const remarkVal = (myResponse?.remark || "").trim();
+          const statusEl = document.getElementById("r-status");
+          if(statusEl) statusEl.textContent = employeeResponseStatusLabel(status);
+
+          const canAct = !fristExpired && status !== "bestätigt";
+          const canAgree = canAct && !status;
+
+          // Remark initial
+          remarkInput.value = remarkVal || "";
+          remarkInput.disabled = !canAgree;
+
+          // Buttons Sichtbarkeit
+          if(!canAct){
+            btnBox.style.display = "none";
+            // Remark nur zeigen, wenn es was gibt (oder wenn bestätigt und Endzeit fehlt etc.)
+            remarkBlock.style.display = remarkVal ? "block" : "none";
+          } else {
+            btnBox.style.display = "flex";
+            remarkBlock.style.display = (canAgree || remarkVal) ? "block" : "none";
+            btnAgree.style.display = canAgree ? "inline-block" : "none";
+            btnWithdraw.style.display = status ? "inline-block" : "none";
+          }
+
+          // Endzeit-Bereich nur wenn bestätigt
+          const section = document.getElementById("endtime-section");
+          const input = document.getElementById("r-endtime");
+          const btn = document.getElementById("btn-endtime");
+          const saved = document.getElementById("saved-endtime");
+
+          const extraSection = document.getElementById("extra-costs-section");
+          if (status === "bestätigt") {
+            section.style.display = "block";
+            if (myResponse?.end_time) {
+              input.style.display = "none";
+              btn.style.display = "none";
+              saved.style.display = "block";
+              saved.textContent = "Gespeicherte Endzeit: " + myResponse.end_time;
+              if(extraSection) extraSection.style.display = "block";
+              renderExtraCostRows(myResponse?.extra_costs || []);
+            } else {
+              input.style.display = "block";
+              btn.style.display = "inline-block";
+              saved.style.display = "none";
+              if(extraSection) extraSection.style.display = "none";
+            }
+          } else {
+            section.style.display = "none";
+            if(extraSection) extraSection.style.display = "none";
+          }
+
+          document.getElementById("respondModal").style.display = "flex";
+          startRespondModalSync();
+        },
+
+        events: async (info, success) => {
+          let res = await fetch(`/events?start=${encodeURIComponent(info.startStr)}&end=${encodeURIComponent(info.endStr)}&lite=1&ts=${Date.now()}`);
+          let events = await res.json();
+
+          // Sichtbarkeit nach Frist:
+// - status==geplant nie zeigen
+// - abgelehnt nie zeigen
+// - wenn Frist vorbei UND Mitarbeiter nichts gemacht hat -> ausblenden
+// - wenn Frist vorbei UND Mitarbeiter abgelehnt hat -> ausblenden
+// - zugesagt/bestätigt bleibt sichtbar
+          const me = DASHBOARD_CONTEXT.user;
+          events = events.filter(e => {
+            const my = e.responses?.[me] || null;
+            const st = String(my?.status || "").trim();
+
+            if (e.status === "geplant") return false;
+
+            // ✅ Chef-Entscheidung: sofort ausblenden
+            if (["abgelehnt_chef","entfernt_chef"].includes(st)) return false;
+
+            const frRaw = String(e.frist || "").trim();
+            let fristExpired = false;
+            if(frRaw){
+              const fd = new Date(frRaw);
+              if(!isNaN(fd) && new Date() > fd) fristExpired = true;
+            }
+
+            // ✅ Mitarbeiter hat selbst abgesagt:
+            // -> bis zur Frist als roter Kreis sichtbar
+            // -> nach Frist automatisch ausblenden
+            if (st === "abgelehnt") {
+              if(!frRaw) return false;        // ohne Frist nicht anzeigen
+              if(fristExpired) return false;  // nach Frist weg
+              return true;                    // vor Frist sichtbar (rot)
+            }
+
+            // Sichtbarkeit nach Frist:
+            // - wenn Frist vorbei UND Mitarbeiter nichts gemacht hat -> ausblenden
+            // - zugesagt/bestätigt bleibt sichtbar
+            if(fristExpired){
+              if(!st) return false;
+            }
+            return true;
+          });
+
+          events.forEach(ev => {
+            let my = ev.responses?.[DASHBOARD_CONTEXT.user];
+
+            // ✅ Für die Kalenderanzeige: Titel + Anfangszeit (inkl. Chef-Anpassung)
+            // Wenn Chef eine Startzeit gesetzt hat, übernehmen wir diese in ev.start,
+            // damit FullCalendar die Uhrzeit korrekt anzeigt.
+            const chefStart = normTime(my?.start_time);
+            if(chefStart){
+              const datePart = String(ev.start || "").slice(0,10);
+              if(/^\d{4}-\d{2}-\d{2}$/.test(datePart)){
+                ev.start = `${datePart}T${chefStart}:00`;
+              }
+            }
+
+            // ✅ Titel im Kalender: immer Titel + Startzeit (für diesen Mitarbeiter)
+            // (berücksichtigt Chef-Startzeit, weil ev.start oben ggf. überschrieben wurde)
+            try{
+              const d0 = new Date(ev.start);
+              if(!isNaN(d0)){
+                const hh = String(d0.getHours()).padStart(2,'0');
+                const mm = String(d0.getMinutes()).padStart(2,'0');
+                const base = String(ev.title || "(ohne Titel)").replace(/\s*\(\d{2}:\d{2}\)\s*$/,"").trim();
+                ev.title = `${base} (${hh}:${mm})`.trim();
+              }
+            } catch(e) {}
+
+            const st = String(my?.status || "").trim();
+
+            // helper: Status -> CSS-Klasse (Umlaute raus)
+            const statusClass = (s)=>{
+              const t = String(s||"").trim().toLowerCase();
+              return "status-" + t
+                .replace(/ä/g,"ae").replace(/ö/g,"oe").replace(/ü/g,"ue").replace(/ß/g,"ss")
+                .replace(/\s+/g,"_");
+            };
+
+            // Farbe + Textfarbe setzen (Dot nutzt currentColor!)
+            if (st === "zugesagt") { ev.color = "#f39c12"; ev.textColor = "#f39c12"; ev.borderColor = "#f39c12"; }
+            if (st === "bestätigt") { ev.color = "#2ecc71"; ev.textColor = "#2ecc71"; ev.borderColor = "#2ecc71"; }
+
+            // ✅ Chef-Ablehnung/Entfernen ebenfalls rot anzeigen, falls sichtbar
+            if (["abgelehnt","abgelehnt_chef","entfernt_chef"].includes(st)) { ev.color = "red"; ev.textColor = "red"; }
+
+            // Statusklasse anhängen, damit CSS (falls genutzt) greifen kann
+            if(st){
+              ev.classNames = (ev.classNames || []).concat([statusClass(st)]);
+            }
+          });
+
+          success(events);
+        }
+      });
+
+      let calendarRendered = false;
+      function ensureCalendarVisibleAndLoaded(){
+        try{
+          if(!calendarRendered){
+            calendar.render();
+            calendarRendered = true;
+          }
+          calendar.updateSize();
+          calendar.refetchEvents();
+        }catch(e){
+          console.error("Kalender konnte nicht geladen werden", e);
+        }
+      }
+
+            document.getElementById("btn-zusagen").onclick = () => sendResponse("zugesagt");
+      document.getElementById("btn-withdraw").onclick = () => withdrawResponse();
+
+      document.getElementById("btn-add-extra-cost")?.addEventListener("click", ()=>addExtraCostRow({label:"Verpflegungspauschale", amount:0}));
+      document.getElementById("btn-save-extra-costs")?.addEventListener("click", saveCurrentExtraCosts);
+
+      document.getElementById("btn-endtime").onclick = async () => {
+        let endtime = document.getElementById("r-endtime").value;
+        if (!endtime) { alert("Bitte Endzeit eintragen!"); return; }
+
+        const res = await fetch("/events/endtime", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ event_id: currentEventId, username: DASHBOARD_CONTEXT.user, end_time: endtime })
+        });
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok || data.error){
+          alert(data.error || "Endzeit konnte nicht gespeichert werden.");
+          return;
+        }
+        await refreshOpenRespondModal();
+        calendar.refetchEvents();
+        if(typeof loadTermine === "function") loadTermine();
+        if(typeof loadReport === "function") loadReport();
+      };
+    });
+
+    let respondModalSyncTimer = null;
+    let respondModalSyncBusy = false;
+
+    function employeeResponseStatusLabel(status){
+      const normalized = String(status || "").trim().toLowerCase();
+      const labels = {
+        "zugesagt": "Zugesagt",
+        "bestätigt": "Bestätigt",
+        "abgelehnt": "Abgesagt",
+        "abgelehnt_chef": "Vom Vorgesetzten abgelehnt",
+        "entfernt_chef": "Aus dem Einsatz entfernt"
+      };
+      return labels[normalized] || "Ausstehend";
+    }
+
+    function applyOpenRespondModalState(ev){
+      if(!ev) return;
+      const me = DASHBOARD_CONTEXT.user;
+      const myResponse = ev.responses?.[me] || null;
+      const status = String(myResponse?.status || "").trim();
+      const statusEl = document.getElementById("r-status");
+      if(statusEl) statusEl.textContent = employeeResponseStatusLabel(status);
+
+      const start = normTime(myResponse?.start_time);
+      const startEl = document.getElementById("r-start");
+      if(startEl) startEl.textContent = start || fmtTime(ev.start);
+      const plannedEndEl = document.getElementById("r-planned-end");
+      if(plannedEndEl) plannedEndEl.textContent = ev.planned_end_time || "-";
+      const rateEl = document.getElementById("r-rate");
+      if(rateEl) rateEl.textContent = eventModalRateLabel(ev, myResponse);
+
+      const frRaw = String(ev.frist || "").trim();
+      const frDate = frRaw ? new Date(frRaw) : null;
+      const fristExpired = !!(frDate && !isNaN(frDate) && new Date() > frDate);
+      const canAct = !fristExpired && status !== "bestätigt";
+      const remarkInput = document.getElementById("r-remark");
+      const remarkBlock = document.getElementById("remark-block");
+      const btnBox = document.getElementById("response-buttons");
+      const btnAgree = document.getElementById("btn-zusagen");
+      const btnWithdraw = document.getElementById("btn-withdraw");
+      if(remarkInput && document.activeElement !== remarkInput){
+        remarkInput.value = String(myResponse?.remark || "").trim();
+      }
+      const canAgree = canAct && !status;
+      if(remarkInput) remarkInput.disabled = !canAgree;
+      if(btnBox) btnBox.style.display = canAct ? "flex" : "none";
+      if(btnAgree) btnAgree.style.display = canAgree ? "inline-block" : "none";
+      if(btnWithdraw) btnWithdraw.style.display = (canAct && status) ? "inline-block" : "none";
+      if(remarkBlock) remarkBlock.style.display = canAgree || String(myResponse?.remark || "").trim() ? "block" : "none";
+
+      const section = document.getElementById("endtime-section");
+      const input = document.getElementById("r-endtime");
+      const btn = document.getElementById("btn-endtime");
+      const saved = document.getElementById("saved-endtime");
+      const extraSection = document.getElementById("extra-costs-section");
+      if(status === "bestätigt"){
+        if(section) section.style.display = "block";
+        if(myResponse?.end_time){
+          if(input) input.style.display = "none";
+          if(btn) btn.style.display = "none";
+          if(saved){
+            saved.style.display = "block";
+            saved.textContent = "Gespeicherte Endzeit: " + myResponse.end_time;
+          }
+          if(extraSection) extraSection.style.display = "block";
+          if(!extraSection || !extraSection.contains(document.activeElement)){
+            renderExtraCostRows(myResponse?.extra_costs || []);
+          }
+        }else{
+          if(input) input.style.display = "block";
+          if(btn) btn.style.display = "inline-block";
+          if(saved) saved.style.display = "none";
+          if(extraSection) extraSection.style.display = "none";
+        }
+      }else{
+        if(section) section.style.display = "none";
+        if(extraSection) extraSection.style.display = "none";
+      }
+    }
+
+    async function refreshOpenRespondModal(){
+      const modal = document.getElementById("respondModal");
+      if(!currentEventId || !modal || modal.style.display !== "flex" || respondModalSyncBusy) return;
+      respondModalSyncBusy = true;
+      try{
+        const res = await fetch(`/events?event_id=${encodeURIComponent(currentEventId)}&ts=${Date.now()}`, {cache:"no-store"});
+        const data = await res.json().catch(()=>[]);
+        if(res.ok && Array.isArray(data) && data[0]) applyOpenRespondModalState(data[0]);
+      }catch(err){
+        console.warn("Einsatzansicht konnte nicht synchronisiert werden", err);
+      }finally{
+        respondModalSyncBusy = false;
+      }
+    }
+
+    function startRespondModalSync(){
+      clearInterval(respondModalSyncTimer);
+      respondModalSyncTimer = setInterval(refreshOpenRespondModal, 3000);
+    }
+
+    window.addEventListener("focus", refreshOpenRespondModal);
+    document.addEventListener("visibilitychange", ()=>{
+      if(document.visibilityState === "visible") refreshOpenRespondModal();
+    });
+
+    function closeRespondModal() {
+      clearInterval(respondModalSyncTimer);
+      respondModalSyncTimer = null;
+      document.getElementById("respondModal").style.display = "none";
+    }
+
+    function applyOptimisticEmployeeResponse(status, remark){
+      if(!calendar || !currentEventId) return;
+      const eventApi = calendar.getEvents().find(item=>String(item.extendedProps?.id || item.id) === String(currentEventId));
+      if(!eventApi) return;
+      const me = DASHBOARD_CONTEXT.user;
+      const responses = {...(eventApi.extendedProps?.responses || {})};
+      if(status){
+        responses[me] = {...(responses[me] || {}), status, remark: remark || ""};
+      }else{
+        delete responses[me];
+      }
+      eventApi.setExtendedProp("responses", responses);
+      const oldClasses = (eventApi.classNames || []).filter(name=>!String(name).startsWith("status-"));
+      if(status) oldClasses.push("status-" + String(status).replace(/ä/g,"ae").replace(/ö/g,"oe").replace(/ü/g,"ue").replace(/ß/g,"ss"));
+      eventApi.setProp("classNames", oldClasses);
+      if(status === "zugesagt"){
+        eventApi.setProp("backgroundColor", "#f39c12");
+        eventApi.setProp("textColor", "#f39c12");
+        eventApi.setProp("borderColor", "#f39c12");
+      }
+      applyOpenRespondModalState({...eventApi.extendedProps, start:eventApi.startStr});
+    }
+
+    async function sendResponse(status) {
+      // ❗ Mitarbeiter dürfen nicht mehr "Absagen" senden.
+      // Nur Zusagen oder Zurückziehen ist erlaubt.
+      if(String(status||"").trim() === "abgelehnt"){
+        alert("Absagen ist nicht möglich. Bitte ziehe deine Reaktion zurück oder kontaktiere den Chef.");
+        return;
+      }
+      let remarkBlock = document.getElementById("remark-block");
+      let remark = remarkBlock.style.display === "none" ? "" : document.getElementById("r-remark").value;
+
+      applyOptimisticEmployeeResponse(status, remark);
+
+      const res = await fetch("/events/respond", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ event_id: currentEventId, response: status, remark })
+      });
+      const r = await res.json().catch(()=>({}));
+      if(!res.ok || r.error){
+        applyOptimisticEmployeeResponse("", "");
+        alert(r.error || "Aktion fehlgeschlagen");
+        if(typeof ensureCalendarVisibleAndLoaded === "function") ensureCalendarVisibleAndLoaded();
+        return;
+      }
+
+      await refreshOpenRespondModal();
+      if(typeof ensureCalendarVisibleAndLoaded === "function") ensureCalendarVisibleAndLoaded();
+    }
+
+    async function withdrawResponse(){
+      const eventApi = calendar?.getEvents().find(item=>String(item.extendedProps?.id || item.id) === String(currentEventId));
+      const previous = eventApi?.extendedProps?.responses?.[DASHBOARD_CONTEXT.user] || null;
+      applyOptimisticEmployeeResponse("", "");
+      const res = await fetch("/events/respond", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ event_id: currentEventId, response: "", remark: "" })
+      });
+      const r = await res.json().catch(()=>({}));
+      if(!res.ok || r.error){
+        if(previous) applyOptimisticEmployeeResponse(previous.status || "zugesagt", previous.remark || "");
+        alert(r.error || "Zurückziehen fehlgeschlagen");
+      }
+
+      await refreshOpenRespondModal();
+      if(typeof ensureCalendarVisibleAndLoaded === "function") ensureCalendarVisibleAndLoaded();
+    }
+
+    
+
+    function formatDateCardDE(value){
+      const d = new Date(value);
+      if(isNaN(d)) return '-';
+      return d.toLocaleDateString('de-DE');
+    }
+    function formatTimeCardDE(value){
+      const d = new Date(value);
+      if(isNaN(d)) return '-';
+      return String(d.getHours()).padStart(2,'0') + ':' + String(d.getMinutes()).padStart(2,'0');
+    }
+    function formatDeadlineCardDE(value){
+      const raw = String(value || '').trim();
+      if(!raw) return 'Keine Frist hinterlegt';
+      const d = parseDeadlineCardDate(raw);
+      if(!d) return raw;
+      return d.toLocaleDateString('de-DE') + ' · ' + String(d.getHours()).padStart(2,'0') + ':' + String(d.getMinutes()).padStart(2,'0') + ' Uhr';
+    }
+
+    async function loadNewEventCards(prefetched){
+      const grid = document.getElementById('new-events-grid');
+      if(!grid) return;
+      try{
+        let data = prefetched;
+        if(!data){
+          const res = await fetch(`/api/mitarbeiter/new_events?limit=50&ts=${Date.now()}`, {cache:'no-store'});
+          data = await res.json().catch(()=>({error:'Antwort konnte nicht gelesen werden.'}));
+          if(!res.ok || data.error) throw new Error(data.error || 'Neue Einsätze konnten nicht geladen werden.');
+        }
+        const now = new Date();
+        const events = (Array.isArray(data) ? data : [])
+          .filter(ev=>{
+            const fr = String(ev.frist || ev.deadline || '').trim();
+            if(!fr) return true;
+            const fd = parseDeadlineCardDate(fr);
+            return !fd || fd >= now;
+          })
+          .sort((a,b)=>{
+            const da = new Date(String(a.start || '').replace(' ', 'T'));
+            const db = new Date(String(b.start || '').replace(' ', 'T'));
+            if(isNaN(da) && isNaN(db)) return 0;
+            if(isNaN(da)) return 1;
+            if(isNaN(db)) return -1;
+            return da - db;
+          });
+        grid.innerHTML = '';
+        if(events.length === 0){
+          grid.innerHTML = '<div class="new-event-empty">Aktuell gibt es keine neuen Einsätze.</div>';
+          return;
+        }
+        events.forEach(ev=>{
+          const cat = String(ev.category || 'CV').toUpperCase();
+          const card = document.createElement('button');
+          card.type = 'button';
+          card.className = 'new-event-card';
+          card.dataset.eventId = ev.id || '';
+          card.dataset.eventStart = ev.start || '';
+          card.innerHTML = `
+            <div class="new-event-cat ${escapeAttr(cat)}">${escapeHtml(cat)}</div>
+            <div class="new-event-title">${escapeHtml(ev.title || '(ohne Titel)')}</div>
+            <div class="new-event-meta">
+              <div>📅 Einsatzdatum: <b>${formatDateCardDE(ev.start)}</b></div>
+              <div>🕒 Uhrzeit: <b>${formatTimeCardDE(ev.start)}${ev.planned_end_time ? ' – ' + escapeHtml(ev.planned_end_time) : ''}</b></div>
+              <div>📍 Standort: <b>${escapeHtml(ev.ort || '-')}</b></div>
+            </div>
+            <div class="new-event-deadline">⏳ Meldefrist: ${escapeHtml(formatDeadlineCardDE(ev.frist || ev.deadline || ''))}</div>`;
+          card.addEventListener('click', (e)=>{
+            e.preventDefault();
+            e.stopPropagation();
+            goToCalendarEvent(card.dataset.eventId, card.dataset.eventStart);
+          });
+          grid.appendChild(card);
+        });
+      }catch(err){
+        grid.innerHTML = `<div class="new-event-empty">Neue Einsätze konnten nicht geladen werden: ${escapeHtml(String(err.message || err))}</div>`;
+      }
+    }
+
+    function goToCalendarEvent(eventId, start){
+      // Den vorhandenen Kalender-Tab-Handler verwenden, damit Rendering,
+      // Größenberechnung und mobile Darstellung zuverlässig ausgeführt werden.
+      const calendarTab = document.getElementById('tab-calendar');
+      if(calendarTab && !calendarTab.classList.contains('locked')){
+        calendarTab.click();
+      }else{
+        setActiveTab('cal');
+        if(typeof ensureCalendarVisibleAndLoaded === 'function') ensureCalendarVisibleAndLoaded();
+      }
+      try{ window.scrollTo({top:0,left:0,behavior:'smooth'}); }catch(_){ window.scrollTo(0,0); }
+      const targetStart = String(start || '').trim();
+      const targetId = String(eventId || '').trim();
+      try{
+        if(typeof ensureCalendarVisibleAndLoaded === 'function') ensureCalendarVisibleAndLoaded();
+        if(calendar && targetStart) calendar.gotoDate(targetStart);
+        if(calendar) calendar.refetchEvents();
+      }catch(_e){}
+
+      // Öffnet nach dem Tab-Wechsel automatisch das Einsatz-Detailfenster.
+      let tries = 0;
+      const timer = setInterval(()=>{
+        tries += 1;
+        try{
+          if(calendar){
+            const ev = targetId ? calendar.getEventById(targetId) : null;
+            if(ev){
+              clearInterval(timer);
+              ev.setProp('borderColor', '#111');
+              ev.setProp('backgroundColor', '#fff7cc');
+              if(typeof calendar.trigger === 'function'){
+                calendar.trigger('eventClick', {event: ev, jsEvent: null, view: calendar.view});
+              }else{
+                // Fallback: wichtigsten Zustand setzen und Detailmodal über vorhandenen Handler öffnen
+                currentEventId = ev.extendedProps?.id || ev.id;
+              }
+              return;
+            }
+            if(tries === 2){
+              try{ calendar.refetchEvents(); }catch(_r){}
+            }
+          }
+        }catch(_e){}
+        if(tries >= 12){
+          clearInterval(timer);
+        }
+      }, 350);
+    }
+
+    // Delegation als zusätzliche Sicherheit, falls Kacheln dynamisch neu gerendert werden.
+    document.getElementById('new-events-grid')?.addEventListener('click', (e)=>{
+      const card = e.target.closest('.new-event-card');
+      if(!card) return;
+      e.preventDefault();
+      goToCalendarEvent(card.dataset.eventId, card.dataset.eventStart);
+    });
+
+    // TERMINE (✅ stabil über eigene Mitarbeiter-API)
+    async function loadTermine(){
+      const list = document.getElementById("termine-list");
+      const countEl = document.getElementById("termine-count");
+      if(list) list.innerHTML = `<tr><td colspan="7">Lade Termine…</td></tr>`;
+      if(countEl) countEl.textContent = "Lade Termine…";
+
+      try{
+        const selMonth = document.getElementById("termine-month");
+        const selYear  = document.getElementById("termine-year");
+        const now = new Date();
+        const month = Number(selMonth?.value || (now.getMonth()+1));
+        const year  = Number(selYear?.value || now.getFullYear());
+
+        // Erster Aufruf im aktuellen Monat: Daten aus /api/mitarbeiter/home wiederverwenden (einmalig).
+        let data = null;
+        const pre = window.homeTermine;
+        window.homeTermine = null;
+        if(pre && Number(pre.year) === year && Number(pre.month) === month){
+          data = pre.entries;
+        }else{
+          const res = await fetch(`/api/mitarbeiter/termine?year=${encodeURIComponent(year)}&month=${encodeURIComponent(month)}&ts=${Date.now()}`);
+          data = await res.json().catch(()=>({error:"Antwort konnte nicht gelesen werden."}));
+          if(!res.ok || data.error) throw new Error(data.error || "Termine konnten nicht geladen werden.");
+        }
+        const entries = Array.isArray(data) ? data : [];
+
+        if(countEl) countEl.textContent = entries.length + (entries.length===1 ? " Termin" : " Termine");
+        if(!list) return;
+        list.innerHTML = "";
+
+        if(entries.length === 0){
+          list.innerHTML = `<tr><td colspan="7">Keine bestätigten Termine in diesem Monat.</td></tr>`;
+          return;
+        }
+
+        entries.forEach(e=>{
+          const tr = document.createElement("tr");
+          const rowCat = String(e.category || "CP").toLowerCase();
+          tr.className = "termine-row-" + rowCat;
+          const client = (typeof managedClients !== 'undefined' ? managedClients : []).find(c=>String(c.code || '').toLowerCase()===rowCat);
+          const clientColor = client?.color || ({cv:'#60a5fa',cp:'#f4c430',hb:'#86efac'}[rowCat] || '#86efac');
+          tr.style.setProperty('--termine-color', clientColor);
+          tr.style.setProperty('--termine-soft', clientColor + '33');
+          tr.innerHTML = `
+            <td>${escapeHtml(e.date || "-")}</td>
+            <td>${escapeHtml(e.title || "-")}</td>
+            <td>${escapeHtml(e.startStr || "-")}</td>
+            <td title="${escapeHtml(e.ort || "-")}">${escapeHtml(e.ort || "-")}</td>
+            <td>${escapeHtml(e.plannedEndStr || "-")}</td>
+            <td>${escapeHtml(e.rateText || "-")}</td>
+            <td>${escapeHtml(e.remark || "-")}</td>
+          `;
+          list.appendChild(tr);
+        });
+      }catch(err){
+        if(countEl) countEl.textContent = "0 Termine";
+        if(list) list.innerHTML = `<tr><td colspan="7">Termine konnten nicht geladen werden: ${String(err.message || err)}</td></tr>`;
+      }
+    }
+
+
+    function parseMoneyInput(v){
+      const n = Number(String(v || '0').replace('€','').replace(/\s/g,'').replace(',', '.'));
+      return Number.isFinite(n) ? n : 0;
+    }
+    function formatMoneyDE(v){ return `${Number(v||0).toFixed(2)} €`; }
+    function extraCostTotal(costs){ return (costs || []).reduce((sum,c)=>sum + parseMoneyInput(c.amount),0); }
+    function renderExtraCostRows(costs){
+      const box = document.getElementById('extra-costs-list');
+      if(!box) return;
+      box.innerHTML = '';
+      (costs || []).forEach(c=>addExtraCostRow(c));
+      updateExtraCostSummary();
+    }
+    function collectExtraCosts(){
+      return Array.from(document.querySelectorAll('#extra-costs-list .extra-cost-row')).map(row=>({
+        id: row.dataset.id || '',
+        label: row.querySelector('.extra-cost-label')?.value || '',
+        description: row.querySelector('.extra-cost-description')?.value || '',
+        amount: parseMoneyInput(row.querySelector('.extra-cost-amount')?.value || '0')
+      })).filter(c=>String(c.label).trim() && Number(c.amount) >= 0);
+    }
+    function addExtraCostRow(cost){
+      const box = document.getElementById('extra-costs-list');
+      if(!box) return;
+      const row = document.createElement('div');
+      row.className = 'extra-cost-row';
+      row.dataset.id = cost?.id || '';
+      const label = cost?.label || 'Verpflegungspauschale';
+      row.innerHTML = `
+        <select class="extra-cost-label">
+          <option value="Verpflegungspauschale">Verpflegungspauschale</option>
+          <option value="Reisezeit">Reisezeit</option>
+          <option value="Sonstiges">Sonstiges</option>
+        </select>
+        <input class="extra-cost-description" type="text" placeholder="Beschreibung optional" value="${String(cost?.description || '').replace(/"/g,'&quot;')}">
+        <input class="extra-cost-amount" type="number" min="0" step="0.01" placeholder="Betrag" value="${Number(cost?.amount || 0).toFixed(2)}">
+        <button type="button" class="bs-action-btn extra-cost-remove">✕</button>
+      `;
+      box.appendChild(row);
+      row.querySelector('.extra-cost-label').value = label;
+      row.querySelector('.extra-cost-remove').onclick = ()=>{ row.remove(); updateExtraCostSummary(); };
+      row.querySelectorAll('input,select').forEach(el=>el.addEventListener('input', updateExtraCostSummary));
+    }
+    function updateExtraCostSummary(){
+      const el = document.getElementById('extra-costs-summary');
+      if(el) el.textContent = `Summe Zusatzkosten: ${formatMoneyDE(extraCostTotal(collectExtraCosts()))}`;
+    }
+    async function saveCurrentExtraCosts(){
+      const res = await fetch('/events/extra_costs', {
+        method:'POST',
+        headers:{'Content-Type':'application/json'},
+        body: JSON.stringify({event_id: currentEventId, extra_costs: collectExtraCosts()})
+      });
+      if(!res.ok){ alert(await res.text()); return; }
+      await refreshOpenRespondModal();
+      if(typeof calendar !== 'undefined' && calendar) calendar.refetchEvents();
+      if(typeof loadReport === 'function') loadReport();
+    }
+
+// CP-Vertrag: separate, dauerhafte Zustimmung nur für Mitarbeiter außer Amine Salah.
+    let cpConsentState = { loaded:false, given:false, required: !window.AMINE_BS_ENABLED };
+
+    function applyCpReportGate(){
+      const cat = String(document.getElementById("report-category")?.value || "CV").toUpperCase();
+      const isCp = cat === "CP";
+      const isCv = cat === "CV";
+      const needsCp = isCp && cpConsentState.required && !cpConsentState.given;
+      const tableWrap = document.getElementById("report-table-wrap");
+      const cpSection = document.getElementById("cp-report-contract-section");
+      const cvSection = document.getElementById("report-contract-section");
+      if(tableWrap) tableWrap.style.display = needsCp ? "none" : "block";
+      if(cpSection) cpSection.style.display = isCp ? "block" : "none";
+      // Der CV-Vertrag gehört ausschließlich zum CV-Report.
+      // HB und weitere eigene Auftraggeber zeigen nur die normale Report-Tabelle.
+      if(cvSection) cvSection.style.display = isCv ? "block" : "none";
+    }
+
+    async function loadCpConsent(prefetched){
+      if(window.AMINE_BS_ENABLED){
+        cpConsentState = {loaded:true, given:true, required:false};
+        applyCpReportGate();
+        return cpConsentState;
+      }
+      try{
+        const data = prefetched || await (await fetch("/cp_consent_status?ts="+Date.now())).json();
+        cpConsentState = {loaded:true, given:!!data.given, required:data.required !== false};
+        const name = String(data.full_name || data.name || DASHBOARD_CONTEXT.full_name).trim();
+        const nameEl = document.getElementById("cp-consent-name");
+        if(nameEl) nameEl.value = name;
+        const dateEl = document.getElementById("cp-consent-date");
+        if(dateEl && !dateEl.value) dateEl.value = new Date().toISOString().slice(0,10);
+        const form = document.getElementById("cp-consent-form");
+        const done = document.getElementById("cp-consent-done");
+        if(cpConsentState.given){
+          if(form) form.style.display="none";
+          if(done){
+            done.style.display="block";
+            done.textContent=`Ich, ${data.name || name}, willige in die CP-Subunternehmervereinbarung einschließlich der Verwendung meiner Daten ein. Datum: ${formatDateDE(data.date || "")}.`;
+          }
+        }else{
+          if(form) form.style.display="block";
+          if(done) done.style.display="none";
+        }
+      }catch(_){
+        cpConsentState = {loaded:true, given:false, required:true};
+      }
+      applyCpReportGate();
+      return cpConsentState;
+    }
+
+    function validateCpConsentForm(){
+      const yes = document.getElementById("cp-consent-yes")?.checked;
+      const name = (document.getElementById("cp-consent-name")?.value || "").trim();
+      const btn = document.getElementById("cp-consent-save");
+      if(btn) btn.disabled = !(yes && name);
+    }
+
+    document.getElementById("cp-consent-yes")?.addEventListener("change", validateCpConsentForm);
+    document.getElementById("cp-consent-save")?.addEventListener("click", async ()=>{
+      const yes = document.getElementById("cp-consent-yes")?.checked;
+      const name = (document.getElementById("cp-consent-name")?.value || "").trim();
+      if(!yes || !name) return;
+      const res = await fetch("/cp_consent", {
+        method:"POST",
+        headers:{"Content-Type":"application/json"},
+        body:JSON.stringify({yes:true})
+      });
+      const out = await res.json().catch(()=>({}));
+      if(!res.ok || out.status !== "ok"){ alert(out.error || "CP-Zustimmung konnte nicht gespeichert werden."); return; }
+      cpConsentState.given = true;
+      const form = document.getElementById("cp-consent-form");
+      const done = document.getElementById("cp-consent-done");
+      if(form) form.style.display="none";
+      if(done){
+        done.style.display="block";
+        done.textContent=`Ich, ${out.name || name}, willige in die CP-Subunternehmervereinbarung einschließlich der Verwendung meiner Daten ein. Datum: ${formatDateDE(out.date || "")}.`;
+      }
+      applyCpReportGate();
+      await loadReport();
+    });
+
+// REPORT (✅ stabil über eigene Mitarbeiter-API)
+    async function loadReport(){
+      const list = document.getElementById("report-list");
+      if(list) list.innerHTML = `<tr><td colspan="9">Lade Report…</td></tr>`;
+
+      let month = document.getElementById("report-month")?.value || "";
+      let yearValue = document.getElementById("report-year")?.value || String(new Date().getFullYear());
+      let catFilter = (document.getElementById("report-category")?.value || "CV");
+      if(String(catFilter).toUpperCase() === "CP" && !cpConsentState.loaded) await loadCpConsent();
+      applyCpReportGate();
+      if(String(catFilter).toUpperCase() === "CP" && cpConsentState.required && !cpConsentState.given){
+        if(list) list.innerHTML = "";
+        return;
+      }
+      if(typeof applyGoldHeaders==="function") applyGoldHeaders();
+      updateInvoiceButtonState();
+
+      // ✅ Rechnungshinweis dynamisch je Auftraggeber
+      const hintEl = document.getElementById("invoice-hint");
+      if(hintEl){
+        const cRaw = String(catFilter || "CV").toUpperCase();
+        const c = cRaw === "HB" ? "HB" : (cRaw === "CV" ? "CV" : (cRaw === "CP" ? "CP" : cRaw));
+        if(c !== "CV" && c !== "CP"){
+          hintEl.style.display = "none";
+          hintEl.innerHTML = "";
+        } else if(c === "CV"){
+          hintEl.innerHTML = `Rechnung per PDF oder E-Rechnung an: kontakt@casutt-veranstaltungsservice.de<br><br>
+Casutt Veranstaltungsservice<br>
+Kevin Casutt<br>
+Dörpfeldstr. 75<br>
+12489 Berlin<br><br>
+Zahlungsziel: 14 Tage.`;
+        } else {
+          hintEl.innerHTML = `Rechnung per PDF oder E-Rechnung an: contact@cp-security-solutions.de<br><br>
+CP-Security-Solutions<br>
+Lucas Pfennig<br>
+Lehnitzstr. 103<br>
+12623 Berlin<br><br>
+Zahlungsziel: 30 Tage.`;
+        }
+        if(c === "CV" || c === "CP") hintEl.style.display = "block";
+      }
+
+      if(!month){
+        if(list) list.innerHTML = `<tr><td colspan="9">Bitte zuerst einen Monat auswählen.</td></tr>`;
+        return;
+      }
+
+      try{
+        const ry = Number(yearValue || new Date().getFullYear());
+        const rm = Number(month || (new Date().getMonth()+1));
+        const res = await fetch(`/api/mitarbeiter/report?year=${encodeURIComponent(ry)}&month=${encodeURIComponent(rm)}&category=${encodeURIComponent(String(catFilter).toUpperCase())}&ts=${Date.now()}`);
+        const data = await res.json().catch(()=>({error:"Antwort konnte nicht gelesen werden."}));
+        if(!res.ok || data.error) throw new Error(data.error || "Report konnte nicht geladen werden.");
+
+        const entries = Array.isArray(data.entries) ? data.entries : [];
+        const totalHours = Number(data.totalHours || 0);
+        const totalEarnings = Number(data.totalEarnings || 0);
+
+        const sh = document.getElementById("report-sum-hours");
+        const se = document.getElementById("report-sum-earnings");
+        if(sh) sh.textContent = totalHours.toFixed(2) + " h";
+        if(se) se.textContent = totalEarnings.toFixed(2) + " €";
+        const summaryHours = document.getElementById("report-summary-hours");
+        const summaryEarnings = document.getElementById("report-summary-earnings");
+        if(summaryHours) summaryHours.textContent = totalHours.toFixed(2) + " h";
+        if(summaryEarnings) summaryEarnings.textContent = totalEarnings.toFixed(2) + " €";
+
+        if(!list) return;
+        list.innerHTML="";
+
+        if(entries.length === 0){
+          list.innerHTML = `<tr><td colspan="9">Keine Report-Daten für diesen Monat und diese Kategorie.</td></tr>`;
+          return;
+        }
+
+        entries.forEach(e=>{
+          let tr=document.createElement("tr");
+          const privateCat = String(e.cat || '').toUpperCase();
+          // HB verwendet denselben klaren Report-Aufbau wie CV und CP.
+          // Bearbeitungsaktionen bleiben ausschließlich für eigene Sonder-Auftraggeber.
+          const isBs = !['CP','CV','BS','HB'].includes(privateCat) && window.AMINE_BS_ENABLED;
+          const rateCell = isBs
+            ? `<input class="bs-rate-input" type="number" min="0" step="0.01" value="${Number(e.rate || 0).toFixed(2)}" data-event-id="${e.id}"> <button class="bs-action-btn" onclick="saveBsRate('${e.id}')">💾</button>`
+            : (e.rateText || '-');
+          const titleCell = isBs
+            ? `${e.title || '-'}<br><button class="bs-action-btn" onclick="duplicateBsEvent('${e.id}')">⧉ Duplizieren</button><button class="bs-action-btn" onclick="deleteBsEvent('${e.id}')">🗑 Löschen</button>`
+            : (e.title || '-');
+          const extraRows = Array.isArray(e.extra_costs) ? e.extra_costs : [];
+          tr.innerHTML=`
+            <td>${e.date || '-'}</td>
+            <td>${titleCell}</td>
+            <td>${e.startStr || '-'}</td>
+            <td class="col-planned-end">${e.plannedEnd || '-'}</td>
+            <td>${e.endStr || '-'}</td>
+            <td>${Number(e.hours || 0).toFixed(2)}</td>
+            <td>${rateCell}</td>
+            <td>${Number(e.extrasTotal || 0) ? extraRows.map(c=>`${c.label}: ${Number(c.amount||0).toFixed(2)} €`).join('<br>') : '-'}</td>
+            <td class="earnings-bold">${Number(e.earnings || 0).toFixed(2)} €</td>
+          `;
+          list.appendChild(tr);
+        });
+      }catch(err){
+        const sh = document.getElementById("report-sum-hours");
+        const se = document.getElementById("report-sum-earnings");
+        if(sh) sh.textContent = "0.00 h";
+        if(se) se.textContent = "0.00 €";
+        const summaryHours = document.getElementById("report-summary-hours");
+        const summaryEarnings = document.getElementById("report-summary-earnings");
+        if(summaryHours) summaryHours.textContent = "0.00 h";
+        if(summaryEarnings) summaryEarnings.textContent = "0.00 €";
+        if(list) list.innerHTML = `<tr><td colspan="9">Report konnte nicht geladen werden: ${String(err.message || err)}</td></tr>`;
+      }
+    }
+
+
+    function updateInvoiceButtonState(){
+      const btnCv = document.getElementById("btn-create-invoice-cv");
+      const btnCp = document.getElementById("btn-create-invoice-cp");
+      const btnHb = document.getElementById("btn-create-invoice-hb");
+      const status = document.getElementById("invoice-status");
+      const month = document.getElementById("report-month")?.value || "";
+      const yearValue = document.getElementById("report-year")?.value || String(new Date().getFullYear());
+      const enabled = !!month && !!yearValue;
+      if(btnCv) btnCv.disabled = !enabled;
+      if(btnCp) btnCp.disabled = !enabled;
+      if(btnHb) btnHb.disabled = !enabled;
+      const selectedCategory = String(document.getElementById("report-category")?.value || "CV").toUpperCase();
+      if(btnCv) btnCv.style.display = selectedCategory === "CV" ? "inline-block" : "none";
+      if(btnCp) btnCp.style.display = selectedCategory === "CP" ? "inline-block" : "none";
+      if(btnHb) btnHb.style.display = selectedCategory === "HB" ? "inline-block" : "none";
+      if(status){
+        status.textContent = "";
+      }
+    }
+
+    async function createInvoiceForCategory(category){
+      const rawCategory = String(category || "CV").toUpperCase();
+      const normalizedCategory = rawCategory === "CP" ? "CP" : (rawCategory === "HB" ? "HB" : "CV");
+      const btnCv = document.getElementById("btn-create-invoice-cv");
+      const btnCp = document.getElementById("btn-create-invoice-cp");
+      const btnHb = document.getElementById("btn-create-invoice-hb");
+      const activeBtn = normalizedCategory === "CP" ? btnCp : (normalizedCategory === "HB" ? btnHb : btnCv);
+      const status = document.getElementById("invoice-status");
+      const month = document.getElementById("report-month")?.value || "";
+      const yearValue = document.getElementById("report-year")?.value || String(new Date().getFullYear());
+      if(!month || !yearValue){
+        if(status) status.textContent = "Bitte zuerst Monat und Jahr auswählen.";
+        updateInvoiceButtonState();
+        return;
+      }
+      const invoiceMonthParam = `${yearValue}-${String(month).padStart(2,"0")}`;
+
+      const invoiceNumber = window.prompt(`Welche Rechnungsnummer soll für ${normalizedCategory} verwendet werden?`, "");
+      if(invoiceNumber === null){
+        if(status) status.textContent = "Rechnungserstellung abgebrochen.";
+        updateInvoiceButtonState();
+        return;
+      }
+      const cleanedInvoiceNumber = String(invoiceNumber || "").trim();
+      if(!cleanedInvoiceNumber){
+        if(status) status.textContent = "Bitte eine gültige Rechnungsnummer eingeben.";
+        updateInvoiceButtonState();
+        return;
+      }
+      try{
+        if(btnCv) btnCv.disabled = true;
+        if(btnCp) btnCp.disabled = true;
+        if(btnHb) btnHb.disabled = true;
+        if(status) status.textContent = `Rechnung ${normalizedCategory} wird erstellt...`;
+        await downloadExportJob("invoice_pdf", {
+          month: invoiceMonthParam,
+          category: normalizedCategory,
+          invoice_number: cleanedInvoiceNumber
+        }, (progress)=>{
+          if(status) status.textContent = `Rechnung ${normalizedCategory} wird erstellt … ${progress} %`;
+        });
+        if(status) status.textContent = `Rechnung ${normalizedCategory} (${cleanedInvoiceNumber}) für ${month} wurde erstellt.`;
+      }catch(err){
+        if(status) status.textContent = err.message || "Rechnung konnte nicht erstellt werden.";
+      }finally{
+        if(activeBtn) activeBtn.blur();
+        updateInvoiceButtonState();
+      }
+    }
+
+
+    function eur(v){
+      const n = Number(v || 0);
+      return new Intl.NumberFormat("de-DE",{minimumFractionDigits:2, maximumFractionDigits:2}).format(n) + " €";
+    }
+
+    function accountingPeriodParams(){
+      const view = document.getElementById("accounting-view")?.value || "month";
+      const monthVal = document.getElementById("accounting-month")?.value || "";
+      const yearVal = document.getElementById("accounting-year")?.value || new Date().getFullYear();
+      let year = Number(yearVal) || new Date().getFullYear();
+      let month = new Date().getMonth()+1;
+      if(monthVal && monthVal.includes("-")){
+        const parts = monthVal.split("-");
+        year = Number(parts[0]) || year;
+        month = Number(parts[1]) || month;
+      }
+      return {view, year, month};
+    }
+
+    function accountingSelectedMonthDate(){
+      const {year, month} = accountingPeriodParams();
+      return `${year}-${String(month).padStart(2,"0")}-01`;
+    }
+
+    function setAccountingFormDatesToSelectedMonth(){
+      const selectedDate = accountingSelectedMonthDate();
+      const incomeDate = document.getElementById("acc-income-date");
+      if(incomeDate) incomeDate.value = selectedDate;
+      const expenseDate = document.getElementById("acc-expense-date");
+      if(expenseDate && !expenseDate.value) expenseDate.value = selectedDate;
+    }
+
+    function resetAccountingIncomeFormToSelectedMonth(form){
+      if(form) form.reset();
+      const incomeDate = document.getElementById("acc-income-date");
+      if(incomeDate) incomeDate.value = accountingSelectedMonthDate();
+    }
+
+    function renderAccountingTotals(totals){
+      document.getElementById("acc-total-revenues").textContent = eur(totals?.revenues);
+      const automaticRevCard = document.getElementById("acc-total-automatic-revenues");
+      if(automaticRevCard) automaticRevCard.textContent = eur(totals?.automatic_revenues);
+      const manualRevCard = document.getElementById("acc-total-manual-revenues");
+      if(manualRevCard) manualRevCard.textContent = eur(totals?.manual_revenues);
+      document.getElementById("acc-total-expenses").textContent = eur(totals?.expenses);
+      document.getElementById("acc-total-travel").textContent = eur(totals?.travel);
+      const mealCard = document.getElementById("acc-total-meal");
+      if(mealCard) mealCard.textContent = eur(totals?.meal_allowance);
+      document.getElementById("acc-total-profit").textContent = eur(totals?.profit);
+    }
+
+    async function loadAccounting(){
+      const box = document.getElementById("accounting");
+      if(!box) return;
+      const status = document.getElementById("accounting-status");
+      const {view, year, month} = accountingPeriodParams();
+      const summaryUrl = `/accounting/summary?view=${encodeURIComponent(view)}&year=${encodeURIComponent(year)}&month=${encodeURIComponent(month)}`;
+      try{
+        if(status) status.textContent = "Lade Buchführung...";
+        if(view === "year"){
+          // Jahressummen kommen schnell aus dem Monats-Rollup; die Einzelposten laden danach.
+          const totalsRes = await fetch(`${summaryUrl}&totals=1&ts=${Date.now()}`);
+          const totalsData = await totalsRes.json().catch(()=>({}));
+          if(totalsRes.ok) renderAccountingTotals(totalsData.totals);
+        }
+        const res = await fetch(`${summaryUrl}&ts=${Date.now()}`);
+        const data = await res.json();
+        if(!res.ok) throw new Error(data.error || "Buchführung konnte nicht geladen werden.");
+
+        renderAccountingTotals(data.totals);
+
+        if(data.settings){
+        }
+
+        const revList = document.getElementById("accounting-revenue-list");
+        if(revList){
+          revList.innerHTML = (data.revenues || []).map(e=>`
+            <tr>
+              <td>${escapeHtml(formatDateDE(e.date || ""))}</td>
+              <td>${escapeHtml(e.category || "")}</td>
+              <td>${escapeHtml(e.title || "")}</td>
+              <td>${escapeHtml(e.ort || "")}</td>
+              <td>${Number(e.hours || 0).toFixed(2)}</td>
+              <td>${eur(e.rate || 0).replace(" €"," €/h")}</td>
+              <td class="earnings-bold">${eur(e.amount || 0)}</td>
+              <td>${Number(e.meal_allowance || 0) > 0 ? eur(e.meal_allowance) : "-"}</td>
+            </tr>`).join("") || `<tr><td colspan="8">Keine Einnahmen im Zeitraum.</td></tr>`;
+        }
+
+        const manualRevList = document.getElementById("accounting-manual-revenue-list");
+        if(manualRevList){
+          manualRevList.innerHTML = (data.manual_revenues || []).map(e=>`
+            <tr>
+              <td>${escapeHtml(formatDateDE(e.date || ""))}</td>
+              <td class="accounting-text-left">${escapeHtml(e.description || "")}</td>
+              <td class="earnings-bold">${eur(e.amount || 0)}</td>
+              <td><button type="button" class="accounting-delete" onclick="deleteAccountingManualRevenue('${String(e.id).replace(/'/g,"\\'")}')">Löschen</button></td>
+            </tr>`).join("") || `<tr><td colspan="4">Keine zusätzlichen Einnahmen gespeichert.</td></tr>`;
+        }
+
+        const travelByEvent = {};
+        (data.travel || []).forEach(t=>{ travelByEvent[t.event_id] = t; });
+        const travelList = document.getElementById("accounting-travel-list");
+        if(travelList){
+          travelList.innerHTML = (data.revenues || []).map(e=>{
+            const t = travelByEvent[e.event_id] || {};
+            const km = Number(t.km_total || 0);
+            const cost = km * 0.30;
+            return `<tr>
+              <td>${escapeHtml(formatDateDE(e.date || ""))}</td>
+              <td>${escapeHtml(e.category || "")}</td>
+              <td>${escapeHtml(e.title || "")}</td>
+              <td>${escapeHtml(e.ort || "")}</td>
+              <td><input type="number" min="0" step="0.1" value="${km ? km.toFixed(1) : ""}" data-acc-km-event="${escapeHtml(e.event_id)}" style="width:90px;"></td>
+              <td>${eur(cost)}</td>
+              <td><button type="button" class="accounting-save" onclick="saveAccountingTravel('${String(e.event_id).replace(/'/g,"\\'")}')">💾 speichern</button></td>
+            </tr>`;
+          }).join("") || `<tr><td colspan="7">Keine bestätigten Einsätze im Zeitraum.</td></tr>`;
+        }
+
+        const expList = document.getElementById("accounting-expense-list");
+        if(expList){
+          expList.innerHTML = (data.expenses || []).map(e=>`
+            <tr>
+              <td>${escapeHtml(formatDateDE(e.date || ""))}</td>
+              <td>${escapeHtml(e.category || "")}</td>
+              <td>${escapeHtml(e.description || "")}</td>
+              <td>${eur(e.amount || 0)}</td>
+              <td>${e.receipt_url ? `<a href="${escapeHtml(e.receipt_url)}" target="_blank" rel="noopener">${e.receipt_thumb ? `<img src="${escapeHtml(e.receipt_url)}?thumb=1" alt="" loading="lazy" style="max-width:48px;max-height:48px;vertical-align:middle;margin-right:6px;">` : "📄 "}${escapeHtml(e.receipt_name || "Beleg")}</a>` : (e.has_receipt ? "✅ " + escapeHtml(e.receipt_name || "Beleg") : "-")}</td>
+              <td><button type="button" class="accounting-delete" onclick="deleteAccountingExpense('${String(e.id).replace(/'/g,"\\'")}')">Löschen</button></td>
+            </tr>`).join("") || `<tr><td colspan="6">Noch keine externen Ausgaben gespeichert.</td></tr>`;
+        }
+        if(status) status.textContent = "Aktuell.";
+      }catch(err){
+        if(status) status.textContent = err.message || "Fehler beim Laden.";
+      }
+    }
+
+    // Einstellungen/Pauschalen wurden vollständig entfernt.
+
+    // Automatische km-€-Berechnung bleibt aktiv: km gesamt × 0,30 €.
+
+    async function saveAccountingTravel(eventId){
+      const input = document.querySelector(`[data-acc-km-event="${CSS.escape(eventId)}"]`);
+      const status = document.getElementById("accounting-status");
+      try{
+        const res = await fetch("/accounting/travel", {method:"POST", headers:{"Content-Type":"application/json"}, body:JSON.stringify({event_id:eventId, km_total: input?.value || 0})});
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok) throw new Error(data.error || "Fahrtkosten konnten nicht gespeichert werden.");
+        if(status) status.textContent = "Fahrtkosten gespeichert.";
+        loadAccounting();
+      }catch(err){ if(status) status.textContent = err.message; }
+    }
+
+    async function deleteAccountingManualRevenue(id){
+      if(!confirm("Diese zusätzliche Einnahme wirklich löschen?")) return;
+      const status = document.getElementById("accounting-status");
+      try{
+        const res = await fetch(`/accounting/manual_revenues/${encodeURIComponent(id)}`, {method:"DELETE"});
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok) throw new Error(data.error || "Einnahme konnte nicht gelöscht werden.");
+        if(status) status.textContent = "Einnahme gelöscht.";
+        loadAccounting();
+      }catch(err){ if(status) status.textContent = err.message; }
+    }
+
+    async function deleteAccountingExpense(id){
+      if(!confirm("Diese Ausgabe wirklich löschen?")) return;
+      const status = document.getElementById("accounting-status");
+      try{
+        const res = await fetch(`/accounting/expenses/${encodeURIComponent(id)}`, {method:"DELETE"});
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok) throw new Error(data.error || "Ausgabe konnte nicht gelöscht werden.");
+        if(status) status.textContent = "Ausgabe gelöscht.";
+        loadAccounting();
+      }catch(err){ if(status) status.textContent = err.message; }
+    }
+
+    async function exportAccountingPdf(){
+      const {view, year, month} = accountingPeriodParams();
+      const status = document.getElementById("accounting-status");
+      try{
+        if(status) status.textContent = "PDF wird erstellt …";
+        await downloadExportJob("accounting_pdf", {view, year, month}, (progress)=>{
+          if(status) status.textContent = `PDF wird erstellt … ${progress} %`;
+        });
+        if(status) status.textContent = "PDF fertig.";
+      }catch(err){ if(status) status.textContent = err.message; }
+    }
+
+    function exportAccountingCsv(){
+      const {view, year, month} = accountingPeriodParams();
+      window.location.href = `/accounting/export_csv?view=${encodeURIComponent(view)}&year=${encodeURIComponent(year)}&month=${encodeURIComponent(month)}&ts=${Date.now()}`;
+    }
+
+    async function exportAccountingTaxBundle(){
+      const {view, year, month} = accountingPeriodParams();
+      const status = document.getElementById("accounting-status");
+      try{
+        const fd = new FormData();
+        fd.append("view", view); fd.append("year", year); fd.append("month", month);
+        const res = await fetch("/accounting/tax_bundle", {method:"POST", body: fd});
+        let data = await res.json().catch(()=>({}));
+        if(!res.ok) throw new Error(data.error || "Steuer-Paket konnte nicht erstellt werden.");
+        if(data.download_url){ window.location.href = data.download_url; return; }
+        // Großes Paket: läuft als Export-Job, Status abfragen bis fertig.
+        data = await waitExportJob(data, (progress)=>{
+          if(status) status.textContent = `Steuer-Paket wird erstellt … ${progress} %`;
+        });
+        if(status) status.textContent = "Steuer-Paket fertig.";
+        window.location.href = data.download_url;
+      }catch(err){ if(status) status.textContent = err.message; }
+    }
+
+    document.getElementById("btn-accounting-refresh")?.addEventListener("click", loadAccounting);
+    document.getElementById("btn-accounting-pdf")?.addEventListener("click", exportAccountingPdf);
+    document.getElementById("btn-accounting-csv")?.addEventListener("click", exportAccountingCsv);
+    document.getElementById("btn-accounting-zip")?.addEventListener("click", exportAccountingTaxBundle);
+    document.getElementById("accounting-view")?.addEventListener("change", ()=>{ setAccountingFormDatesToSelectedMonth(); loadAccounting(); });
+    document.getElementById("accounting-month")?.addEventListener("change", ()=>{ setAccountingFormDatesToSelectedMonth(); loadAccounting(); });
+    document.getElementById("accounting-year")?.addEventListener("change", ()=>{ setAccountingFormDatesToSelectedMonth(); loadAccounting(); });
+    document.getElementById("accounting-income-form")?.addEventListener("submit", async (e)=>{
+      e.preventDefault();
+      const status = document.getElementById("accounting-status");
+      try{
+        const fd = new FormData(e.currentTarget);
+        const res = await fetch("/accounting/manual_revenues", {method:"POST", body: fd});
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok) throw new Error(data.error || "Einnahme konnte nicht gespeichert werden.");
+        resetAccountingIncomeFormToSelectedMonth(e.currentTarget);
+        if(status) status.textContent = "Einnahme gespeichert.";
+        loadAccounting();
+      }catch(err){ if(status) status.textContent = err.message; }
+    });
+
+    document.getElementById("accounting-expense-form")?.addEventListener("submit", async (e)=>{
+      e.preventDefault();
+      const status = document.getElementById("accounting-status");
+      try{
+        const fd = new FormData(e.currentTarget);
+        const res = await fetch("/accounting/expenses", {method:"POST", body: fd});
+        const data = await res.json().catch(()=>({}));
+        if(!res.ok) throw new Error(data.error || "Ausgabe konnte nicht gespeichert werden.");
+        e.currentTarget.reset();
+        const d = document.getElementById("acc-expense-date");
+        if(d) d.value = accountingSelectedMonthDate();
+        const incomeD = document.getElementById("acc-income-date");
+        if(incomeD && !incomeD.value) incomeD.value = accountingSelectedMonthDate();
+        if(status) status.textContent = "Ausgabe gespeichert.";
+        loadAccounting();
+      }catch(err){ if(status) status.textContent = err.message; }
+    });
+
+    document.getElementById("btn-create-invoice-cv")?.addEventListener("click", ()=>createInvoiceForCategory("CV"));
+    document.getElementById("btn-create-invoice-cp")?.addEventListener("click", ()=>createInvoiceForCategory("CP"));
+    document.getElementById("btn-create-invoice-hb")?.addEventListener("click", ()=>createInvoiceForCategory("HB"));
+    updateInvoiceButtonState();
+  
+
+window.AMINE_BS_ENABLED = document.getElementById('bsCreateModal') !== null;
+var editingBsEventId = null;
+var editingBsEventData = null;
+
+function normalizeClientToken(name){
+  const raw = String(name || '').trim();
+  if(!raw) return 'PRIVAT';
+  const up = raw.toUpperCase();
+  if(up === 'BS') return 'PRIVAT';
+  return up.replace(/[^A-ZÄÖÜ0-9_-]+/g, '_').replace(/^_+|_+$/g, '').slice(0,32) || 'PRIVAT';
+}
+var managedClients = [];
+var managedClientsLoadedAt = 0;
+function getCustomClients(){
+  return managedClients.filter(c=>c.is_active).map(c=>({
+    id:c.id, label:c.company_name, value:c.code, color:c.color, email:c.email,
+    contact_name:c.contact_name, street:c.street, zip_city:c.zip_city
+  }));
+}
+function saveCustomClients(){ /* Auftraggeber werden serverseitig gespeichert. */ }
+function injectCustomClientStyles(){
+  let style = document.getElementById('custom-client-styles');
+  if(!style){ style = document.createElement('style'); style.id = 'custom-client-styles'; document.head.appendChild(style); }
+  style.textContent = getCustomClients().map(c=>{
+    const token = normalizeClientToken(c.value).toLowerCase();
+    const color = /^#[0-9a-f]{6}$/i.test(c.color || '') ? c.color : '#e5e7eb';
+    return `#calendar .cat-${token}{background-color:${color}!important;border-color:${color}!important;} .badge-${token}, .cat-btn[data-value="${c.value}"]{background:${color}!important;border-color:${color}!important;color:#111!important;}`;
+  }).join('\n');
+}
+function renderCustomClientButtons(){
+  const sel = document.getElementById('bs-category');
+  const toggle = document.getElementById('bs-create-cat-toggle');
+  const listEl = document.getElementById('custom-client-list');
+  if(!sel || !toggle) return;
+
+  // Alle auswählbaren Auftraggeber kommen aus der zentralen Verwaltung.
+  sel.querySelectorAll('option[data-custom-client="1"]').forEach(el=>el.remove());
+  toggle.querySelectorAll('button[data-custom-client="1"]').forEach(el=>el.remove());
+  if(listEl) listEl.innerHTML = '';
+
+  getCustomClients().forEach(c=>{
+    const val = normalizeClientToken(c.value);
+    const label = c.label || val;
+    const opt = document.createElement('option');
+    opt.value = val; opt.textContent = label; opt.dataset.customClient = '1';
+    sel.appendChild(opt);
+
+    const btn = document.createElement('button');
+    btn.type = 'button'; btn.className = 'cat-btn'; btn.dataset.target = 'bs-category'; btn.dataset.value = val; btn.dataset.customClient = '1'; btn.textContent = label;
+    toggle.appendChild(btn);
+
+    if(listEl){
+      const item = document.createElement('span');
+      item.className = 'custom-client-item';
+      item.innerHTML = `<span>${escapeHtml(label)}</span> <button type="button" class="custom-client-remove" data-remove-client="${escapeHtml(val)}">🗑️ Entfernen</button>`;
+      listEl.appendChild(item);
+    }
+  });
+  injectCustomClientStyles();
+}
+function removeCustomClient(){ /* Deaktivierung erfolgt im Auftraggeber-Reiter. */ }
+function updateBsModalCategoryUI(){
+  const cat = normalizeClientToken(document.getElementById('bs-category')?.value || 'HB');
+  const titleEl = document.getElementById('bs-modal-title');
+  const titleInput = document.getElementById('bs-title');
+  if(titleEl && !editingBsEventId){
+    titleEl.innerHTML = `${cat}-Einsatz anlegen <span class="badge badge-${cat.toLowerCase()}">${cat}</span>`;
+  }
+  if(titleInput && (!titleInput.value || titleInput.value === 'BS' || titleInput.value === 'HB' || titleInput.value === 'PRIVAT')){
+    titleInput.value = cat;
+  }
+}
+(function initBsCategoryButtons(){
+  const sel = document.getElementById('bs-category');
+  const toggle = document.getElementById('bs-create-cat-toggle');
+  if(!sel || !toggle) return;
+  renderCustomClientButtons();
+  toggle.addEventListener('click', (ev)=>{
+    const btn = ev.target.closest('button.cat-btn');
+    if(!btn) return;
+    const v = normalizeClientToken(btn.dataset.value || 'HB');
+    sel.value = v;
+    syncCatButtons('bs-create-cat-toggle','bs-category');
+    updateBsModalCategoryUI();
+  });
+
+  syncCatButtons('bs-create-cat-toggle','bs-category');
+  updateBsModalCategoryUI();
+  if(typeof renderReportCustomClientButtons === 'function') renderReportCustomClientButtons();
+})();
+
+async function loadManagedClients(force=false){
+  if(!window.AMINE_BS_ENABLED) return [];
+  if(!force && managedClients.length && Date.now()-managedClientsLoadedAt < 30000){
+    renderManagedClientGrid();renderCustomClientButtons();renderReportCustomClientButtons();populateInvoiceClientSelect();return managedClients;
+  }
+  const res = await fetch('/clients?ts='+Date.now(), {cache:'no-store'});
+  const data = await res.json().catch(()=>[]);
+  if(!res.ok){ throw new Error(data.error || 'Auftraggeber konnten nicht geladen werden.'); }
+  managedClients = Array.isArray(data) ? data : [];
+  managedClientsLoadedAt = Date.now();
+  renderManagedClientGrid();
+  renderCustomClientButtons();
+  renderReportCustomClientButtons();
+  populateInvoiceClientSelect();
+  const sel = document.getElementById('bs-category');
+  if(sel && !sel.value && sel.options.length) sel.value = sel.options[0].value;
+  syncCatButtons('bs-create-cat-toggle','bs-category');
+  updateBsModalCategoryUI();
+  return managedClients;
+}
+
+function renderManagedClientGrid(){
+  const grid = document.getElementById('client-grid');
+  if(!grid) return;
+  if(!managedClients.length){ grid.innerHTML='<div class="business-empty">Noch keine Auftraggeber vorhanden.</div>'; return; }
+  grid.innerHTML = managedClients.map(c=>`<article class="client-card ${c.is_active?'':'inactive'}" style="--client-color:${escapeAttr(c.color || '#dbeafe')}">
+    <div class="client-card-head"><span class="client-code">${escapeHtml(c.code)}</span><strong>${c.is_active?'Aktiv':'Deaktiviert'}</strong></div>
+    <h3>${escapeHtml(c.company_name)}</h3>
+    <div class="client-meta"><span>👤 ${escapeHtml(c.contact_name || 'Kein Ansprechpartner')}</span><span>✉️ ${escapeHtml(c.email || 'Keine E-Mail')}</span><span>📍 ${escapeHtml([c.street,c.zip_city].filter(Boolean).join(', ') || 'Keine Adresse')}</span></div>
+    <div class="client-card-actions"><button type="button" data-edit-client="${escapeAttr(c.id)}">Bearbeiten</button><button type="button" class="toggle-active" data-toggle-client="${escapeAttr(c.id)}">${c.is_active?'Deaktivieren':'Aktivieren'}</button></div>
+  </article>`).join('');
+}
+
+function populateInvoiceClientSelect(){
+  const sel=document.getElementById('invoice-overview-client'); if(!sel) return;
+  const old=sel.value;
+  sel.innerHTML='<option value="">Alle Auftraggeber</option>'+managedClients.map(c=>`<option value="${escapeAttr(c.code)}">${escapeHtml(c.company_name)} (${escapeHtml(c.code)})${c.is_active?'':' – deaktiviert'}</option>`).join('');
+  if([...sel.options].some(o=>o.value===old)) sel.value=old;
+}
+
+function openClientForm(client){
+  document.getElementById('client-form').style.display='block';
+  document.getElementById('client-id').value=client?.id || '';
+  document.getElementById('client-company').value=client?.company_name || '';
+  document.getElementById('client-code').value=client?.code || '';
+  document.getElementById('client-contact').value=client?.contact_name || '';
+  document.getElementById('client-email').value=client?.email || '';
+  document.getElementById('client-street').value=client?.street || '';
+  document.getElementById('client-zip-city').value=client?.zip_city || '';
+  document.getElementById('client-color').value=client?.color || '#86efac';
+  document.getElementById('client-active').checked=client ? !!client.is_active : true;
+  document.getElementById('client-company').focus();
+}
+
+function closeClientForm(){ document.getElementById('client-form').style.display='none'; document.getElementById('client-form').reset(); document.getElementById('client-id').value=''; }
+
+async function saveManagedClient(e){
+  e.preventDefault(); const id=document.getElementById('client-id').value;
+  const payload={company_name:document.getElementById('client-company').value,code:document.getElementById('client-code').value,contact_name:document.getElementById('client-contact').value,email:document.getElementById('client-email').value,street:document.getElementById('client-street').value,zip_city:document.getElementById('client-zip-city').value,color:document.getElementById('client-color').value,is_active:document.getElementById('client-active').checked};
+  const res=await fetch(id?'/clients/'+encodeURIComponent(id):'/clients',{method:id?'PUT':'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(payload)});
+  const data=await res.json().catch(()=>({})); if(!res.ok){ document.getElementById('client-status').textContent=data.error || 'Speichern fehlgeschlagen.'; return; }
+  closeClientForm(); await loadManagedClients(true);
+}
+
+async function toggleManagedClient(id){
+  const c=managedClients.find(x=>x.id===id); if(!c) return;
+  const res=await fetch('/clients/'+encodeURIComponent(id),{method:'PUT',headers:{'Content-Type':'application/json'},body:JSON.stringify({...c,is_active:!c.is_active})});
+  const data=await res.json().catch(()=>({})); if(!res.ok){ alert(data.error || 'Änderung fehlgeschlagen.'); return; } await loadManagedClients(true);
+}
+
+var invoiceLedgerRows=[];
+var invoiceLedgerBlobs={};
+function eur(v){return new Intl.NumberFormat('de-DE',{style:'currency',currency:'EUR'}).format(Number(v)||0);}
+function invoiceMonthName(m){return ['','Januar','Februar','März','April','Mai','Juni','Juli','August','September','Oktober','November','Dezember'][Number(m)]||m;}
+function invoiceDownloadName(inv){return `Rechnung-${invoiceMonthName(inv.invoice_month)}-${inv.invoice_year}-${inv.client_code}.pdf`;}
+async function loadInvoiceSettings(){
+  const res=await fetch('/invoice-settings',{cache:'no-store'}),data=await res.json().catch(()=>({}));
+  if(!res.ok)return;
+  const fields={company_name:'invoice-own-company',full_name:'invoice-own-name',email:'invoice-own-email',street:'invoice-own-street',zip_city:'invoice-own-zip-city',phone:'invoice-own-phone',tax_number:'invoice-own-tax',tax_office:'invoice-own-tax-office',bank_name:'invoice-own-bank',iban:'invoice-own-iban',bic:'invoice-own-bic'};
+  Object.entries(fields).forEach(([key,id])=>{const el=document.getElementById(id);if(el)el.value=data[key]||'';});
+}
+async function saveInvoiceSettings(event){
+  event.preventDefault();const status=document.getElementById('invoice-settings-status');status.textContent='Rechnungsdaten werden gespeichert …';
+  const payload={company_name:document.getElementById('invoice-own-company').value,full_name:document.getElementById('invoice-own-name').value,email:document.getElementById('invoice-own-email').value,street:document.getElementById('invoice-own-street').value,zip_city:document.getElementById('invoice-own-zip-city').value,phone:document.getElementById('invoice-own-phone').value,tax_number:document.getElementById('invoice-own-tax').value,tax_office:document.getElementById('invoice-own-tax-office').value,bank_name:document.getElementById('invoice-own-bank').value,iban:document.getElementById('invoice-own-iban').value,bic:document.getElementById('invoice-own-bic').value};
+  const res=await fetch('/invoice-settings',{method:'PUT',headers:{'Content-Type':'application/json'},body:JSON.stringify(payload)}),data=await res.json().catch(()=>({}));
+  status.textContent=res.ok?'Rechnungsdaten wurden gespeichert.':(data.error||'Speichern fehlgeschlagen.');
+  if(res.ok)invoiceLedgerBlobs={};
+}
+async function loadInvoiceLedger(sync=false){
+  const status=document.getElementById('invoice-overview-status'), year=document.getElementById('invoice-filter-year')?.value||'', month=document.getElementById('invoice-filter-month')?.value||'', client=document.getElementById('invoice-overview-client')?.value||'', state=document.getElementById('invoice-filter-status')?.value||'';
+  if(status) status.textContent='Rechnungsbuch wird synchronisiert …';
+  const q=new URLSearchParams(); if(sync)q.set('sync','1');if(year)q.set('year',year);if(month)q.set('month',month);if(client)q.set('client',client);if(state)q.set('status',state);
+  const res=await fetch('/invoices?'+q.toString(),{cache:'no-store'}), data=await res.json().catch(()=>[]);
+  if(!res.ok){if(status)status.textContent=data.error||'Rechnungen konnten nicht geladen werden.';return;}
+  invoiceLedgerRows=Array.isArray(data)?data:[]; renderInvoiceLedger(); if(status)status.textContent='';
+  const years=[...new Set(invoiceLedgerRows.map(x=>x.invoice_year))].sort((a,b)=>b-a), ys=document.getElementById('invoice-filter-year');
+  if(ys){const old=ys.value;ys.innerHTML='<option value="">Alle Jahre</option>'+years.map(y=>`<option value="${y}">${y}</option>`).join('');ys.value=old;}
+}
+function renderInvoiceLedger(){
+  const grid=document.getElementById('invoice-ledger-grid');if(!grid)return;
+  const total=invoiceLedgerRows.reduce((s,x)=>s+Number(x.total_amount||0),0),open=invoiceLedgerRows.filter(x=>x.status!=='bezahlt').reduce((s,x)=>s+Number(x.total_amount||0),0);
+  document.getElementById('invoice-stat-count').textContent=invoiceLedgerRows.length;document.getElementById('invoice-stat-total').textContent=eur(total);document.getElementById('invoice-stat-open').textContent=eur(open);
+  if(!invoiceLedgerRows.length){grid.innerHTML='<div class="business-empty">Für diese Filter wurden noch keine abgeschlossenen Einsätze gefunden.</div>';return;}
+  grid.innerHTML=invoiceLedgerRows.map(i=>`<article class="invoice-ledger-card ${i.client_complete?'':'warn'}">
+    <div class="invoice-ledger-top"><span>${invoiceMonthName(i.invoice_month)} ${i.invoice_year}</span><span class="invoice-status ${escapeAttr(i.status)}">${escapeHtml(i.status)}</span></div>
+    <h3>${escapeHtml(i.company_name)}</h3><div class="invoice-number-editor"><input aria-label="Rechnungsnummer" value="${escapeAttr(i.invoice_number)}" data-invoice-number="${escapeAttr(i.id)}"><button type="button" data-invoice-action="save-number" data-id="${escapeAttr(i.id)}">Speichern</button></div><div class="invoice-ledger-amount">${eur(i.total_amount)}</div>
+    <div class="invoice-ledger-meta"><span>Auftraggeber: ${escapeHtml(i.client_code)}</span><span>${i.sent_at?'Versendet: '+escapeHtml(i.sent_at):'Noch nicht versendet'}</span></div>
+    ${i.client_complete?'':'<div class="invoice-data-warning">⚠ Rechnungsdaten unvollständig – bitte Auftraggeber bearbeiten.</div>'}
+    <div class="invoice-ledger-actions"><button data-invoice-action="open" data-id="${escapeAttr(i.id)}">PDF ansehen</button><button data-invoice-action="download" data-id="${escapeAttr(i.id)}">Herunterladen</button><button class="send" data-invoice-action="send" data-id="${escapeAttr(i.id)}" ${i.client_complete?'':'disabled'}>Versenden</button>${i.status!=='bezahlt'?`<button class="paid" data-invoice-action="paid" data-id="${escapeAttr(i.id)}">Als bezahlt markieren</button>`:''}</div>
+  </article>`).join('');
+}
+async function getInvoiceLedgerBlob(inv){
+  if(invoiceLedgerBlobs[inv.id])return invoiceLedgerBlobs[inv.id];
+  const period=`${inv.invoice_year}-${String(inv.invoice_month).padStart(2,'0')}`;
+  const res=await fetch(`/invoice/current_user?month=${period}&category=${encodeURIComponent(inv.client_code)}&invoice_number=${encodeURIComponent(inv.invoice_number)}`);
+  if(!res.ok){const d=await res.json().catch(()=>({}));throw new Error(d.error||'PDF konnte nicht erstellt werden.');}
+  return invoiceLedgerBlobs[inv.id]=await res.blob();
+}
+async function invoiceLedgerAction(action,id){
+  const inv=invoiceLedgerRows.find(x=>x.id===id),status=document.getElementById('invoice-overview-status');if(!inv)return;
+  try{
+    if(action==='open'){status.textContent='PDF wird vorbereitet …';const blob=await getInvoiceLedgerBlob(inv),url=URL.createObjectURL(blob);window.open(url,'_blank');setTimeout(()=>URL.revokeObjectURL(url),60000);status.textContent='';}
+    if(action==='download'){status.textContent='PDF wird vorbereitet …';const blob=await getInvoiceLedgerBlob(inv),url=URL.createObjectURL(blob),a=document.createElement('a');a.href=url;a.download=invoiceDownloadName(inv);document.body.appendChild(a);a.click();a.remove();URL.revokeObjectURL(url);status.textContent='Rechnung wurde heruntergeladen.';}
+    if(action==='save-number'){const input=document.querySelector(`[data-invoice-number="${CSS.escape(id)}"]`),number=String(input?.value||'').trim();if(!number)throw new Error('Bitte eine Rechnungsnummer eintragen.');const res=await fetch('/invoices/'+encodeURIComponent(id),{method:'PUT',headers:{'Content-Type':'application/json'},body:JSON.stringify({invoice_number:number})}),d=await res.json().catch(()=>({}));if(!res.ok)throw new Error(d.error||'Rechnungsnummer konnte nicht gespeichert werden.');delete invoiceLedgerBlobs[id];status.textContent='Rechnungsnummer wurde gespeichert.';await loadInvoiceLedger();}
+    if(action==='send'){if(!confirm(`Rechnung ${inv.invoice_number} jetzt an ${inv.client_email} senden?`))return;status.textContent='Rechnung wird versendet …';const blob=await getInvoiceLedgerBlob(inv),fd=new FormData(),period=`${inv.invoice_year}-${String(inv.invoice_month).padStart(2,'0')}`;fd.append('invoice_id',inv.id);fd.append('month',period);fd.append('category',inv.client_code);fd.append('invoice_number',inv.invoice_number);fd.append('invoice',blob,`${inv.invoice_number}.pdf`);const res=await fetch('/invoice/current_user/send',{method:'POST',body:fd}),d=await res.json().catch(()=>({}));if(!res.ok)throw new Error(d.error||'Versand fehlgeschlagen.');status.textContent=`Versendet an ${d.email}.`;await loadInvoiceLedger();}
+    if(action==='paid'){const res=await fetch('/invoices/'+encodeURIComponent(id),{method:'PUT',headers:{'Content-Type':'application/json'},body:JSON.stringify({status:'bezahlt'})}),d=await res.json().catch(()=>({}));if(!res.ok)throw new Error(d.error||'Status konnte nicht geändert werden.');await loadInvoiceLedger();}
+  }catch(e){status.textContent=e.message;}
+}
+
+function updateInvoiceOverviewSummary(){
+  const code=document.getElementById('invoice-overview-client')?.value; const month=document.getElementById('invoice-overview-month')?.value;
+  const c=managedClients.find(x=>x.code===code); const el=document.getElementById('invoice-overview-summary'); if(!el) return;
+  el.innerHTML=c?`<b>${escapeHtml(c.company_name)}</b><br>${escapeHtml(c.contact_name || '')}<br>${escapeHtml([c.street,c.zip_city].filter(Boolean).join(', '))}<br><br>Abrechnungsmonat: <b>${escapeHtml(month || '-')}</b>`:'Bitte einen Auftraggeber auswählen.';
+}
+
+var lastInvoiceOverviewBlob = null;
+async function createInvoiceFromOverview(){
+  const month=document.getElementById('invoice-overview-month').value, category=document.getElementById('invoice-overview-client').value, number=document.getElementById('invoice-overview-number').value.trim(), status=document.getElementById('invoice-overview-status');
+  if(!month || !category || !number){ status.textContent='Bitte Monat, Auftraggeber und Rechnungsnummer angeben.'; return; }
+  status.textContent='Rechnung wird erstellt …';
+  const res=await fetch(`/invoice/current_user?month=${encodeURIComponent(month)}&category=${encodeURIComponent(category)}&invoice_number=${encodeURIComponent(number)}`);
+  if(!res.ok){ const d=await res.json().catch(()=>({})); status.textContent=d.error || 'Rechnung konnte nicht erstellt werden.'; return; }
+  const blob=await res.blob(); lastInvoiceOverviewBlob=blob; const [year,monthNumber]=month.split('-'); const url=URL.createObjectURL(blob), a=document.createElement('a'); a.href=url; a.download=`Rechnung-${invoiceMonthName(monthNumber)}-${year}-${category}.pdf`; a.click(); URL.revokeObjectURL(url); document.getElementById('btn-invoice-overview-send').disabled=false; status.textContent='Rechnung wurde erstellt und kann jetzt versendet werden.';
+}
+
+async function sendInvoiceFromOverview(){
+  const month=document.getElementById('invoice-overview-month').value, category=document.getElementById('invoice-overview-client').value, number=document.getElementById('invoice-overview-number').value.trim(), status=document.getElementById('invoice-overview-status');
+  if(!lastInvoiceOverviewBlob){ status.textContent='Bitte zuerst die aktuelle PDF erstellen.'; return; }
+  if(!confirm('Rechnung jetzt an die hinterlegte E-Mail-Adresse versenden?')) return;
+  const fd=new FormData(); fd.append('month',month); fd.append('category',category); fd.append('invoice_number',number); fd.append('invoice',lastInvoiceOverviewBlob,`Rechnung_${number}_${category}.pdf`); status.textContent='Rechnung wird versendet …';
+  const res=await fetch('/invoice/current_user/send',{method:'POST',body:fd}); const data=await res.json().catch(()=>({})); status.textContent=res.ok?`Rechnung wurde an ${data.email} versendet.`:(data.error || 'Versand fehlgeschlagen.');
+}
+
+document.getElementById('btn-new-client')?.addEventListener('click',()=>openClientForm(null));
+document.getElementById('btn-cancel-client')?.addEventListener('click',closeClientForm);
+document.getElementById('client-form')?.addEventListener('submit',saveManagedClient);
+document.getElementById('client-grid')?.addEventListener('click',e=>{ const edit=e.target.closest('[data-edit-client]'), toggle=e.target.closest('[data-toggle-client]'); if(edit) openClientForm(managedClients.find(c=>c.id===edit.dataset.editClient)); if(toggle) toggleManagedClient(toggle.dataset.toggleClient); });
+document.getElementById('invoice-overview-client')?.addEventListener('change',updateInvoiceOverviewSummary);
+document.getElementById('invoice-overview-month')?.addEventListener('change',updateInvoiceOverviewSummary);
+document.getElementById('btn-invoice-overview-create')?.addEventListener('click',createInvoiceFromOverview);
+document.getElementById('btn-invoice-overview-send')?.addEventListener('click',sendInvoiceFromOverview);
+['invoice-filter-year','invoice-filter-month','invoice-overview-client','invoice-filter-status'].forEach(id=>document.getElementById(id)?.addEventListener('change',loadInvoiceLedger));
+document.getElementById('btn-invoice-refresh')?.addEventListener('click',()=>loadInvoiceLedger(true));
+document.getElementById('invoice-ledger-grid')?.addEventListener('click',e=>{const btn=e.target.closest('[data-invoice-action]');if(btn)invoiceLedgerAction(btn.dataset.invoiceAction,btn.dataset.id);});
+document.getElementById('invoice-settings-form')?.addEventListener('submit',saveInvoiceSettings);
+loadManagedClients().catch(()=>{});
+
+function toLocalDateTimeValue(dateStr){
+  const d = dateStr ? new Date(dateStr) : new Date();
+  if(isNaN(d)) return "";
+  const yyyy=d.getFullYear(), mm=String(d.getMonth()+1).padStart(2,'0'), dd=String(d.getDate()).padStart(2,'0');
+  const hh=String(d.getHours()).padStart(2,'0'), mi=String(d.getMinutes()).padStart(2,'0');
+  return `${yyyy}-${mm}-${dd}T${hh}:${mi}`;
+}
+function openBsCreateModal(dateStr){
+  resetBsModalToCreate();
+  const m=document.getElementById('bsCreateModal'); if(!m) return;
+  const titleEl = document.getElementById('bs-title');
+  const startEl = document.getElementById('bs-start');
+  const plannedEl = document.getElementById('bs-planned-end');
+  const ortEl = document.getElementById('bs-ort');
+  const dienstEl = document.getElementById('bs-dienst');
+  const auftragEl = document.getElementById('bs-auftrag');
+  const rateEl = document.getElementById('bs-stundensatz');
+  const catSel = document.getElementById('bs-category');
+  if(catSel && !catSel.value && catSel.options.length) catSel.value=catSel.options[0].value;
+  syncCatButtons('bs-create-cat-toggle','bs-category');
+  updateBsModalCategoryUI();
+  if(titleEl) titleEl.value='';
+  if(startEl) startEl.value=toLocalDateTimeValue(dateStr);
+  if(plannedEl) plannedEl.value='';
+  if(ortEl) ortEl.value='';
+  if(dienstEl) dienstEl.value='';
+  if(auftragEl) auftragEl.value='';
+  if(rateEl) rateEl.value='';
+  m.style.display='flex';
+}
+function closeBsCreateModal(){ const m=document.getElementById('bsCreateModal'); if(m) m.style.display='none'; }
+
+function setBsModalMode(mode){
+  const modalTitle = document.getElementById('bs-modal-title');
+  if(!modalTitle) return;
+  if(mode === 'edit'){
+    const editCat = normalizeClientToken(editingBsEventData.category || 'HB');
+    document.getElementById('bs-category').value = editCat;
+    syncCatButtons('bs-create-cat-toggle','bs-category');
+    updateBsModalCategoryUI();
+    modalTitle.innerHTML = `${editCat}-Einsatz bearbeiten <span class="badge badge-${editCat.toLowerCase()}">${editCat}</span>`;
+  }else{
+    updateBsModalCategoryUI();
+    const createCat = String(document.getElementById('bs-category')?.value || 'BS').toUpperCase();
+    modalTitle.innerHTML = `${createCat}-Einsatz anlegen <span class="badge badge-${createCat.toLowerCase()}">${createCat}</span>`;
+  }
+}
+
+function openBsEditFromCurrent(){
+  if(!currentEventId || !editingBsEventData){
+    alert('Dieser Einsatz konnte nicht geladen werden.');
+    return;
+  }
+
+  editingBsEventId = currentEventId;
+  setBsModalMode('edit');
+
+  document.getElementById('bs-title').value = editingBsEventData.title || String(document.getElementById('bs-category')?.value || 'BS');
+  document.getElementById('bs-start').value = String(editingBsEventData.start || '').slice(0,16);
+  document.getElementById('bs-planned-end').value = editingBsEventData.planned_end_time || '';
+  document.getElementById('bs-ort').value = editingBsEventData.ort || '';
+  document.getElementById('bs-dienst').value = editingBsEventData.dienstkleidung || '';
+  document.getElementById('bs-stundensatz').value = editingBsEventData.stundensatz || '';
+  document.getElementById('bs-auftrag').value = editingBsEventData.auftraggeber || editingBsEventData.auftrag || '';
+
+  closeRespondModal();
+  const m = document.getElementById('bsCreateModal');
+  if(m) m.style.display = 'flex';
+}
+
+function resetBsModalToCreate(){
+  editingBsEventId = null;
+  editingBsEventData = null;
+  setBsModalMode('create');
+}
+
+async function saveBsEvent(){
+  const start = document.getElementById('bs-start')?.value || '';
+  if(!start){ alert('Bitte Start eintragen.'); return; }
+
+  const stundensatz = String(document.getElementById('bs-stundensatz')?.value || '').trim();
+  if(!stundensatz){ alert('Bitte Stundensatz eintragen.'); return; }
+  const selectedPrivateCategory = normalizeClientToken(document.getElementById('bs-category')?.value || 'HB');
+
+  const payload = {
+    title: document.getElementById('bs-title')?.value || selectedPrivateCategory,
+    start: start,
+    planned_end_time: document.getElementById('bs-planned-end')?.value || '',
+    ort: document.getElementById('bs-ort')?.value || '',
+    dienstkleidung: document.getElementById('bs-dienst')?.value || '',
+    auftraggeber: selectedPrivateCategory,
+    category: selectedPrivateCategory,
+    status: 'offen',
+    required_staff: 1,
+    use_event_rate: 1,
+    stundensatz: stundensatz
+  };
+
+  let url = '/events';
+  if(editingBsEventId){
+    url = '/events/update';
+    payload.event_id = editingBsEventId;
+  }
+
+  const res = await fetch(url,{
+    method:'POST',
+    headers:{'Content-Type':'application/json'},
+    body:JSON.stringify(payload)
+  });
+
+  const data = await res.json().catch(()=>({}));
+  if(!res.ok || data.error){
+    alert(data.error || 'Einsatz konnte nicht gespeichert werden.');
+    return;
+  }
+
+  closeBsCreateModal();
+  resetBsModalToCreate();
+
+  if(typeof calendar !== 'undefined' && calendar){
+    calendar.refetchEvents();
+  }
+  if(typeof ensureCalendarVisibleAndLoaded === 'function') ensureCalendarVisibleAndLoaded();
+  if(typeof loadTermine === 'function') await loadTermine();
+  if(typeof loadReport === 'function') await loadReport();
+  if(typeof loadCounter === 'function') await loadCounter();
+}
+async function loadCounter(){
+  const year=Number(document.getElementById('counter-year')?.value || new Date().getFullYear());
+  const cat=String(document.getElementById('counter-category')?.value || 'CV').toUpperCase();
+  syncCatButtons('counter-cat-toggle','counter-category'); applyGoldHeaders();
+  const res=await fetch(`/events?start=${encodeURIComponent(year+'-01-01')}&end=${encodeURIComponent((year+1)+'-01-01')}&lite=1&ts=${Date.now()}`);
+  const events=await res.json();
+  const me = DASHBOARD_CONTEXT.user;
+  const months=Array(12).fill(0);
+  (Array.isArray(events)?events:[]).forEach(ev=>{
+    const r=ev.responses?.[me];
+    if(!r || r.status !== 'bestätigt') return;
+    const evCat=String(ev.category || 'CP').toUpperCase();
+    if(evCat !== cat) return;
+    let start=new Date(ev.start);
+    if(r.start_time){ const [sh,sm]=String(r.start_time).split(':').map(Number); if(Number.isFinite(sh)&&Number.isFinite(sm)) start.setHours(sh,sm,0,0); }
+    if(start.getFullYear() !== year) return;
+    months[start.getMonth()] += 1;
+  });
+  const total=months.reduce((a,b)=>a+b,0);
+  const name=DASHBOARD_CONTEXT.full_name;
+  const list=document.getElementById('counter-list'); if(!list) return;
+  list.innerHTML=`<tr><td>${name}</td>${months.map(v=>`<td>${v ? v : '-'}</td>`).join('')}<td><b>${total}</b></td></tr>`;
+}
+
+async function saveBsRate(eventId){
+  const inp = document.querySelector(`.bs-rate-input[data-event-id="${eventId}"]`);
+  const rate = String(inp?.value || '').trim();
+  if(!rate){ alert('Bitte Stundensatz eintragen.'); return; }
+  const res = await fetch('/events/edit_entry', {
+    method:'POST', headers:{'Content-Type':'application/json'},
+    body: JSON.stringify({event_id:eventId, rate_override:rate})
+  });
+  const data = await res.json().catch(()=>({}));
+  if(!res.ok || data.error){ alert(data.error || 'Stundensatz konnte nicht gespeichert werden.'); return; }
+  await loadReport();
+}
+async function deleteBsEvent(eventId){
+  if(!confirm('Auftrag wirklich löschen?')) return;
+  const res = await fetch('/events/'+encodeURIComponent(eventId), {method:'DELETE'});
+  const data = await res.json().catch(()=>({}));
+  if(!res.ok || data.error){ alert(data.error || 'Auftrag konnte nicht gelöscht werden.'); return; }
+  if(typeof calendar !== 'undefined' && calendar) calendar.refetchEvents();
+  await loadReport();
+  await loadCounter();
+}
+async function duplicateBsEvent(eventId){
+  const date = prompt('Datum für Duplikat eingeben (JJJJ-MM-TT). Leer lassen = gleicher Start.','');
+  if(date === null) return;
+  const payload = {event_id:eventId};
+  if(String(date || '').trim()) payload.dates = [String(date).trim()];
+  const res = await fetch('/events/duplicate', {
+    method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify(payload)
+  });
+  const data = await res.json().catch(()=>({}));
+  if(!res.ok || data.error){ alert(data.error || 'Auftrag konnte nicht dupliziert werden.'); return; }
+  if(typeof calendar !== 'undefined' && calendar) calendar.refetchEvents();
+  await loadReport();
+  await loadCounter();
+}
+
+let driverVehiclePhotos = [];
+function driverSetStatus(msg){ const el=document.getElementById('driver-status'); if(el) el.textContent=msg||''; }
+function driverEscape(v){ return String(v||'').replace(/[&<>\"]/g, ch=>({'&':'&amp;','<':'&lt;','>':'&gt;','\"':'&quot;'}[ch]||ch)); }
+function driverMinutesLabel(v){ const n=Number(v||0); if(!n) return '-'; const h=Math.floor(n/60), m=n%60; return h ? `${h} Std. ${m ? m+' Min.' : ''}`.trim() : `${m} Min.`; }
+function driverDurationFromTimes(start,end){
+  if(!start || !end || !String(start).includes(':') || !String(end).includes(':')) return 0;
+  const [sh,sm]=String(start).split(':').map(Number);
+  const [eh,em]=String(end).split(':').map(Number);
+  if([sh,sm,eh,em].some(Number.isNaN)) return 0;
+  let a=sh*60+sm, b=eh*60+em;
+  if(b<a) b+=24*60;
+  return Math.max(0,b-a);
+}
+function updateDriverDuration(){
+  const minutes=driverDurationFromTimes(document.getElementById('driver-departure')?.value, document.getElementById('driver-arrival')?.value);
+  const el=document.getElementById('driver-duration');
+  if(el) el.value=minutes ? driverMinutesLabel(minutes) : '';
+  return minutes;
+}
+function renderDriverPhotoPreview(){
+  const box=document.getElementById('driver-photo-preview'); if(!box) return;
+  box.innerHTML=driverVehiclePhotos.map((p,i)=>{ const src=(typeof p==='string'?p:(p&&(p.data||p.thumb))||''); const img=(p&&p.url)?`<a href="${driverEscape(p.url)}" target="_blank" rel="noopener"><img src="${src}" alt="Fahrzeugbild ${i+1}" loading="lazy"></a>`:`<img src="${src}" alt="Fahrzeugbild ${i+1}">`; const saved=(typeof p==='object'&&p.saved_at)?`<small style="display:block;font-size:10px;color:#64748b;max-width:86px;">${driverEscape(p.saved_at)}</small>`:''; return `<span style="position:relative;display:inline-block;">${img}${saved}<button type="button" onclick="removeDriverPhoto(${i})" style="position:absolute;top:-7px;right:-7px;border:0;background:#dc2626;color:#fff;border-radius:999px;width:22px;height:22px;font-weight:900;cursor:pointer;">×</button></span>`; }).join('');
+}
+function removeDriverPhoto(i){ driverVehiclePhotos.splice(i,1); renderDriverPhotoPreview(); }
+function fileToDataUrl(file){ return new Promise((resolve,reject)=>{ const r=new FileReader(); r.onload=()=>resolve(String(r.result||'')); r.onerror=reject; r.readAsDataURL(file); }); }
+function compressDriverImage(file, maxSize=1280, quality=0.72){
+  return new Promise((resolve)=>{
+    const reader=new FileReader();
+    reader.onload=()=>{
+      const img=new Image();
+      img.onload=()=>{
+        try{
+          let w=img.naturalWidth||img.width, h=img.naturalHeight||img.height;
+          const scale=Math.min(1, maxSize/Math.max(w,h));
+          w=Math.max(1, Math.round(w*scale)); h=Math.max(1, Math.round(h*scale));
+          const canvas=document.createElement('canvas');
+          canvas.width=w; canvas.height=h;
+          const ctx=canvas.getContext('2d');
+          ctx.drawImage(img,0,0,w,h);
+          resolve(canvas.toDataURL('image/jpeg', quality));
+        }catch(e){ resolve(String(reader.result||'')); }
+      };
+      img.onerror=()=>resolve(String(reader.result||''));
+      img.src=String(reader.result||'');
+    };
+    reader.onerror=()=>resolve('');
+    reader.readAsDataURL(file);
+  });
+}
+async function handleDriverPhotos(ev){
+  const files=Array.from(ev.target.files||[]).slice(0,8);
+  for(const f of files){
+    if(!String(f.type||'').startsWith('image/')) continue;
+    driverSetStatus('Bild wird verkleinert und gespeichert ...');
+    const data=await compressDriverImage(f);
+    if(data) driverVehiclePhotos.push({data:data, saved_at:new Date().toLocaleString('de-DE')});
+  }
+  driverVehiclePhotos=driverVehiclePhotos.slice(0,8);
+  renderDriverPhotoPreview();
+  driverSetStatus('Bild(er) bereit. Bitte Fahrt speichern.');
+  ev.target.value='';
+}
+function resetDriverForm(){
+  document.getElementById('driver-ride-id').value='';
+  document.getElementById('driver-license-plate').value='';
+  document.getElementById('driver-passenger').value='';
+  document.getElementById('driver-departure').value='';
+  document.getElementById('driver-duration').value='';
+  document.getElementById('driver-arrival').value='';
+  document.getElementById('driver-destination').value='';
+  document.getElementById('driver-remark').value='';
+  driverVehiclePhotos=[]; renderDriverPhotoPreview(); driverSetStatus('');
+}
+function editDriverRide(id){
+  const ride=(window.__driverRides||[]).find(r=>r.id===id); if(!ride) return;
+  document.getElementById('driver-ride-id').value=ride.id||'';
+  document.getElementById('driver-name').value=ride.driver_name||DASHBOARD_CONTEXT.full_name;
+  document.getElementById('driver-duty-date').value=ride.duty_date||'';
+  document.getElementById('driver-service-start').value=ride.service_start||'';
+  document.getElementById('driver-service-end').value=ride.service_end||'';
+  document.getElementById('driver-license-plate').value=ride.license_plate||'';
+  document.getElementById('driver-passenger').value=ride.passenger||'';
+  document.getElementById('driver-departure').value=ride.departure_time||'';
+  document.getElementById('driver-duration').value=driverMinutesLabel(ride.duration_minutes)||'';
+  document.getElementById('driver-arrival').value=ride.arrival_time||'';
+  document.getElementById('driver-destination').value=ride.destination||'';
+  document.getElementById('driver-remark').value=ride.remark||'';
+  driverVehiclePhotos=Array.isArray(ride.vehicle_photos)?ride.vehicle_photos.slice():[];
+  renderDriverPhotoPreview(); window.scrollTo({top:0,behavior:'smooth'});
+}
+async function deleteDriverRide(id){
+  if(!confirm('Fahrt wirklich löschen?')) return;
+  const res=await fetch('/driver/rides/'+encodeURIComponent(id),{method:'DELETE'});
+  const data=await res.json().catch(()=>({}));
+  if(!res.ok || data.error){ alert(data.error||'Fahrt konnte nicht gelöscht werden.'); return; }
+  await loadDriver();
+}
+async function saveDriverRide(){
+  const payload={
+    id:document.getElementById('driver-ride-id').value||'',
+    driver_name:document.getElementById('driver-name').value||DASHBOARD_CONTEXT.full_name,
+    duty_date:document.getElementById('driver-duty-date').value||'',
+    service_start:document.getElementById('driver-service-start').value||'',
+    service_end:document.getElementById('driver-service-end').value||'',
+    license_plate:document.getElementById('driver-license-plate').value||'',
+    passenger:document.getElementById('driver-passenger').value||'',
+    departure_time:document.getElementById('driver-departure').value||'',
+    arrival_time:document.getElementById('driver-arrival').value||'',
+    duration_minutes:updateDriverDuration(),
+    destination:document.getElementById('driver-destination').value||'',
+    remark:document.getElementById('driver-remark').value||'',
+    // Gespeicherte Fotos nur per ID zurücksenden, neue mit Bilddaten.
+    vehicle_photos:driverVehiclePhotos.map(p=>(p&&p.id)?{id:p.id,saved_at:p.saved_at}:p)
+  };
+  const res=await fetch('/driver/rides',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(payload)});
+  const data=await res.json().catch(()=>({}));
+  if(!res.ok || data.error){ alert(data.error||'Fahrt konnte nicht gespeichert werden.'); return; }
+  resetDriverForm(); driverSetStatus('Gespeichert.'); await loadDriver();
+}
+async function loadDriver(more){
+  more=more===true;
+  if(!more) try{
+    const prof=await fetch('/driver/profile?ts='+Date.now()).then(r=>r.json());
+    if(prof.full_name) document.getElementById('driver-name').value=prof.full_name;
+    const img=document.getElementById('driver-profile-image');
+    if(img){ img.src=prof.image_data || 'data:image/svg+xml;charset=UTF-8,'+encodeURIComponent('<svg xmlns="http://www.w3.org/2000/svg" width="120" height="120"><rect width="100%" height="100%" fill="#f3f4f6"/><text x="50%" y="52%" text-anchor="middle" font-family="Arial" font-size="13" fill="#6b7280">Kein Bild</text></svg>'); }
+  }catch(e){}
+  const cursor=more?(window.__driverRidesCursor||''):'';
+  const res=await fetch('/driver/rides?ts='+Date.now()+(cursor?'&cursor='+encodeURIComponent(cursor):''));
+  const data=await res.json().catch(()=>({}));
+  if(!res.ok){ driverSetStatus((data&&data.error)||'Fahrer-Daten konnten nicht geladen werden.'); return; }
+  window.__driverRides=(more?(window.__driverRides||[]):[]).concat(Array.isArray(data.rides)?data.rides:[]);
+  window.__driverRidesCursor=data.next_cursor||'';
+  const moreBtn=document.getElementById('btn-driver-more'); if(moreBtn) moreBtn.style.display=window.__driverRidesCursor?'':'none';
+  const tbody=document.getElementById('driver-rides-list'); if(!tbody) return;
+  if(!window.__driverRides.length){ tbody.innerHTML='<tr><td colspan="12">Noch keine Fahrten gespeichert.</td></tr>'; return; }
+  tbody.innerHTML=window.__driverRides.map(r=>`<tr>
+    <td>${driverEscape(r.duty_date)}</td><td>${driverEscape(r.service_start)}</td><td>${driverEscape(r.service_end)}</td><td>${driverEscape(r.license_plate)}</td><td>${driverEscape(r.passenger)}</td><td>${driverEscape(r.departure_time)}</td>
+    <td>${driverMinutesLabel(r.duration_minutes)}</td><td>${driverEscape(r.arrival_time)}</td><td>${driverEscape(r.destination)}</td><td>${driverEscape(r.remark)}</td>
+    <td>${Array.isArray(r.vehicle_photos)?r.vehicle_photos.length:0}</td>
+    <td><button type="button" onclick="editDriverRide('${driverEscape(r.id)}')">Bearbeiten</button> <button type="button" class="driver-delete" onclick="deleteDriverRide('${driverEscape(r.id)}')">Löschen</button></td>
+  </tr>`).join('');
+}
+async function exportDriverPdf(){
+  const start=document.getElementById('driver-pdf-start')?.value||'', end=document.getElementById('driver-pdf-end')?.value||'';
+  try{
+    driverSetStatus('PDF wird erstellt …');
+    await downloadExportJob('driver_pdf',{start,end},(progress)=>driverSetStatus(`PDF wird erstellt … ${progress} %`));
+    driverSetStatus('PDF fertig.');
+  }catch(err){ driverSetStatus(err.message||'PDF konnte nicht erstellt werden.'); }
+}
+document.getElementById('driver-vehicle-photos')?.addEventListener('change', handleDriverPhotos);
+document.getElementById('driver-departure')?.addEventListener('change', updateDriverDuration);
+document.getElementById('driver-arrival')?.addEventListener('change', updateDriverDuration);
+document.getElementById('driver-departure')?.addEventListener('input', updateDriverDuration);
+document.getElementById('driver-arrival')?.addEventListener('input', updateDriverDuration);
+document.getElementById('btn-driver-save')?.addEventListener('click', saveDriverRide);
+document.getElementById('btn-driver-reset')?.addEventListener('click', resetDriverForm);
+document.getElementById('btn-driver-pdf')?.addEventListener('click', exportDriverPdf);
+document.getElementById('btn-driver-more')?.addEventListener('click', ()=>loadDriver(true));
+
+function setCategoryBadgeM(cat){
+  const el = document.getElementById("r-category-badge");
+  if(!el) return;
+  const raw = String(cat||"CP").toUpperCase();
+  const c = (raw === "CV" || raw === "BS" || raw === "HB") ? raw : "CP";
+  const txt = catToAuftraggeber(c);
+  el.innerHTML = `<span class="badge badge-${c.toLowerCase()}">${txt}</span>`;
+}
+
+function setEmployeeFiltersToCurrentMonth(termineToo=true, reportToo=true){
+  const now = new Date();
+  const m = String(now.getMonth()+1);
+  const y = String(now.getFullYear());
+  if(termineToo){
+    const tm = document.getElementById('termine-month');
+    const ty = document.getElementById('termine-year');
+    if(tm) tm.value = m;
+    if(ty) ty.value = y;
+  }
+  if(reportToo){
+    const rm = document.getElementById('report-month');
+    const ry = document.getElementById('report-year');
+    if(rm) rm.value = m;
+    if(ry) ry.value = y;
+  }
+}
+window.addEventListener('DOMContentLoaded', ()=>setEmployeeFiltersToCurrentMonth(true, true));
+window.addEventListener('pageshow', ()=>setEmployeeFiltersToCurrentMonth(true, true));
+
+document.addEventListener("DOMContentLoaded", ()=>{
+  const body = document.body;
+  const toggle = document.getElementById("amine-nav-toggle");
+  const closeMenu = ()=>body.classList.remove("amine-menu-open");
+  toggle?.addEventListener("click", (event)=>{
+    event.stopPropagation();
+    body.classList.toggle("amine-menu-open");
+  });
+  document.querySelectorAll("nav .left a").forEach(link=>{
+    link.addEventListener("click", ()=>{
+      if(window.matchMedia("(max-width: 900px)").matches) closeMenu();
+    });
+  });
+  document.addEventListener("click", event=>{
+    if(
+      body.classList.contains("amine-menu-open") &&
+      !event.target.closest("nav") &&
+      !event.target.closest("#amine-nav-toggle")
+    ) closeMenu();
+  });
+  window.addEventListener("keydown", event=>{
+    if(event.key === "Escape") closeMenu();
+  });
+  let calendarResizeTimer = null;
+  window.addEventListener("resize", ()=>{
+    clearTimeout(calendarResizeTimer);
+    calendarResizeTimer = setTimeout(()=>{
+      if(typeof calendar === "undefined" || !calendar) return;
+      calendar.updateSize();
+    }, 100);
+  });
+});
@@ -0,0 +1,37 @@
+// Export-Jobs: schwere PDFs werden über POST /exports im Hintergrund gerendert.
+// Der Client fragt /exports/<id> ab, bis der Job fertig ist, und lädt dann die Datei.
+const EXPORT_JOB_MAX_WAIT_MS = 30 * 60 * 1000;
+
+async function waitExportJob(data, onProgress){
+  const jobId = data.job_id || data.id;
+  // Der Server bricht hängende Jobs selbst ab; das Limit schützt nur vor endlosem Polling.
+  const deadline = Date.now() + EXPORT_JOB_MAX_WAIT_MS;
+  while(data.status === "wartend" || data.status === "läuft"){
+    if(Date.now() > deadline) throw new Error("Der Export dauert ungewöhnlich lange. Bitte später erneut versuchen.");
+    if(onProgress) onProgress(Number(data.progress || 0));
+    await new Promise(r=>setTimeout(r, 2000));
+    const poll = await fetch(`/exports/${encodeURIComponent(jobId)}?ts=${Date.now()}`, {credentials:"same-origin"});
+    data = await poll.json().catch(()=>({}));
+    if(!poll.ok) throw new Error(data.error || "Status des Exports unbekannt.");
+  }
+  if(data.status !== "fertig" || !data.download_url) throw new Error(data.error || "Export fehlgeschlagen.");
+  return data;
+}
+
+async function runExportJob(kind, params, onProgress){
+  const res = await fetch("/exports", {
+    method:"POST",
+    credentials:"same-origin",
+    headers:{"Content-Type":"application/json"},
+    body: JSON.stringify({kind, params: params || {}})
+  });
+  const data = await res.json().catch(()=>({}));
+  if(!res.ok) throw new Error(data.error || "Export konnte nicht gestartet werden.");
+  return waitExportJob(data, onProgress);
+}
+
+async function downloadExportJob(kind, params, onProgress){
+  const data = await runExportJob(kind, params, onProgress);
+  window.location.href = data.download_url;
+  return data;
+}
@@ -0,0 +1,18 @@
+    const passwordInput = document.getElementById("password");
+    const passwordToggle = document.getElementById("password-toggle");
+    const loginForm = document.getElementById("login-form");
+    const submitButton = document.getElementById("submit-btn");
+
+    passwordToggle.addEventListener("click", ()=>{
+      const show = passwordInput.type === "password";
+      passwordInput.type = show ? "text" : "password";
+      passwordToggle.setAttribute("aria-pressed", String(show));
+      passwordToggle.setAttribute("aria-label", show ? "Passwort ausblenden" : "Passwort anzeigen");
+      passwordInput.focus();
+    });
+
+    loginForm.addEventListener("submit", ()=>{
+      submitButton.disabled = true;
+      submitButton.textContent = "Anmeldung läuft …";
+    });
+  
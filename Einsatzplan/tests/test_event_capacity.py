@@ -0,0 +1,133 @@
+"""Bestätigungen dürfen einen Einsatz nicht überbuchen (reserve_event_capacity).
+
+Die Zähllogik wird ohne Datenbank geprüft. Der parallele Test braucht eine echte
+PostgreSQL-Datenbank, weil die Sperre über SELECT ... FOR UPDATE geht:
+
+    DATABASE_URL=postgresql://... python -m pytest -q Einsatzplan/tests
+"""
+import os
+import sys
+import threading
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as einsatzplan  # noqa: E402
+
+REQUIRED_STAFF = 3
+PARALLEL_USERS = 12
+needs_db = pytest.mark.skipif(not os.environ.get("DATABASE_URL"), reason="DATABASE_URL nicht gesetzt")
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class _CapacityDB:
+    """Liefert required_staff für die Einsatzzeile und die bestätigten Zusagen."""
+
+    def __init__(self, required_staff, confirmed):
+        self.required_staff = required_staff
+        self.confirmed = confirmed
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        if "FROM event" in sql:
+            return _Rows([{"required_staff": self.required_staff}] if self.required_staff is not None else [])
+        return _Rows([{"username": u} for u in self.confirmed])
+
+
+def test_capacity_locks_event_row():
+    db = _CapacityDB(2, [])
+    einsatzplan.reserve_event_capacity(db, "ev", ["a"])
+    assert "FOR UPDATE" in db.statements[0]
+
+
+@pytest.mark.parametrize("required_staff", [None, 0])
+def test_capacity_without_required_staff_is_unlimited(required_staff):
+    assert einsatzplan.reserve_event_capacity(_CapacityDB(required_staff, ["a", "b"]), "ev", ["c"]) is None
+
+
+def test_capacity_allows_until_full():
+    assert einsatzplan.reserve_event_capacity(_CapacityDB(3, ["a"]), "ev", ["b", "c"]) is None
+
+
+def test_capacity_rejects_when_full():
+    full = einsatzplan.reserve_event_capacity(_CapacityDB(3, ["a", "b"]), "ev", ["c", "d"])
+    assert full == {"confirmed": 2, "required": 3, "free": 1}
+
+
+def test_capacity_ignores_already_confirmed_users():
+    assert einsatzplan.reserve_event_capacity(_CapacityDB(2, ["a", "b"]), "ev", ["a", "b"]) is None
+
+
+@pytest.fixture
+def capacity_event():
+    tag = uuid.uuid4().hex[:8]
+    event_id = f"test-capacity-{tag}"
+    usernames = [f"test_capacity_{tag}_{i}" for i in range(PARALLEL_USERS)]
+    db = einsatzplan.DBWrapper(einsatzplan.connect_db(einsatzplan.DATABASE_URL))
+    try:
+        db.execute(
+            """INSERT INTO event (id, title, start, status, category, required_staff)
+               VALUES (%s, %s, %s, 'offen', 'CV', %s)""",
+            (event_id, "Kapazitätstest", "2099-01-01T08:00", REQUIRED_STAFF),
+        )
+        for username in usernames:
+            db.execute(
+                "INSERT INTO users (username, password, role) VALUES (%s, %s, 'mitarbeiter')",
+                (username, "x"),
+            )
+        db.commit()
+        yield event_id, usernames
+    finally:
+        db.rollback()
+        db.execute("DELETE FROM event WHERE id=%s", (event_id,))
+        db.execute("DELETE FROM users WHERE username = ANY(%s)", (usernames,))
+        db.commit()
+        db.close()
+
+
+@needs_db
+def test_parallel_assign_does_not_overbook(capacity_event):
+    event_id, usernames = capacity_event
+    barrier = threading.Barrier(len(usernames))
+    statuses = {}
+
+    def assign(username):
+        client = einsatzplan.app.test_client()
+        with client.session_transaction() as sess:
+            sess["username"] = "test_capacity_chef"
+            sess["role"] = "chef"
+        barrier.wait()
+        response = client.post("/events/assign_user", json={"event_id": event_id, "username": username})
+        statuses[username] = response.status_code
+
+    threads = [threading.Thread(target=assign, args=(u,)) for u in usernames]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db = einsatzplan.DBWrapper(einsatzplan.connect_db(einsatzplan.DATABASE_URL))
+    try:
+        confirmed = db.execute(
+            "SELECT COUNT(*) AS n FROM response WHERE event_id=%s AND status='bestätigt'", (event_id,)
+        ).fetchone()["n"]
+        counter = db.execute("SELECT confirmed_count FROM event WHERE id=%s", (event_id,)).fetchone()["confirmed_count"]
+    finally:
+        db.close()
+
+    assert confirmed == REQUIRED_STAFF
+    assert counter == REQUIRED_STAFF
+    assert sorted(statuses.values()) == [200] * REQUIRED_STAFF + [409] * (PARALLEL_USERS - REQUIRED_STAFF)
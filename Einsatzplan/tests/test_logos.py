@@ -0,0 +1,60 @@
+"""Logo-Varianten: Breiten aus dem Bild-Header, PDF-Logos passend zur Seite des Canvas."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as einsatzplan  # noqa: E402
+
+LOGOS = ["AS-Logo.png", "CP-Logo.png", "casutt_logo.jpeg"]
+
+
+@pytest.mark.parametrize("fmt, options", [("PNG", {}), ("JPEG", {}), ("JPEG", {"progressive": True})])
+def test_image_header_width_matches_pillow(tmp_path, fmt, options):
+    path = tmp_path / f"logo.{fmt.lower()}"
+    einsatzplan.Image.new("RGB", (317, 41), "white").save(path, fmt, **options)
+    assert einsatzplan.image_header_width(str(path)) == 317
+
+
+def test_image_header_width_rejects_other_formats(tmp_path):
+    path = tmp_path / "logo.gif"
+    path.write_bytes(b"GIF89a" + b"\0" * 32)
+    with pytest.raises(ValueError):
+        einsatzplan.image_header_width(str(path))
+
+
+@pytest.mark.parametrize("filename", LOGOS)
+def test_logo_widths_stay_below_source_width(filename):
+    with einsatzplan.Image.open(os.path.join(einsatzplan.app.static_folder, filename)) as image:
+        source_width = image.width
+    widths = einsatzplan.logo_widths(filename)
+    assert widths == sorted(widths)
+    assert widths[-1] == min(source_width, einsatzplan.LOGO_WEB_WIDTHS[-1])
+    assert all(w <= source_width for w in widths)
+
+
+def _canvas(pagesize):
+    import io
+    return einsatzplan.canvas.Canvas(io.BytesIO(), pagesize=pagesize)
+
+
+def _max_px(points):
+    return points * einsatzplan.PDF_LOGO_DPI / 72 + 1
+
+
+def test_pdf_page_size_follows_canvas():
+    portrait = einsatzplan.A4
+    landscape = (portrait[1], portrait[0])
+    assert einsatzplan.pdf_page_size(_canvas(portrait)) == portrait
+    assert einsatzplan.pdf_page_size(_canvas(landscape)) == landscape
+
+
+def test_pdf_logo_variant_is_limited_by_the_page():
+    small_page = (60, 20)
+    width, height = einsatzplan.pdf_logo_reader(_canvas(small_page), "CP-Logo.png", 500, 500, trim="white").getSize()
+    assert width <= _max_px(small_page[0]) and height <= _max_px(small_page[1])
+
+    a4_width, _ = einsatzplan.pdf_logo_reader(_canvas(einsatzplan.A4), "CP-Logo.png", 500, 500, trim="white").getSize()
+    assert a4_width > width